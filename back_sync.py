@@ -0,0 +1,213 @@
+import os
+import sys
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+import http_client
+import sync_to_gitlab as sync
+from gitlab_api import iter_issues, GitLabAPIError
+from sync_ledger import get_ledger
+from sync_metrics import log, phase, count, write_reports, print_summary
+
+# .env dosyasını yükle
+load_dotenv()
+
+JIRA_URL = os.getenv("JIRA_URL")
+JIRA_API_TOKEN = os.getenv("JIRA_API_TOKEN")
+BACKSYNC_CONCURRENCY = int(os.getenv("BACKSYNC_CONCURRENCY", "4"))  # Aynı anda listelenen proje / güncellenen key
+# Tüm child'lar kapanınca Jira issue'su bu duruma, biri yeniden açılınca geri alınır
+JIRA_DONE_STATUS = os.getenv("JIRA_DONE_STATUS", "Tamamlandı")
+JIRA_REOPEN_STATUS = os.getenv("JIRA_REOPEN_STATUS", "Devam Ediyor")
+BACKSYNC_MIN_WORKLOG = 60  # Jira 1 dakikadan kısa worklog kabul etmez; kısa süreler birikir
+
+JIRA_HEADERS = {
+    "Authorization": f"Bearer {JIRA_API_TOKEN}",
+    "Accept": "application/json",
+    "Content-Type": "application/json",
+}
+
+
+# ------------------- GITLAB'DEN DEĞİŞENLER -------------------
+def child_project_ids():
+    """Child issue'ların açıldığı projeler (master hariç)."""
+    ids = list(sync.TEAM_PROJECT_MAP.values()) + list(sync.STAJYER_PROJECT_MAP.values())
+    return [pid for pid in dict.fromkeys(ids) if pid and str(pid) != str(sync.MASTER_PROJECT_ID)]
+
+def changed_children(project_id, since):
+    """Projede cursor'dan beri güncellenen, bu defterin açtığı child'lar ve yeni cursor.
+
+    updated_after ile yalnızca değişenler listelendiği için maliyet değişiklik sayısıyla orantılıdır.
+    Jira key'i label'dan değil, defterdeki child IID eşlemesinden alınır; elle açılmış ya da
+    başka bir shard'ın issue'ları ve Jira key'ine benzeyen sıradan label'lar atlanır.
+    """
+    issues = list(iter_issues(project_id, order_by="updated_at", since=since, state="all"))
+    keys = get_ledger().child_keys(project_id)
+    records = []
+    newest = since
+    for issue in issues:
+        newest = max(newest or issue["updated_at"], issue["updated_at"])
+        jira_key = keys.get(issue["iid"])
+        if jira_key:
+            time_spent = int((issue.get("time_stats") or {}).get("total_time_spent") or 0)
+            records.append((int(project_id), issue["iid"], jira_key, issue.get("state"), time_spent))
+    return records, newest
+
+
+# ------------------- JIRA'YA GÖNDERİM -------------------
+class JiraIssueNotFound(Exception):
+    """Issue Jira'da yok (silinmiş ya da taşınmış); tekrar denemenin anlamı yok."""
+
+def transition_issue(jira_key, target_status):
+    """Issue'yu hedef duruma geçir; zaten o durumdaysa bir şey yapmaz (tek GET + gerekirse tek POST)."""
+    url = f"{JIRA_URL}/rest/api/2/issue/{jira_key}"
+    r = http_client.get(url, headers=JIRA_HEADERS, params={"fields": "status", "expand": "transitions"})
+    if r.status_code == 404:
+        raise JiraIssueNotFound(jira_key)
+    if r.status_code != 200:
+        log(f"⚠️ Jira issue okunamadı ({jira_key}): {r.status_code}", jira_key=jira_key)
+        return False
+    data = r.json()
+    if (data.get("fields", {}).get("status") or {}).get("name") == target_status:
+        return True
+    transition = next((t for t in data.get("transitions", []) if t.get("to", {}).get("name") == target_status), None)
+    if transition is None:
+        log(f"⚠️ {jira_key} için '{target_status}' geçişi yok.", jira_key=jira_key)
+        return False
+    with phase("jira_transition"):
+        r = http_client.post(f"{url}/transitions", headers=JIRA_HEADERS, json={"transition": {"id": transition["id"]}})
+    if r.status_code not in (200, 204):
+        log(f"⚠️ Jira geçişi başarısız ({jira_key} -> {target_status}): {r.status_code} {r.text}", jira_key=jira_key)
+        return False
+    log(f"🔁 {jira_key}: Jira durumu '{target_status}' yapıldı.", jira_key=jira_key)
+    return True
+
+def _worklog_marker(token):
+    return f"[gitlab-sync:{token}]"
+
+def worklog_exists(jira_key, token):
+    """Token'lı worklog Jira'ya daha önce yazılmış mı (sonucu bilinmeyen POST'lar için)."""
+    r = http_client.get(f"{JIRA_URL}/rest/api/2/issue/{jira_key}/worklog", headers=JIRA_HEADERS)
+    if r.status_code == 404:
+        raise JiraIssueNotFound(jira_key)
+    if r.status_code != 200:
+        raise RuntimeError(f"worklog listesi okunamadı: {r.status_code}")
+    marker = _worklog_marker(token)
+    return any(marker in (w.get("comment") or "") for w in r.json().get("worklogs", []))
+
+def add_worklog(jira_key, seconds, token):
+    # Kalan tahmin Jira'da elle yönetildiği için değiştirilmez; token tekrar gönderimi önler
+    with phase("jira_worklog"):
+        r = http_client.post(
+            f"{JIRA_URL}/rest/api/2/issue/{jira_key}/worklog",
+            headers=JIRA_HEADERS, params={"adjustEstimate": "leave"},
+            json={"timeSpentSeconds": int(seconds),
+                  "comment": f"GitLab child issue'larında kaydedilen süre {_worklog_marker(token)}"},
+            retry=False,
+        )
+    if r.status_code == 404:
+        raise JiraIssueNotFound(jira_key)
+    if r.status_code != 201:
+        log(f"⚠️ Worklog eklenemedi ({jira_key}): {r.status_code} {r.text}", jira_key=jira_key)
+        return False
+    log(f"⏱️ {jira_key}: {int(seconds) // 60} dk worklog eklendi.", jira_key=jira_key)
+    return True
+
+def push_worklog(jira_key):
+    """Bekleyen ya da yeni biriken süreyi tek worklog olarak gönder; en fazla bir kez yazılır."""
+    ledger = get_ledger()
+    claimed = ledger.claim_worklog(jira_key, BACKSYNC_MIN_WORKLOG)
+    if claimed is None:
+        return True
+    token, seconds, fresh = claimed
+    # Önceki turdan kalan worklog gönderilmiş ama sonucu yazılamamış olabilir
+    done = (not fresh and worklog_exists(jira_key, token)) or add_worklog(jira_key, seconds, token)
+    count("backsync", action="worklog", result="ok" if done else "failed")
+    if done:
+        ledger.finish_worklog(jira_key)
+    return done
+
+def push_key(jira_key):
+    """Key'in child özetindeki farkı (durum ve/veya yeni süre) Jira'ya gönder."""
+    ledger = get_ledger()
+    summary = ledger.backsync_summary(jira_key)
+    desired = "done" if summary["children"] and summary["closed"] == summary["children"] else "open"
+
+    try:
+        state_ok = True
+        if desired != summary["pushed_state"]:
+            # İlk görüşte açık olan issue'lar için Jira'ya dokunulmaz
+            if summary["pushed_state"] is not None or desired == "done":
+                state_ok = transition_issue(jira_key, JIRA_DONE_STATUS if desired == "done" else JIRA_REOPEN_STATUS)
+                count("backsync", action="transition", result="ok" if state_ok else "failed")
+        time_ok = push_worklog(jira_key)
+    except JiraIssueNotFound:
+        # Jira'da olmayan issue her turda tekrar denenmesin
+        log(f"⚠️ {jira_key} Jira'da bulunamadı; geri aktarımdan çıkarıldı.", jira_key=jira_key)
+        count("backsync", action="skip", result="not_found")
+        ledger.finish_worklog(jira_key)
+        ledger.mark_backsynced(jira_key)
+        return True
+
+    if state_ok and time_ok:
+        ledger.mark_backsynced(jira_key, desired)
+    return state_ok and time_ok
+
+def back_sync(concurrency=BACKSYNC_CONCURRENCY, project_ids=None):
+    """GitLab'de cursor'dan beri değişen child'ların durum ve sürelerini Jira'ya aktar.
+
+    Cursor'lar değişiklikler deftere yazıldıktan sonra ilerler; Jira'ya
+    gönderilemeyen key'ler 'dirty' kalır ve sonraki turda tekrar denenir.
+    """
+    ledger = get_ledger()
+    project_ids = project_ids or child_project_ids()
+    concurrency = max(1, int(concurrency))
+
+    def _list(pid):
+        try:
+            return pid, changed_children(pid, ledger.get_cursor(pid))
+        except GitLabAPIError as e:
+            # Cursor ilerlemez; proje sonraki turda aynı yerden tekrar listelenir
+            log(f"⚠️ {e}; proje bu turda atlandı.")
+            return pid, ([], None)
+
+    with phase("backsync_list"):
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="backsync") as pool:
+            listed = list(pool.map(_list, project_ids))
+    changed = 0
+    for pid, (records, newest) in listed:
+        ledger.observe_children(records)
+        changed += len(records)
+        if newest:
+            ledger.set_cursor(pid, newest)
+
+    keys = ledger.dirty_keys()
+    ok = 0
+    with phase("backsync_push"):
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="backsync") as pool:
+            for jira_key, done in zip(keys, pool.map(_safe_push, keys)):
+                ok += bool(done)
+    log(f"↩️ Geri aktarım: {len(project_ids)} projede {changed} child listelendi, "
+        f"{len(keys)} Jira issue'su, {ok} başarılı ({datetime.now():%H:%M:%S})")
+    return {"changed_children": changed, "keys": len(keys), "pushed": ok}
+
+def _safe_push(jira_key):
+    try:
+        return push_key(jira_key)
+    except Exception as e:
+        log(f"❌ {jira_key} Jira'ya aktarılamadı: {e}", jira_key=jira_key)
+        return False
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="GitLab child issue'larının durumunu ve harcanan süresini Jira'ya geri aktar.")
+    arg_parser.add_argument("--concurrency", type=int, default=BACKSYNC_CONCURRENCY)
+    arg_parser.add_argument("--projects", nargs="+", type=int,
+                            help="Yalnızca bu projeler (varsayılan: tüm takım/stajyer projeleri)")
+    args = arg_parser.parse_args()
+
+    try:
+        result = back_sync(args.concurrency, args.projects)
+    finally:
+        print_summary(write_reports())
+    sys.exit(0 if result["pushed"] == result["keys"] else 1)
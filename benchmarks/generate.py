@@ -0,0 +1,64 @@
+"""Sentetik Jira issue'ları (REST /search cevabındaki biçimde)."""
+import random
+from datetime import datetime, timedelta
+
+_WORDS = ("sistem analiz test otomasyon simülasyon entegrasyon donanım yazılım arayüz "
+          "performans ölçüm rapor tasarım doğrulama modül").split()
+
+
+def stakeholders(count):
+    return [f"stajyer.{i:03d}" for i in range(count)]
+
+
+def attachments_for(n, count, size_kb=64):
+    """Issue başına `count` ek; ilki tüm issue'larda aynı içerikte (içerik tekilleştirmesi için)."""
+    result = []
+    for j in range(count):
+        attachment_id = n * 100 + j
+        filename = "logo.png" if j == 0 else f"spec-{n}-{j}.pdf"
+        result.append({
+            "id": str(attachment_id),
+            "filename": filename,
+            "size": size_kb * 1024,
+            "mimeType": "image/png" if j == 0 else "application/pdf",
+            # Taklit sunucu bu yolu kendi adresiyle tamamlar; _seed içeriği belirler
+            "content": f"/secure/attachment/{attachment_id}/{filename}",
+            "_seed": "logo" if j == 0 else f"{n}-{j}",
+        })
+    return result
+
+
+def jira_issue(n, stakeholder_names, description_chars=2000, project="BENCH", rng=random,
+               attachments=0, attachment_kb=64):
+    updated = datetime(2025, 10, 1) + timedelta(minutes=n)
+    description = " ".join(rng.choice(_WORDS) for _ in range(description_chars // 8))[:description_chars]
+    return {
+        "key": f"{project}-{n}",
+        "id": str(100000 + n),
+        "fields": {
+            "summary": f"{rng.choice(_WORDS).title()} {rng.choice(_WORDS)} #{n}",
+            "description": description,
+            "assignee": {"name": stakeholder_names[n % len(stakeholder_names)]} if stakeholder_names else None,
+            "reporter": {"name": "bench.reporter"},
+            "priority": {"name": rng.choice(["Minör", "Majör", "Kritik"])},
+            "status": {"name": "Başlanmamış"},
+            "duedate": (updated + timedelta(days=30)).strftime("%Y-%m-%d"),
+            "issuetype": {"name": "Görev"},
+            "project": {"key": project, "name": "Benchmark"},
+            "labels": ["bench"],
+            "timeoriginalestimate": 3600 * (1 + n % 8),
+            "timespent": None,
+            "updated": updated.strftime("%Y-%m-%dT%H:%M:%S.000+0300"),
+            "customfield_10601": [{"name": name} for name in stakeholder_names],
+            "attachment": attachments_for(n, attachments, attachment_kb),
+        },
+    }
+
+
+def jira_issues(count, stakeholder_count=3, description_chars=2000, project="BENCH", seed=42,
+                attachments=0, attachment_kb=64):
+    """count issue x stakeholder_count ilgili stajyer; aynı seed aynı veriyi üretir."""
+    rng = random.Random(seed)
+    names = stakeholders(stakeholder_count)
+    return [jira_issue(n, names, description_chars, project, rng, attachments, attachment_kb)
+            for n in range(1, count + 1)]
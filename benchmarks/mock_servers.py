@@ -0,0 +1,345 @@
+"""Benchmark'lar için yerel Jira + GitLab taklidi (tek HTTP sunucusu).
+
+Yalnızca sync araçlarının kullandığı endpoint'ler vardır:
+  Jira:   GET /rest/api/2/search, GET /rest/api/2/issue/:key[/worklog],
+          POST /rest/api/2/issue/:key/(transitions|worklog), GET /secure/attachment/:id/:name
+  GitLab: /api/v4/projects/:id[/issues[/:iid[/links|/time_estimate|/add_spent_time]]],
+          POST /api/v4/projects/:id/uploads,
+          /api/v4/groups/:id/milestones[/:id], /api/v4/users, /api/v4/user,
+          POST /api/graphql (createIssue / createNote)
+
+Gecikme, sayfa boyutu sınırı ve 429 davranışı ayarlanabilir.
+"""
+import re
+import json
+import hashlib
+import time
+import random
+import threading
+import itertools
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+_EPOCH = datetime(2025, 1, 1)
+
+
+class MockState:
+    def __init__(self, jira_issues=None):
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.jira_issues = list(jira_issues or [])
+        self.issues = {}      # project_id -> [issue]
+        self.milestones = []  # grup milestone'ları
+        self.links = []
+        self.uploads = []     # (project_id, dosya adı, bayt)
+        self.worklogs = []    # (Jira key, saniye, yorum)
+        self.transitions = []  # (Jira key, hedef durum)
+        self.requests = 0
+        self.window = [time.time(), 0]  # RateLimit-* başlıkları için (pencere başı, istek sayısı)
+        # Ek id -> (boyut, içerik tohumu); içerik istek anında üretilir
+        self.attachments = {a["id"]: (a["size"], a.get("_seed", a["id"]))
+                            for issue in self.jira_issues for a in issue["fields"].get("attachment") or []}
+
+    def new_issue(self, project_id, data):
+        with self.lock:
+            issues = self.issues.setdefault(project_id, [])
+            gid = next(self.ids)
+            labels = data.get("labels") or []
+            if isinstance(labels, str):
+                labels = [lbl for lbl in labels.split(",") if lbl]
+            # created_at her issue için farklı ve artan; cursor sayfalaması bunu kullanır
+            created = self._timestamp(gid)
+            issue = dict(data, id=gid, iid=len(issues) + 1, project_id=project_id, labels=labels,
+                         state="opened", created_at=created, updated_at=created,
+                         time_stats={"time_estimate": 0, "total_time_spent": 0},
+                         assignees=[{"id": a} for a in data.get("assignee_ids") or []],
+                         web_url=f"http://mock/p{project_id}/-/issues/{len(issues) + 1}")
+            issues.append(issue)
+            return issue
+
+
+    @staticmethod
+    def _timestamp(tick):
+        return (_EPOCH + timedelta(milliseconds=tick)).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+    def touch(self, issue):
+        """updated_at'i ilerlet (kilit altında çağrılır)."""
+        issue["updated_at"] = self._timestamp(next(self.ids))
+
+
+_DURATION = re.compile(r"(\d+)([hm])")
+
+class MockConfig:
+    def __init__(self, latency_ms=20.0, jitter_ms=5.0, max_per_page=100, throttle_every=0, retry_after=0.05,
+                 rate_limit=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.max_per_page = max_per_page
+        # Her N. istekte 429 döner (0: kapalı)
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        # Dakikalık kota; GitLab gibi RateLimit-Limit/Remaining/Reset başlıklarıyla bildirilir (0: başlık yok)
+        self.rate_limit = rate_limit
+
+
+def attachment_bytes(size, seed):
+    block = hashlib.sha256(str(seed).encode("utf-8")).digest() * 128
+    return (block * (size // len(block) + 1))[:size]
+
+
+def _handler(state, config):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send(self, code, body=None, headers=None):
+            data = b"" if body is None else json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            if config.rate_limit:
+                # _send bazen state.lock altında çağrılır; pencere kilitsiz okunur
+                start, used = state.window
+                headers = dict(headers or {}, **{
+                    "RateLimit-Limit": str(config.rate_limit),
+                    "RateLimit-Remaining": str(max(0, config.rate_limit - used)),
+                    "RateLimit-Reset": str(int(start + 60)),
+                })
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_bytes(self, data):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            self._raw = raw
+            try:
+                return json.loads(raw or b"{}")
+            except ValueError:
+                return {}
+
+        def _page(self, items, query):
+            per_page = min(int(query.get("per_page", ["20"])[0]), config.max_per_page)
+            page = int(query.get("page", ["1"])[0])
+            chunk = items[(page - 1) * per_page: page * per_page]
+            has_next = page * per_page < len(items)
+            return chunk, {"X-Next-Page": str(page + 1) if has_next else "", "X-Total": str(len(items))}
+
+        def _handle(self, method):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            body = self._body() if method in ("POST", "PUT") else {}
+            time.sleep(max(0.0, config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)) / 1000)
+            with state.lock:
+                state.requests += 1
+                if time.time() - state.window[0] >= 60:
+                    state.window = [time.time(), 0]
+                state.window[1] += 1
+                throttled = config.throttle_every and state.requests % config.throttle_every == 0
+            if throttled:
+                return self._send(429, {"message": "Too Many Requests"}, {"Retry-After": str(config.retry_after)})
+
+            path = url.path
+            m = re.fullmatch(r"/secure/attachment/(\d+)/[^/]+", path)
+            if m and m.group(1) in state.attachments:
+                return self._send_bytes(attachment_bytes(*state.attachments[m.group(1)]))
+            if path.startswith("/rest/api/2/"):
+                return self._jira(method, path[len("/rest/api/2"):], query, body)
+            if path == "/api/graphql":
+                return self._graphql(body)
+            if path.startswith("/api/v4/"):
+                return self._gitlab(method, path[len("/api/v4"):], query, body)
+            return self._send(404, {"message": "not found"})
+
+        # ------------------- JIRA -------------------
+        def _jira(self, method, path, query, body):
+            if path == "/search":
+                start = int(query.get("startAt", ["0"])[0])
+                size = min(int(query.get("maxResults", ["50"])[0]), config.max_per_page)
+                return self._send(200, {"startAt": start, "maxResults": size, "total": len(state.jira_issues),
+                                        "issues": state.jira_issues[start:start + size]})
+            m = re.fullmatch(r"/issue/([^/]+)(/transitions|/worklog)?", path)
+            if m:
+                found = [i for i in state.jira_issues if i["key"] == m.group(1)]
+                if not found:
+                    return self._send(404, {})
+                issue = found[0]
+                if m.group(2) == "/worklog" and method == "GET":
+                    with state.lock:
+                        worklogs = [{"timeSpentSeconds": sec, "comment": comment}
+                                    for key, sec, comment in state.worklogs if key == issue["key"]]
+                    return self._send(200, {"startAt": 0, "total": len(worklogs), "worklogs": worklogs})
+                if m.group(2) == "/worklog":
+                    with state.lock:
+                        state.worklogs.append((issue["key"], body.get("timeSpentSeconds"), body.get("comment")))
+                    return self._send(201, {"id": str(len(state.worklogs))})
+                if m.group(2) == "/transitions":
+                    target = {"31": "Tamamlandı", "21": "Devam Ediyor"}[body["transition"]["id"]]
+                    with state.lock:
+                        state.transitions.append((issue["key"], target))
+                        issue["fields"]["status"] = {"name": target}
+                    return self._send(204)
+                transitions = [{"id": "31", "to": {"name": "Tamamlandı"}}, {"id": "21", "to": {"name": "Devam Ediyor"}}]
+                return self._send(200, dict(issue, transitions=transitions))
+            return self._send(404, {})
+
+        # ------------------- GITLAB REST -------------------
+        def _gitlab(self, method, path, query, body):
+            m = re.fullmatch(r"/projects/(\d+)/issues", path)
+            if m:
+                pid = int(m.group(1))
+                if method == "POST":
+                    return self._send(201, state.new_issue(pid, body))
+                with state.lock:
+                    items = sorted(state.issues.get(pid, []), key=lambda i: i[query.get("order_by", ["created_at"])[0]])
+                if "created_after" in query:
+                    items = [i for i in items if i["created_at"] >= query["created_after"][0]]
+                if "updated_after" in query:
+                    items = [i for i in items if i["updated_at"] >= query["updated_after"][0]]
+                if "labels" in query:
+                    items = [i for i in items if query["labels"][0] in i["labels"]]
+                chunk, headers = self._page(items, query)
+                return self._send(200, chunk, headers)
+
+            m = re.fullmatch(r"/projects/(\d+)/uploads", path)
+            if m and method == "POST":
+                disposition = re.search(r'filename="([^"]*)"', self._raw.decode("latin-1", "replace"))
+                filename = disposition.group(1) if disposition else "file"
+                secret = hashlib.md5(self._raw).hexdigest()
+                with state.lock:
+                    state.uploads.append((int(m.group(1)), filename, len(self._raw)))
+                url = f"/uploads/{secret}/{filename}"
+                return self._send(201, {"alt": filename, "url": url, "markdown": f"[{filename}]({url})"})
+
+            m = re.fullmatch(r"/projects/(\d+)/issues/(\d+)(/links|/time_estimate|/add_spent_time)?", path)
+            if m:
+                pid, iid, sub = int(m.group(1)), int(m.group(2)), m.group(3)
+                with state.lock:
+                    issues = state.issues.get(pid, [])
+                    found = next((i for i in issues if i["iid"] == iid), None)
+                    if found is None:
+                        return self._send(404, {"message": "404 Issue Not Found"})
+                    if sub == "/links" and method == "POST":
+                        state.links.append((pid, iid, body.get("target_project_id"), body.get("target_issue_iid")))
+                        return self._send(201, {})
+                    if sub == "/links":
+                        # GitLab linkleri iki yönden de listeler
+                        rest_links = [link for link in state.links if len(link) == 4]
+                        linked = [(tp, ti) for sp, si, tp, ti in rest_links if (sp, si) == (pid, iid)]
+                        linked += [(sp, si) for sp, si, tp, ti in rest_links if (tp, ti) == (pid, iid)]
+                        return self._send(200, [{"project_id": tp, "iid": ti, "link_type": "relates_to"}
+                                                for tp, ti in linked])
+                    if sub == "/add_spent_time":
+                        duration = query.get("duration", [""])[0]
+                        seconds = sum(int(n) * (3600 if unit == "h" else 60) for n, unit in _DURATION.findall(duration))
+                        found["time_stats"]["total_time_spent"] += seconds
+                        state.touch(found)
+                        return self._send(201, found["time_stats"])
+                    if sub == "/time_estimate":
+                        found["time_estimate"] = body.get("duration")
+                        return self._send(200, found)
+                    if method == "DELETE":
+                        issues.remove(found)
+                        return self._send(204)
+                    if method == "PUT":
+                        event = body.pop("state_event", None)
+                        if event:
+                            found["state"] = "closed" if event == "close" else "opened"
+                        found.update(body)
+                        state.touch(found)
+                    return self._send(200, found)
+
+            m = re.fullmatch(r"/projects/(\d+)", path)
+            if m:
+                pid = int(m.group(1))
+                return self._send(200, {"id": pid, "name": f"Proje {pid}", "path_with_namespace": f"bench/p{pid}"})
+
+            m = re.fullmatch(r"/groups/(\d+)/milestones(?:/(\d+))?", path)
+            if m:
+                if m.group(2) and method == "DELETE":
+                    with state.lock:
+                        state.milestones = [x for x in state.milestones if x["id"] != int(m.group(2))]
+                    return self._send(204)
+                if method == "POST":
+                    with state.lock:
+                        milestone = {"id": next(state.ids), "title": body.get("title")}
+                        state.milestones.append(milestone)
+                    return self._send(201, milestone)
+                with state.lock:
+                    items = list(state.milestones)
+                chunk, headers = self._page(items, query)
+                return self._send(200, chunk, headers)
+
+            if path == "/users":
+                username = query.get("username", [""])[0]
+                return self._send(200, [{"id": 10000 + sum(map(ord, username)), "username": username}])
+            if path == "/user":
+                return self._send(200, {"id": 1, "username": "bench"})
+            return self._send(404, {"message": "not found"})
+
+        # ------------------- GITLAB GRAPHQL -------------------
+        def _graphql(self, body):
+            data = {}
+            query = body.get("query", "")
+            for name, inp in (body.get("variables") or {}).items():
+                alias = name.replace("in", "i" if "createIssue" in query else "n", 1)
+                if "projectPath" in inp:
+                    pid = int(inp["projectPath"].rsplit("/p", 1)[-1])
+                    issue = state.new_issue(pid, {"title": inp["title"], "description": inp.get("description"),
+                                                  "labels": inp.get("labels", [])})
+                    data[alias] = {"issue": {"id": f"gid://gitlab/Issue/{issue['id']}", "iid": str(issue["iid"]),
+                                             "webUrl": issue["web_url"]}, "errors": []}
+                else:
+                    with state.lock:
+                        state.links.append(("note", inp.get("noteableId"), inp.get("body")))
+                    data[alias] = {"errors": []}
+            return self._send(200, {"data": data})
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def do_PUT(self):
+            self._handle("PUT")
+
+        def do_DELETE(self):
+            self._handle("DELETE")
+
+    return Handler
+
+
+class MockServer:
+    """Arka planda çalışan taklit sunucu; `base_url` hem Jira hem GitLab kökü olarak kullanılır."""
+
+    def __init__(self, jira_issues=None, config=None, host="127.0.0.1", port=0):
+        self.state = MockState(jira_issues)
+        self.config = config or MockConfig()
+        self._server = ThreadingHTTPServer((host, port), _handler(self.state, self.config))
+        self._server.daemon_threads = True
+        self.base_url = f"http://{host}:{self._server.server_address[1]}"
+        # Jira ek adresleri mutlak olmalı; üretilen göreli yollar sunucu adresiyle tamamlanır
+        for issue in self.state.jira_issues:
+            for attachment in issue["fields"].get("attachment") or []:
+                if attachment["content"].startswith("/"):
+                    attachment["content"] = self.base_url + attachment["content"]
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="mock-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
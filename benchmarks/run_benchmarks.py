@@ -0,0 +1,243 @@
+"""Jira -> GitLab aktarımının çevrimdışı benchmark'ı.
+
+Yerel taklit sunucuya (mock_servers.py) karşı fetch, compare, sync ve delete
+aşamalarını çalıştırır; her aşama için issue/sn, issue başına istek sayısı,
+istek gecikmesi p50/p95 ve tepe bellek ölçülür. Sonuçlar
+benchmarks/results/<etiket>.json dosyasına yazılır ve --compare ile önceki
+bir sonuçla karşılaştırılabilir.
+
+Örnek:
+    python benchmarks/run_benchmarks.py --issues 200 --stakeholders 3 --latency-ms 20
+    python benchmarks/run_benchmarks.py --label yeni --compare benchmarks/results/eski.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+import subprocess
+import tracemalloc
+from datetime import datetime
+
+from generate import jira_issues
+from mock_servers import MockServer, MockConfig
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+MASTER_PROJECT_ID = 100
+GROUP_ID = 1
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def configure_env(base_url, state_dir, args):
+    """Repo modülleri ayarlarını import anında okuduğu için ortam import'tan önce kurulur."""
+    teams = {f"Takım {t}": MASTER_PROJECT_ID + 1 + t for t in range(args.teams)}
+    team_ids = list(teams.values())
+    stajyer_map = {f"stajyer.{i:03d}": team_ids[i % len(team_ids)] for i in range(args.stakeholders)}
+    os.environ.update({
+        "JIRA_URL": base_url,
+        "JIRA_PROJECT": "BENCH",
+        "JIRA_INCREMENTAL": "0",
+        "GITLAB_API_URL": f"{base_url}/api/v4",
+        "GITLAB_TOKEN": "bench",
+        "MASTER_PROJECT_ID": str(MASTER_PROJECT_ID),
+        "GROUP_ID": str(GROUP_ID),
+        "TEAM_PROJECT_MAP": json.dumps(teams, ensure_ascii=False),
+        "STAJYER_PROJECT_MAP": json.dumps(stajyer_map),
+        "CSV_FOLDER": state_dir,
+        "HTTP_BACKOFF_BASE": "0.05",
+        "ATTACHMENT_MAX_BYTES_PER_SEC": str(args.attachment_rate_kb * 1024),
+    })
+    if args.rate_limit:
+        # Verilmezse istemci hızı taklit sunucunun RateLimit-* başlıklarından ayarlanır
+        os.environ.update({"HTTP_RATE_LIMIT": str(args.rate_limit),
+                           "HTTP_RATE_BURST": str(max(1, int(args.rate_limit)))})
+    return [MASTER_PROJECT_ID] + team_ids
+
+
+def measure_import_time(runs=3):
+    """Yeni bir yorumlayıcıda `import sync_to_gitlab` süresi (en iyi değer, ms)."""
+    code = "import time; t = time.perf_counter(); import sync_to_gitlab; print(time.perf_counter() - t)"
+    timings = []
+    for _ in range(runs):
+        out = subprocess.check_output([sys.executable, "-c", code], cwd=REPO_DIR, env=os.environ, text=True)
+        timings.append(float(out.strip().splitlines()[-1]) * 1000)
+    return round(min(timings), 1)
+
+
+class PhaseRecorder:
+    """Aşama bazında süre, istek sayısı, gecikme ve tepe bellek ölçer."""
+
+    def __init__(self, http_client, verbose=False):
+        self.http_client = http_client
+        self.verbose = verbose
+        self.latencies = []
+        self.results = {}
+        # Her cevabın süresi requests'in response hook'u ile toplanır
+        http_client.get_session().hooks["response"].append(self._on_response)
+
+    def _on_response(self, response, *args, **kwargs):
+        self.latencies.append(response.elapsed.total_seconds() * 1000)
+
+    def _requests(self):
+        return sum(s["requests"] for s in self.http_client.get_stats().values())
+
+    def _retries(self):
+        return sum(s["retries"] for s in self.http_client.get_stats().values())
+
+    @contextlib.contextmanager
+    def phase(self, name, issues):
+        start_requests, start_retries, start_latency = self._requests(), self._retries(), len(self.latencies)
+        tracemalloc.reset_peak()
+        base_memory = tracemalloc.get_traced_memory()[0]
+        output = contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+        started = time.perf_counter()
+        with output:
+            yield
+        elapsed = time.perf_counter() - started
+        requests = self._requests() - start_requests
+        latencies = self.latencies[start_latency:]
+        self.results[name] = {
+            "seconds": round(elapsed, 3),
+            "issues": issues,
+            "issues_per_sec": round(issues / elapsed, 2) if elapsed else None,
+            "requests": requests,
+            "requests_per_issue": round(requests / issues, 2) if issues else None,
+            "retries": self._retries() - start_retries,
+            "latency_p50_ms": round(percentile(latencies, 50), 2) if latencies else None,
+            "latency_p95_ms": round(percentile(latencies, 95), 2) if latencies else None,
+            "peak_memory_kb": round((tracemalloc.get_traced_memory()[1] - base_memory) / 1024, 1),
+        }
+        print(f"  {name:8s} {self.results[name]['seconds']:8.2f} sn  "
+              f"{self.results[name]['issues_per_sec'] or 0:8.1f} issue/sn  "
+              f"{self.results[name]['requests_per_issue'] or 0:6.2f} istek/issue  "
+              f"p95 {self.results[name]['latency_p95_ms'] or 0:6.1f} ms  "
+              f"bellek {self.results[name]['peak_memory_kb']:9.1f} KB")
+
+
+def run(args):
+    server = MockServer(
+        jira_issues(args.issues, args.stakeholders, args.description_chars,
+                    attachments=args.attachments, attachment_kb=args.attachment_kb),
+        MockConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, max_per_page=args.page_size,
+                   throttle_every=args.throttle_every, rate_limit=args.server_rate_limit),
+    ).start()
+    state_dir = tempfile.mkdtemp(prefix="bench_state_")
+    project_ids = configure_env(server.base_url, state_dir, args)
+
+    results = {"import_ms": measure_import_time()} if not args.skip_import else {}
+
+    # Ortam hazır; artık repo modülleri import edilebilir
+    sys.path.insert(0, REPO_DIR)
+    tracemalloc.start()
+    import http_client
+    import jira_auto_export
+    import compare_issues
+    import sync_to_gitlab
+    import delete_all_issues
+
+    recorder = PhaseRecorder(http_client, args.verbose)
+    worker = sync_to_gitlab.sync_issue_graphql if args.backend == "graphql" else sync_to_gitlab.sync_issue
+    print(f"🏁 {args.issues} issue x {args.stakeholders} stajyer x {args.attachments} ek, {args.latency_ms} ms gecikme, "
+          f"backend={args.backend}, concurrency={args.concurrency}")
+
+    with recorder.phase("fetch", args.issues):
+        jira_auto_export.fetch_jira_csv(incremental=False)
+    with recorder.phase("compare", args.issues):
+        compare_issues.compare_issues()
+    with recorder.phase("sync", args.issues):
+        rows = sync_to_gitlab.read_jira_csv_robustly(compare_issues.TO_ADD_FILE)
+        sync_to_gitlab.run_sync(rows, args.concurrency, worker=worker)
+    if not args.skip_delete:
+        with recorder.phase("delete", args.issues):
+            delete_all_issues.purge_issues(set(project_ids), only_synced=True, concurrency=args.concurrency)
+
+    server.stop()
+    results["phases"] = recorder.results
+    return results
+
+
+def compare(current, baseline):
+    """İki sonuç arasındaki farkı yazdır (pozitif % = artış)."""
+    print(f"\n📊 Karşılaştırma: {baseline.get('label')} -> {current.get('label')}")
+    if current.get("import_ms") is not None and baseline.get("import_ms") is not None:
+        print(f"  import: {baseline['import_ms']} -> {current['import_ms']} ms")
+    metrics = ("issues_per_sec", "requests_per_issue", "latency_p95_ms", "peak_memory_kb")
+    for name, phase in current["results"]["phases"].items():
+        old = baseline["results"]["phases"].get(name)
+        if not old:
+            continue
+        parts = []
+        for metric in metrics:
+            new_value, old_value = phase.get(metric), old.get(metric)
+            if new_value is None or not old_value:
+                continue
+            parts.append(f"{metric} {old_value} -> {new_value} ({(new_value - old_value) / old_value * 100:+.1f}%)")
+        print(f"  {name}: " + ", ".join(parts))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Jira -> GitLab aktarımını yerel taklit sunucuya karşı ölç.")
+    arg_parser.add_argument("--issues", type=int, default=200)
+    arg_parser.add_argument("--stakeholders", type=int, default=3, help="Issue başına ilgili stajyer sayısı")
+    arg_parser.add_argument("--teams", type=int, default=3, help="Stajyerlerin dağıtılacağı takım projesi sayısı")
+    arg_parser.add_argument("--description-chars", type=int, default=2000)
+    arg_parser.add_argument("--attachments", type=int, default=0, help="Issue başına ek sayısı")
+    arg_parser.add_argument("--attachment-kb", type=int, default=64, help="Ek boyutu (KB)")
+    arg_parser.add_argument("--attachment-rate-kb", type=int, default=0,
+                            help="Ek transferleri için bant genişliği sınırı (KB/sn, 0: sınırsız)")
+    arg_parser.add_argument("--latency-ms", type=float, default=20.0)
+    arg_parser.add_argument("--jitter-ms", type=float, default=5.0)
+    arg_parser.add_argument("--page-size", type=int, default=100, help="Sunucunun kabul ettiği en büyük sayfa")
+    arg_parser.add_argument("--throttle-every", type=int, default=0, help="Her N. istekte 429 dön (0: kapalı)")
+    arg_parser.add_argument("--rate-limit", type=float,
+                            help="İstemci hız sınırı (istek/sn; varsayılan: sunucu başlıklarına göre)")
+    arg_parser.add_argument("--server-rate-limit", type=int, default=60000,
+                            help="Taklit sunucunun RateLimit-Limit başlığıyla bildirdiği dakikalık kota (0: başlık yok)")
+    arg_parser.add_argument("--concurrency", type=int, default=4)
+    arg_parser.add_argument("--backend", choices=["rest", "graphql"], default="rest")
+    arg_parser.add_argument("--skip-delete", action="store_true")
+    arg_parser.add_argument("--skip-import", action="store_true", help="Import süresini ölçme")
+    arg_parser.add_argument("--label", help="Sonuç dosyasının adı (varsayılan: git kısa hash'i)")
+    arg_parser.add_argument("--compare", help="Karşılaştırılacak önceki sonuç dosyası")
+    arg_parser.add_argument("--verbose", action="store_true", help="Aktarım çıktılarını da göster")
+    args = arg_parser.parse_args()
+
+    revision = git_revision()
+    label = args.label or revision or datetime.now().strftime("%Y%m%d-%H%M%S")
+    results = run(args)
+    record = {
+        "label": label,
+        "revision": revision,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "params": {k: v for k, v in vars(args).items() if k not in ("label", "compare", "verbose")},
+        "import_ms": results.pop("import_ms", None),
+        "results": results,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"{label}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False, indent=2)
+    if record["import_ms"] is not None:
+        print(f"  import   {record['import_ms']:8.1f} ms")
+    print(f"💾 Sonuçlar: {out_path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(record, json.load(f))
@@ -1,40 +1,164 @@
 import os
-import pandas as pd
+import csv
+from collections.abc import Mapping
+from itertools import islice
+from sync_ledger import get_ledger, content_hash
+from jira_auto_export import row_updated
+from sync_metrics import log
 
 # Dosya isimleri
-CSV_FOLDER = "csv_folder"
+CSV_FOLDER = os.getenv("CSV_FOLDER", "csv_folder")
 LATEST_FILE = os.path.join(CSV_FOLDER, "jira_latest.csv")   
-UPLOADED_FILE = os.path.join(CSV_FOLDER, "jira_uploaded.csv")  
 TO_ADD_FILE = os.path.join(CSV_FOLDER, "jira_to_add.csv")    
+TO_UPDATE_FILE = os.path.join(CSV_FOLDER, "jira_to_update.csv")
+COMPARE_CHUNK_SIZE = int(os.getenv("COMPARE_CHUNK_SIZE", "500"))  # Deftere tek sorguda sorulan key sayısı
 
-def compare_issues():
-    # UPLOADED_FILE yoksa oluştur
-    if not os.path.exists(UPLOADED_FILE):
-        pd.DataFrame(columns=["Issue key"]).to_csv(UPLOADED_FILE, index=False)
-        print(f"'{UPLOADED_FILE}' oluşturuldu (boş).")
+# ------------------- KOMPAKT SATIR KAYDI -------------------
+# CSV kolonu -> JiraRow slot adı
+_ROW_SLOTS = {
+    "Summary": "summary",
+    "Issue key": "issue_key",
+    "Issue id": "issue_id",
+    "Issue Type": "issue_type",
+    "Status": "status",
+    "Project key": "project_key",
+    "Project name": "project_name",
+    "Priority": "priority",
+    "Assignee": "assignee",
+    "Reporter": "reporter",
+    "Description": "description",
+    "Due Date": "due_date",
+    "Original Estimate": "original_estimate",
+    "Time Spent": "time_spent",
+    "Labels": "labels",
+    "İlgili Stajyerler": "stajyerler",
+    "Updated": "updated",
+    "Attachments": "attachments",
+}
+
+class JiraRow(Mapping):
+    """Bir Jira CSV satırı; satır başına dict yerine __slots__ ile tutulur.
+
+    Mapping arayüzü sayesinde row.get("Summary"), row["Issue key"] ve dict(row)
+    mevcut kodda olduğu gibi çalışır. Bilinmeyen kolonlar `extra`'da durur.
+    """
+    __slots__ = tuple(_ROW_SLOTS.values()) + ("extra",)
+
+    def __init__(self, header, values):
+        self.extra = None
+        for name in self.__slots__:
+            object.__setattr__(self, name, None)
+        for column, value in zip(header, values):
+            slot = _ROW_SLOTS.get(column)
+            if slot:
+                setattr(self, slot, value.strip())
+            else:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[column] = value.strip()
+
+    def __getitem__(self, column):
+        slot = _ROW_SLOTS.get(column)
+        if slot:
+            value = getattr(self, slot)
+            if value is not None:
+                return value
+        elif self.extra and column in self.extra:
+            return self.extra[column]
+        raise KeyError(column)
+
+    def __iter__(self):
+        for column, slot in _ROW_SLOTS.items():
+            if getattr(self, slot) is not None:
+                yield column
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+def iter_csv_rows(path):
+    """CSV'yi satır satır JiraRow olarak oku (dosyanın tamamı belleğe alınmaz)."""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader, [])]
+        for values in reader:
+            yield JiraRow(header, values)
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
 
-    # TO_ADD_FILE yoksa oluştur
-    if not os.path.exists(TO_ADD_FILE):
-        pd.DataFrame(columns=["Issue key"]).to_csv(TO_ADD_FILE, index=False)
-        print(f"'{TO_ADD_FILE}' oluşturuldu (boş).")
+def _stajyer_set(value):
+    return {s.strip() for s in (value or "").split(",") if s.strip()}
 
-    # CSV dosyalarını oku
+def classify_row(row, ledger, stored_hash=False):
+    """Satırı deftere göre sınıflandır: new / unchanged / stale / changed / removed-stakeholder.
+
+    stale: satırın Updated'ı defterdekinden eski (örn. pipeline ya da daemon
+    daha yeni halini zaten aktarmış); eski içerik GitLab'e geri yazılmaz.
+    stored_hash verilmezse defterden tek tek sorulur.
+    """
+    if stored_hash is False:
+        stored_hash = ledger.get_hash(row["Issue key"])
+    if stored_hash is None:
+        return "new"
+    if stored_hash == content_hash(row):
+        return "unchanged"
+    # Yalnızca değişmiş satırlar için eski satır okunur
+    old_row = ledger.get(row["Issue key"])["row"]
+    updated, recorded = row_updated(row), row_updated(old_row)
+    if updated and recorded and updated < recorded:
+        return "stale"
+    if _stajyer_set(old_row.get("İlgili Stajyerler")) - _stajyer_set(row.get("İlgili Stajyerler")):
+        return "removed-stakeholder"
+    return "changed"
+
+def classify_rows(rows, chunk_size=COMPARE_CHUNK_SIZE):
+    """Akıştaki her satır için (sınıf, satır) üret; CSV'ye uğramadan karşılaştırma.
+
+    Satırlar chunk_size'lık parçalar halinde işlenir ve her parçanın key'leri
+    deftere tek sorguda sorulur; bellekte en fazla bir parça tutulur.
+    """
+    ledger = get_ledger()
+    for chunk in _chunks(rows, chunk_size):
+        hashes = ledger.get_hashes([row["Issue key"] for row in chunk])
+        for row in chunk:
+            yield classify_row(row, ledger, hashes.get(row["Issue key"])), row
+
+def compare_issues():
+    # Yeni ve değişen satırlar üretildikçe dosyalara yazılır; hiçbir taraf tamamen belleğe alınmaz
+    fieldnames = ["Issue key"]
+    rows = iter(())
     if os.path.exists(LATEST_FILE) and os.path.getsize(LATEST_FILE) > 0:
-        latest_df = pd.read_csv(LATEST_FILE, encoding="utf-8-sig")
-    else:
-        latest_df = pd.DataFrame(columns=["Issue key"])
-
-    if os.path.exists(UPLOADED_FILE) and os.path.getsize(UPLOADED_FILE) > 0:
-        uploaded_df = pd.read_csv(UPLOADED_FILE, encoding="utf-8-sig")
-    else:
-        uploaded_df = pd.DataFrame(columns=["Issue key"])
-
-    # Karşılaştırma
-    if not uploaded_df.empty:
-        to_add_df = latest_df[~latest_df['Issue key'].isin(uploaded_df['Issue key'])]
-    else:
-        to_add_df = latest_df.copy()
-
-    # TO_ADD_FILE olarak kaydet
-    to_add_df.to_csv(TO_ADD_FILE, index=False, encoding="utf-8-sig")
-    print(f"{len(to_add_df)} yeni issue '{TO_ADD_FILE}' dosyasına eklendi.")
+        with open(LATEST_FILE, encoding="utf-8-sig", newline="") as f:
+            fieldnames = [h.strip() for h in next(csv.reader(f), [])] or fieldnames
+        rows = (r for r in iter_csv_rows(LATEST_FILE) if r.get("Issue key"))
+
+    counts = {}
+    with open(TO_ADD_FILE, "w", encoding="utf-8-sig", newline="") as add_f, \
+         open(TO_UPDATE_FILE, "w", encoding="utf-8-sig", newline="") as update_f:
+        add_writer = csv.DictWriter(add_f, fieldnames=fieldnames, restval="", extrasaction="ignore")
+        update_writer = csv.DictWriter(update_f, fieldnames=fieldnames, restval="", extrasaction="ignore")
+        add_writer.writeheader()
+        update_writer.writeheader()
+
+        # Karşılaştırma: defterdeki (Issue key index'li) içerik özetiyle
+        for status, row in classify_rows(rows):
+            counts[status] = counts.get(status, 0) + 1
+            if status == "new":
+                add_writer.writerow(row)
+            elif status in ("changed", "removed-stakeholder"):
+                update_writer.writerow(row)
+
+    to_add = counts.get("new", 0)
+    to_update = counts.get("changed", 0) + counts.get("removed-stakeholder", 0)
+    log(f"{to_add} yeni issue '{TO_ADD_FILE}' dosyasına eklendi.")
+    log(f"{to_update} değişen issue '{TO_UPDATE_FILE}' dosyasına eklendi "
+          f"(değişen: {counts.get('changed', 0)}, stajyer çıkarılan: {counts.get('removed-stakeholder', 0)}, "
+          f"değişmeyen: {counts.get('unchanged', 0)}, defterden eski: {counts.get('stale', 0)}).")
+    return counts
@@ -1,97 +1,184 @@
 import os
-import requests
+import time
+import argparse
+import threading
+import http_client
+from sync_metrics import log, LOG_FORMAT
 import json
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from gitlab_cache import invalidate_milestone_cache
+from gitlab_api import GITLAB_API_URL, HEADERS, iter_issues, iter_group_milestones, is_synced_issue, GitLabAPIError
+from gitlab_index import invalidate_issue_index
 
 # .env dosyasını yükle
 load_dotenv()
 
-GITLAB_TOKEN = os.getenv("GITLAB_TOKEN")
 MASTER_PROJECT_ID = os.getenv("MASTER_PROJECT_ID")
 TEAM_PROJECT_MAP = json.loads(os.getenv("TEAM_PROJECT_MAP", "{}"))
 GROUP_ID = os.getenv("GROUP_ID")  # Grup milestone'ları için
-
-HEADERS = {
-    "PRIVATE-TOKEN": GITLAB_TOKEN,
-    "Content-Type": "application/json"
-}
+PURGE_CONCURRENCY = int(os.getenv("PURGE_CONCURRENCY", "8"))  # Aynı anda yapılacak silme sayısı
 
 def get_all_issues(project_id):
     """Belirli proje altındaki tüm issue'ları getir."""
-    issues = []
-    page = 1
-    while True:
-        url = f"https://gitlab.com/api/v4/projects/{project_id}/issues?per_page=100&page={page}"
-        r = requests.get(url, headers=HEADERS)
-        if r.status_code != 200:
-            print(f"⚠️ Hata: project {project_id} issue alınamadı ({r.status_code})")
-            break
-        data = r.json()
-        if not data:
-            break
-        issues.extend(data)
-        page += 1
-    return issues
+    return list(iter_issues(project_id))
 
 def delete_issue(project_id, iid):
     """Tek bir issue'yu sil."""
-    url = f"https://gitlab.com/api/v4/projects/{project_id}/issues/{iid}"
-    r = requests.delete(url, headers=HEADERS)
+    url = f"{GITLAB_API_URL}/projects/{project_id}/issues/{iid}"
+    r = http_client.delete(url, headers=HEADERS)
     if r.status_code == 204:
-        print(f"🗑️ Silindi: project={project_id} IID={iid}")
+        log(f"🗑️ Silindi: project={project_id} IID={iid}", project_id=project_id, iid=iid)
+        return True
+    else:
+        log(f"⚠️ Silinemedi: project={project_id} IID={iid} ({r.status_code}) {r.text}",
+            project_id=project_id, iid=iid)
+        return False
+
+def get_current_user_id():
+    r = http_client.get(f"{GITLAB_API_URL}/user", headers=HEADERS)
+    if r.status_code != 200:
+        raise RuntimeError(f"Token sahibi kullanıcı alınamadı ({r.status_code})")
+    return r.json()["id"]
+
+def purge_issues(project_ids=None, only_synced=False, author_id=None, dry_run=False,
+                 concurrency=PURGE_CONCURRENCY):
+    """Projelerdeki issue'ları akış halinde dolaşıp sınırlı havuzla paralel sil.
+
+    only_synced: yalnızca Jira key label'ı olan issue'lar
+    author_id: yalnızca bu kullanıcının (örn. senkronizasyon token'ı) açtıkları
+    dry_run: silmeden eşleşen issue sayısını ve tahmini süreyi raporla
+    """
+    if project_ids is None:
+        project_ids = set([int(MASTER_PROJECT_ID)] + [pid for pid in TEAM_PROJECT_MAP.values() if pid])
+    log(f"Temizlenecek projeler: {project_ids}")
+
+    filters = {"author_id": author_id} if author_id else {}
+    counts = {pid: 0 for pid in project_ids}
+    deleted = []
+    failed = []
+    unlisted = []
+    counts_lock = threading.Lock()
+    # Listeleme silmelerden çok öndeyken bellekte sınırsız iş birikmesin
+    backlog = threading.BoundedSemaphore(concurrency * 4)
+    started = time.monotonic()
+
+    def _delete(pid, iid):
+        # Future'lar beklenmediği için hata burada yakalanır; aksi halde sessizce kaybolur
+        try:
+            ok = delete_issue(pid, iid)
+        except Exception as e:
+            ok = False
+            log(f"❌ Silme hatası: project={pid} IID={iid}: {e}", project_id=pid, iid=iid)
+        finally:
+            backlog.release()
+        with counts_lock:
+            (deleted if ok else failed).append((pid, iid))
+
+    def _purge_project(pid, delete_pool):
+        for issue in iter_issues(pid, **filters):
+            if only_synced and not is_synced_issue(issue):
+                continue
+            with counts_lock:
+                counts[pid] += 1
+            if dry_run:
+                continue
+            backlog.acquire()
+            delete_pool.submit(_delete, pid, issue["iid"])
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="delete") as delete_pool, \
+         ThreadPoolExecutor(max_workers=max(len(project_ids), 1), thread_name_prefix="list") as list_pool:
+        for future in [list_pool.submit(_purge_project, pid, delete_pool) for pid in project_ids]:
+            try:
+                future.result()
+            except GitLabAPIError as e:
+                # Listelenebilen issue'lar silinir; kalanlar için tekrar çalıştırmak gerekir
+                unlisted.append(str(e))
+                log(f"❌ {e}")
+
+    elapsed = time.monotonic() - started
+    total = sum(counts.values())
+    for pid, n in sorted(counts.items()):
+        log(f"Project {pid}: {n} issue {'eşleşti' if dry_run else 'bulundu'}.")
+    if unlisted:
+        log(f"⚠️ {len(unlisted)} projenin listesi yarım kaldı; sayılar eksik, tekrar çalıştırın.")
+    if dry_run:
+        # Tahmin: ortalama istek süresi x istek sayısı / paralellik, hız sınırından hızlı olamaz
+        list_calls = max(sum(s["requests"] for e, s in http_client.get_stats().items() if e.startswith("GET")), 1)
+        per_request = elapsed / list_calls
+        estimate = max(total * per_request / concurrency, total / http_client.HTTP_RATE_LIMIT)
+        log(f"🔎 Dry-run: {total} issue silinecekti. Tahmini süre: ~{estimate:.1f} sn "
+            f"({concurrency} paralel silme).")
     else:
-        print(f"⚠️ Silinemedi: project={project_id} IID={iid} ({r.status_code}) {r.text}")
+        log(f"✅ {len(deleted)}/{total} issue {elapsed:.1f} sn'de silindi.")
+        if failed:
+            log(f"⚠️ {len(failed)} issue silinemedi: "
+                f"{', '.join(f'{pid}#{iid}' for pid, iid in sorted(failed))}")
+        if deleted:
+            # Silinen IID'ler sync'in arama kaynağı olarak kullandığı index'te kalmasın
+            invalidate_issue_index()
+    return counts
 
 def delete_all_issues():
     """Master ve tüm stajyer projelerindeki tüm issue'ları sil."""
-    project_ids = set([int(MASTER_PROJECT_ID)] + [pid for pid in TEAM_PROJECT_MAP.values() if pid])
-    print(f"Temizlenecek projeler: {project_ids}")
-
-    for pid in project_ids:
-        issues = get_all_issues(pid)
-        print(f"Project {pid}: {len(issues)} issue bulundu. Siliniyor...")
-        for issue in issues:
-            delete_issue(pid, issue["iid"])
-
-    print("✅ Tüm issue'lar silindi.")
-
-def get_all_group_milestones(group_id):
-    """Belirli grup altındaki tüm milestone'ları getir."""
-    milestones = []
-    page = 1
-    while True:
-        url = f"https://gitlab.com/api/v4/groups/{group_id}/milestones?per_page=100&page={page}"
-        r = requests.get(url, headers=HEADERS)
-        if r.status_code != 200:
-            print(f"⚠️ Hata: Group {group_id} milestone alınamadı ({r.status_code})")
-            break
-        data = r.json()
-        if not data:
-            break
-        milestones.extend(data)
-        page += 1
-    return milestones
-
-def delete_group_milestones():
+    purge_issues()
+
+def delete_group_milestone(m):
+    url = f"{GITLAB_API_URL}/groups/{GROUP_ID}/milestones/{m['id']}"
+    r = http_client.delete(url, headers=HEADERS)
+    if r.status_code == 204:
+        log(f"🗑️ Silindi: Milestone '{m['title']}' ({m['id']})")
+    else:
+        log(f"⚠️ Silinemedi: Milestone '{m['title']}' ({m['id']}) ({r.status_code}) {r.text}")
+
+def delete_group_milestones(dry_run=False, concurrency=PURGE_CONCURRENCY):
     """Tüm grup milestone'larını sil."""
     if not GROUP_ID:
-        print("⚠️ GROUP_ID .env dosyasında bulunamadı. Milestone silme atlandı.")
+        log("⚠️ GROUP_ID .env dosyasında bulunamadı. Milestone silme atlandı.")
+        return
+    # Milestone listesi silmeden önce tamamen alınır; silerken sayfalar kaymasın
+    try:
+        milestones = list(iter_group_milestones(GROUP_ID))
+    except GitLabAPIError as e:
+        log(f"⚠️ Hata: {e}. Milestone silme atlandı.")
         return
-    milestones = get_all_group_milestones(GROUP_ID)
-    print(f"Group {GROUP_ID}: {len(milestones)} milestone bulundu. Siliniyor...")
-    for m in milestones:
-        url = f"https://gitlab.com/api/v4/groups/{GROUP_ID}/milestones/{m['id']}"
-        r = requests.delete(url, headers=HEADERS)
-        if r.status_code == 204:
-            print(f"🗑️ Silindi: Milestone '{m['title']}' ({m['id']})")
-        else:
-            print(f"⚠️ Silinemedi: Milestone '{m['title']}' ({m['id']}) ({r.status_code}) {r.text}")
-    print("✅ Tüm grup milestone'ları silindi.")
+    log(f"Group {GROUP_ID}: {len(milestones)} milestone bulundu. {'(dry-run)' if dry_run else 'Siliniyor...'}")
+    if dry_run:
+        return
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="milestone") as pool:
+        list(pool.map(delete_group_milestone, milestones))
+    invalidate_milestone_cache()
+    log("✅ Tüm grup milestone'ları silindi.")
 
 if __name__ == "__main__":
-    confirm = input("⚠️ DİKKAT: Tüm projelerdeki issue'lar ve grup milestone'ları silinsin mi? (y/n): ")
-    if confirm.lower() == "y":
-        delete_all_issues()
-        delete_group_milestones()
-    else:
-        print("🚫 İşlem iptal edildi.")
+    arg_parser = argparse.ArgumentParser(description="GitLab projelerindeki issue'ları ve grup milestone'larını sil.")
+    arg_parser.add_argument("--dry-run", action="store_true", help="Silmeden sayıları ve tahmini süreyi raporla")
+    arg_parser.add_argument("--only-synced", action="store_true",
+                            help="Yalnızca Jira key label'ı taşıyan issue'ları sil")
+    arg_parser.add_argument("--mine", action="store_true",
+                            help="Yalnızca bu token'ın kullanıcısının açtığı issue'ları sil")
+    arg_parser.add_argument("--skip-milestones", action="store_true", help="Grup milestone'larına dokunma (--only-synced/--mine ile zaten dokunulmaz)")
+    arg_parser.add_argument("--concurrency", type=int, default=PURGE_CONCURRENCY,
+                            help="Aynı anda yapılacak silme sayısı (varsayılan: PURGE_CONCURRENCY)")
+    arg_parser.add_argument("-y", "--yes", action="store_true", help="Onay sormadan çalıştır")
+    args = arg_parser.parse_args()
+
+    if not args.dry_run and not args.yes:
+        target = ("filtreye uyan issue'lar" if args.only_synced or args.mine
+                  else "tüm projelerdeki issue'lar ve grup milestone'ları")
+        confirm = input(f"⚠️ DİKKAT: {target} silinsin mi? (y/n): ")
+        if confirm.lower() != "y":
+            log("🚫 İşlem iptal edildi.")
+            raise SystemExit(0)
+
+    author_id = get_current_user_id() if args.mine else None
+    purge_issues(only_synced=args.only_synced, author_id=author_id, dry_run=args.dry_run,
+                 concurrency=args.concurrency)
+    if args.only_synced or args.mine:
+        # Filtreli temizlik yalnızca issue'ları kapsar; milestone'ları başka issue'lar da kullanıyor olabilir
+        if not args.skip_milestones:
+            log("ℹ️ --only-synced/--mine verildiği için grup milestone'larına dokunulmadı.")
+    elif not args.skip_milestones:
+        delete_group_milestones(dry_run=args.dry_run, concurrency=args.concurrency)
+    if LOG_FORMAT != "json":
+        http_client.print_stats()
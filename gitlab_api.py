@@ -0,0 +1,84 @@
+import os
+import re
+import http_client
+from dotenv import load_dotenv
+
+# .env dosyasını yükle
+load_dotenv()
+
+GITLAB_TOKEN = os.getenv("GITLAB_TOKEN")
+GITLAB_API_URL = os.getenv("GITLAB_API_URL", "https://gitlab.com/api/v4").rstrip("/")
+
+HEADERS = {
+    "PRIVATE-TOKEN": GITLAB_TOKEN,
+    "Content-Type": "application/json"
+}
+
+# Senkronizasyonun eklediği Jira key label'ı (örn. GYT-134)
+JIRA_KEY_LABEL = re.compile(r"^[A-Z][A-Z0-9]+-\d+$")
+
+
+def jira_key_labels(issue):
+    """Issue'nun Jira key biçimindeki label'ları."""
+    return [label for label in issue.get("labels", []) if JIRA_KEY_LABEL.match(label)]
+
+def is_synced_issue(issue):
+    """Issue senkronizasyonun eklediği Jira key label'ını taşıyor mu?"""
+    return bool(jira_key_labels(issue))
+
+class GitLabAPIError(Exception):
+    """GitLab listesi eksiksiz alınamadı; yarım liste tam kabul edilmemeli."""
+
+def iter_issues(project_id, per_page=100, order_by="created_at", since=None, **filters):
+    """Proje issue'larını created_at (ya da updated_at) üzerinden cursor (keyset) ile sayfa sayfa üret.
+
+    Offset yerine son görülen zamandan devam edildiği için, dolaşırken
+    issue silinse bile sayfalar kaymaz ve kayıt atlanmaz. since verilirse
+    o zamandan (dahil) sonrası listelenir. Sayfanın tamamı aynı zamanı
+    taşıyorsa cursor ilerleyemez; o zaman için sonraki sayfalar istenir ve
+    görülen id'ler atlanır. 2xx olmayan cevapta GitLabAPIError fırlar.
+    """
+    url = f"{GITLAB_API_URL}/projects/{project_id}/issues"
+    after_param = "updated_after" if order_by == "updated_at" else "created_after"
+    cursor = since
+    page = 1
+    seen_at_cursor = set()
+    while True:
+        params = {"per_page": per_page, "order_by": order_by, "sort": "asc", **filters}
+        if cursor:
+            params[after_param] = cursor  # GitLab'de "bu zamanda ya da sonra"
+        if page > 1:
+            params["page"] = page
+        r = http_client.get(url, headers=HEADERS, params=params)
+        if not 200 <= r.status_code < 300:
+            raise GitLabAPIError(f"project {project_id} issue listesi alınamadı ({r.status_code})")
+        data = r.json()
+        yield from (issue for issue in data if issue["id"] not in seen_at_cursor)
+        if len(data) < per_page:
+            return
+        last = data[-1][order_by]
+        if last == cursor:
+            # Sayfanın tamamı cursor zamanında: aynı zamandan sonraki sayfa
+            page += 1
+            seen_at_cursor.update(issue["id"] for issue in data)
+        else:
+            cursor = last
+            page = 1
+            seen_at_cursor = {issue["id"] for issue in data if issue[order_by] == cursor}
+
+def iter_group_milestones(group_id, per_page=100):
+    """Grup milestone'larını tüm sayfalarıyla üret; bir sayfa alınamazsa GitLabAPIError."""
+    url = f"{GITLAB_API_URL}/groups/{group_id}/milestones"
+    page = 1
+    while True:
+        r = http_client.get(url, headers=HEADERS, params={"per_page": per_page, "page": page})
+        if r.status_code != 200:
+            raise GitLabAPIError(f"group {group_id} milestone listesi alınamadı ({r.status_code})")
+        data = r.json()
+        if not data:
+            return
+        yield from data
+        next_page = r.headers.get("X-Next-Page")
+        if next_page == "":
+            return
+        page = int(next_page) if next_page else page + 1
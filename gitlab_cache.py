@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import threading
+import http_client
+from gitlab_api import GITLAB_API_URL, HEADERS, iter_group_milestones
+from sync_metrics import log
+from dotenv import load_dotenv
+
+# .env dosyasını yükle
+load_dotenv()
+
+CSV_FOLDER = os.getenv("CSV_FOLDER", "csv_folder")
+
+# Milestone index'inin diske yazılacağı dosya (boş bırakılırsa sadece bellekte tutulur)
+MILESTONE_CACHE_FILE = os.getenv("MILESTONE_CACHE_FILE", os.path.join(CSV_FOLDER, "milestone_cache.json"))
+MILESTONE_CACHE_TTL = int(os.getenv("MILESTONE_CACHE_TTL", "3600"))  # saniye
+
+
+# ------------------- DİSK YARDIMCILARI -------------------
+def _load_json_cache(path):
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        log(f"⚠️ Cache dosyası okunamadı ({path}): {e}")
+        return None
+
+def _save_json_cache(path, data):
+    if not path:
+        return
+    folder = os.path.dirname(path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    # Yarım yazılmış dosya kalmasın diye önce geçici dosyaya yaz, sonra taşı
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+# ------------------- GRUP MILESTONE INDEX -------------------
+def normalize_title(title):
+    return (title or "").strip().lower()
+
+class MilestoneIndex:
+    """Grup milestone'larını normalize başlık -> milestone olarak tutan index.
+
+    Çalışma başına bir kez tüm sayfalar okunur; yeni açılan milestone'lar
+    index'e eklenir. cache_file verilirse index TTL süresince diskten okunur.
+    Liste eksiksiz alınamazsa GitLabAPIError fırlar; yarım index ne kullanılır
+    ne de diske yazılır (var olan başlıklar yeniden açılmaya çalışılırdı).
+    """
+
+    def __init__(self, group_id, cache_file=MILESTONE_CACHE_FILE, ttl=MILESTONE_CACHE_TTL):
+        self.group_id = str(group_id)
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.milestones = None
+        self._lock = threading.Lock()
+
+    def _url(self):
+        return f"{GITLAB_API_URL}/groups/{self.group_id}/milestones"
+
+    def _fetch_all(self):
+        """Tüm milestone sayfalarını getir; bir sayfa alınamazsa GitLabAPIError."""
+        milestones = {}
+        for m in iter_group_milestones(self.group_id):
+            milestones.setdefault(normalize_title(m["title"]), {"id": m["id"], "title": m["title"]})
+        return milestones
+
+    def _load_from_disk(self):
+        data = _load_json_cache(self.cache_file)
+        if not data or data.get("group_id") != self.group_id:
+            return None
+        if time.time() - data.get("fetched_at", 0) > self.ttl:
+            return None
+        return data
+
+    def _persist(self):
+        if not self.cache_file or self.ttl <= 0:
+            return
+        _save_json_cache(self.cache_file, {
+            "group_id": self.group_id,
+            "fetched_at": self._fetched_at,
+            "milestones": self.milestones,
+        })
+
+    def load(self):
+        """Index'i diskten (taze ise) ya da API'den doldur."""
+        with self._lock:
+            if self.milestones is not None:
+                return
+            cached = self._load_from_disk() if self.ttl > 0 else None
+            if cached is not None:
+                self.milestones = cached.get("milestones", {})
+                self._fetched_at = cached["fetched_at"]
+                return
+            self._refresh()
+            log(f"📚 Group {self.group_id}: {len(self.milestones)} milestone index'e alındı.")
+
+    def _refresh(self):
+        # Kilit altında çağrılır; liste alınamazsa (GitLabAPIError) index değişmez
+        self.milestones = self._fetch_all()
+        self._fetched_at = time.time()
+        self._persist()
+
+    def find_or_create(self, title):
+        """Başlığa göre milestone'u döndür, yoksa grupta oluştur ve index'e ekle."""
+        self.load()
+        key = normalize_title(title)
+        with self._lock:
+            if key in self.milestones:
+                return self.milestones[key]
+
+            r = http_client.post(self._url(), headers=HEADERS, json={"title": title})
+            if r.status_code == 400 and "already been taken" in r.text:
+                # Başka bir süreç açmış (ya da cache eski): listeyi yenile, var olanı kullan
+                self._refresh()
+                if key in self.milestones:
+                    log(f"↩️ Milestone zaten var, index yenilendi: {title}")
+                    return self.milestones[key]
+            if r.status_code != 201:
+                log(f"⚠️ Group Milestone oluşturulamadı: {r.status_code} {r.text}")
+                return None
+            m = r.json()
+            self.milestones[key] = {"id": m["id"], "title": m["title"]}
+            self._persist()
+            log(f"✨ Issue Milestone'u oluşturuldu: {title}")
+            return self.milestones[key]
+
+def invalidate_milestone_cache(cache_file=MILESTONE_CACHE_FILE):
+    """Milestone'lar silindiğinde disk cache'ini geçersiz kıl."""
+    if cache_file and os.path.exists(cache_file):
+        os.remove(cache_file)
+
+
+# ------------------- PROJE / KULLANICI METADATA CACHE -------------------
+METADATA_CACHE_FILE = os.getenv("METADATA_CACHE_FILE", os.path.join(CSV_FOLDER, "gitlab_metadata.json"))
+METADATA_CACHE_TTL = int(os.getenv("METADATA_CACHE_TTL", str(7 * 24 * 3600)))  # saniye
+METADATA_CACHE_MAX = int(os.getenv("METADATA_CACHE_MAX", "5000"))  # namespace başına kayıt
+
+_MISSING = object()
+
+class MetadataCache:
+    """Namespace'lere ayrılmış, TTL'li ve boyut sınırlı basit anahtar-değer cache'i.
+
+    Kayıtlar (değer, zaman) olarak tutulur; süresi dolanlar okunmaz, sınır
+    aşılınca en eski kayıtlar atılır. save() ile diske yazılır. Dosya ilk
+    erişimde okunur; modül import'u disk okumasına yol açmaz.
+    """
+
+    def __init__(self, cache_file=METADATA_CACHE_FILE, ttl=METADATA_CACHE_TTL, max_entries=METADATA_CACHE_MAX):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._data = None
+
+    def _entries(self):
+        # Kilit altında çağrılır
+        if self._data is None:
+            self._data = _load_json_cache(self.cache_file) or {}
+        return self._data
+
+    def get(self, namespace, key, default=_MISSING):
+        with self._lock:
+            entry = self._entries().get(namespace, {}).get(str(key))
+        if entry is None or time.time() - entry[1] > self.ttl:
+            return default
+        return entry[0]
+
+    def set(self, namespace, key, value):
+        with self._lock:
+            bucket = self._entries().setdefault(namespace, {})
+            bucket[str(key)] = [value, time.time()]
+            if len(bucket) > self.max_entries:
+                # En eski kayıtları at
+                oldest = sorted(bucket, key=lambda k: bucket[k][1])[:len(bucket) - self.max_entries]
+                for k in oldest:
+                    del bucket[k]
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty or self._data is None:
+                return
+            now = time.time()
+            for bucket in self._data.values():
+                for k in [k for k, (_, ts) in bucket.items() if now - ts > self.ttl]:
+                    del bucket[k]
+            _save_json_cache(self.cache_file, self._data)
+            self._dirty = False
+
+metadata_cache = MetadataCache()
+
+def _fetch_project(proj_id):
+    """Proje bilgisini tek istekle al; adı ve tam yolu birlikte cache'le."""
+    r = http_client.get(f"{GITLAB_API_URL}/projects/{proj_id}", headers=HEADERS)
+    if r.status_code != 200:
+        return None
+    info = r.json()
+    metadata_cache.set("project_name", proj_id, info.get("name", "Unknown Project"))
+    metadata_cache.set("project_path", proj_id, info.get("path_with_namespace"))
+    return info
+
+def get_project_name(proj_id):
+    """Projenin adını cache'ten, yoksa API'den getir."""
+    name = metadata_cache.get("project_name", proj_id)
+    if name is not _MISSING:
+        return name
+    info = _fetch_project(proj_id)
+    return info.get("name", "Unknown Project") if info else "Unknown Project"
+
+def get_project_path(proj_id):
+    """Projenin tam yolunu (group/proje) getir; GraphQL projectPath için gerekli."""
+    path = metadata_cache.get("project_path", proj_id)
+    if path is not _MISSING and path:
+        return path
+    info = _fetch_project(proj_id)
+    return info.get("path_with_namespace") if info else None
+
+def get_gitlab_user_id(username):
+    """Jira kullanıcı adına karşılık gelen GitLab kullanıcı ID'sini bul (bulunamazsa None)."""
+    if not username:
+        return None
+    user_id = metadata_cache.get("user_id", username)
+    if user_id is not _MISSING:
+        return user_id
+    r = http_client.get(f"{GITLAB_API_URL}/users", headers=HEADERS, params={"username": username})
+    if r.status_code != 200:
+        log(f"⚠️ GitLab kullanıcısı sorgulanamadı ({username}): {r.status_code}")
+        return None
+    users = r.json()
+    user_id = users[0]["id"] if users else None
+    if user_id is None:
+        log(f"⚠️ GitLab'de '{username}' kullanıcısı bulunamadı.")
+    # Bulunamayan kullanıcılar da cache'lenir, her çalışmada tekrar sorulmasın
+    metadata_cache.set("user_id", username, user_id)
+    return user_id
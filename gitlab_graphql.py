@@ -0,0 +1,113 @@
+import os
+import http_client
+from dotenv import load_dotenv
+from gitlab_api import GITLAB_TOKEN, GITLAB_API_URL
+
+# .env dosyasını yükle
+load_dotenv()
+
+# Varsayılan: REST adresinin yanındaki /api/graphql
+GRAPHQL_URL = os.getenv("GITLAB_GRAPHQL_URL", GITLAB_API_URL.rsplit("/v4", 1)[0] + "/graphql")
+
+HEADERS = {
+    "Authorization": f"Bearer {GITLAB_TOKEN}",
+    "Content-Type": "application/json"
+}
+
+class GraphQLError(Exception):
+    pass
+
+def graphql(query, variables=None):
+    """Tek bir GraphQL isteği gönder; HTTP ya da üst seviye GraphQL hatasında GraphQLError fırlat."""
+    r = http_client.post(GRAPHQL_URL, headers=HEADERS, json={"query": query, "variables": variables or {}})
+    if r.status_code != 200:
+        raise GraphQLError(f"{r.status_code} {r.text}")
+    body = r.json()
+    if body.get("errors"):
+        raise GraphQLError("; ".join(e.get("message", str(e)) for e in body["errors"]))
+    return body.get("data") or {}
+
+# ------------------- REST PAYLOAD -> GraphQL INPUT -------------------
+def to_create_input(project_path, payload):
+    """sync_to_gitlab'ın REST payload'unu CreateIssueInput'a çevir."""
+    description = payload.get("description") or ""
+    # createIssue'da süre alanı yok; açıklamadaki quick action'lar issue açılırken uygulanır
+    quick_actions = []
+    if payload.get("time_estimate"):
+        quick_actions.append(f"/estimate {payload['time_estimate']}")
+    if payload.get("spent_time"):
+        quick_actions.append(f"/spend {payload['spent_time']}")
+    if quick_actions:
+        description = description + "\n\n" + "\n".join(quick_actions)
+
+    data = {
+        "projectPath": project_path,
+        "title": payload["title"],
+        "description": description,
+        "labels": [lbl for lbl in (payload.get("labels") or "").split(",") if lbl],
+    }
+    if payload.get("due_date"):
+        data["dueDate"] = payload["due_date"]
+    if payload.get("assignee_ids"):
+        data["assigneeIds"] = [f"gid://gitlab/User/{uid}" for uid in payload["assignee_ids"]]
+    if payload.get("milestone_id"):
+        data["milestoneId"] = f"gid://gitlab/Milestone/{payload['milestone_id']}"
+    return data
+
+# ------------------- TOPLU İŞLEMLER -------------------
+def create_issues(items):
+    """Birden fazla issue'yu alias'lı createIssue mutation'larıyla tek istekte aç.
+
+    items: [(project_path, rest_payload), ...]
+    Dönüş: her item için {"id", "iid", "web_url", "time_spent"} ya da (o issue açılamadıysa) hata metni.
+    """
+    if not items:
+        return []
+    params = ", ".join(f"$in{i}: CreateIssueInput!" for i in range(len(items)))
+    fields = "\n".join(
+        f"  i{i}: createIssue(input: $in{i}) {{ issue {{ id iid webUrl totalTimeSpent }} errors }}" for i in range(len(items))
+    )
+    query = f"mutation({params}) {{\n{fields}\n}}"
+    variables = {f"in{i}": to_create_input(path, payload) for i, (path, payload) in enumerate(items)}
+    data = graphql(query, variables)
+
+    results = []
+    for i in range(len(items)):
+        result = data.get(f"i{i}") or {}
+        issue = result.get("issue")
+        if issue:
+            results.append({"id": issue["id"], "iid": int(issue["iid"]), "web_url": issue["webUrl"],
+                            "time_spent": int(issue.get("totalTimeSpent") or 0)})
+        else:
+            results.append("; ".join(result.get("errors") or ["bilinmeyen hata"]))
+    return results
+
+def relate_issues(links):
+    """Related-issue linklerini alias'lı '/relate' quick action notlarıyla tek istekte kur.
+
+    links: [(master_global_id, child_project_path, child_iid), ...]
+    Her link ayrı not olduğu için GitLab'in reddettiği link diğerlerini etkilemez;
+    not yalnızca komut içerdiği için kalıcı olmaz.
+    Dönüş: her link için True ya da (link kurulamadıysa) hata metni.
+    """
+    if not links:
+        return []
+    params = ", ".join(f"$in{i}: CreateNoteInput!" for i in range(len(links)))
+    fields = "\n".join(f"  n{i}: createNote(input: $in{i}) {{ errors }}" for i in range(len(links)))
+    query = f"mutation({params}) {{\n{fields}\n}}"
+    variables = {
+        f"in{i}": {"noteableId": gid, "body": f"/relate {path}#{iid}"}
+        for i, (gid, path, iid) in enumerate(links)
+    }
+    data = graphql(query, variables)
+
+    results = []
+    for i in range(len(links)):
+        result = data.get(f"n{i}")
+        if result is None:
+            results.append("yanıt yok")
+        elif result.get("errors"):
+            results.append("; ".join(result["errors"]))
+        else:
+            results.append(True)
+    return results
@@ -0,0 +1,178 @@
+import os
+import re
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from gitlab_api import iter_issues, jira_key_labels
+from sync_metrics import log, phase
+
+CSV_FOLDER = os.getenv("CSV_FOLDER", "csv_folder")
+GITLAB_INDEX_FILE = os.getenv("GITLAB_INDEX_FILE", os.path.join(CSV_FOLDER, "gitlab_index.json"))
+# Sync bu süreden eski bir index'i arama kaynağı olarak kullanmaz (saniye, 0: hiç kullanma)
+GITLAB_INDEX_TTL = int(os.getenv("GITLAB_INDEX_TTL", str(24 * 3600)))
+
+# Child açıklamasındaki master referansı (bkz. sync_to_gitlab.build_child_payload)
+_MASTER_REF = re.compile(r"\*\*Ana Issue:\*\* Project (\d+), IID (\d+)")
+
+
+def _compact(issue, master_project_id):
+    """Index'te tutulan alanlar; açıklamanın yalnızca master referansı saklanır."""
+    record = {
+        "project_id": issue["project_id"],
+        "iid": issue["iid"],
+        "id": issue["id"],
+        "state": issue.get("state"),
+        "title": issue.get("title"),
+        "web_url": issue.get("web_url"),
+        "assignee_ids": [a["id"] for a in issue.get("assignees") or []],
+    }
+    if str(issue["project_id"]) != str(master_project_id):
+        ref = _MASTER_REF.search(issue.get("description") or "")
+        record["master_iid"] = int(ref.group(2)) if ref and ref.group(1) == str(master_project_id) else None
+        record["linked"] = None  # Yalnızca linkler kontrol edildiyse True/False
+    return record
+
+
+class GitLabIssueIndex:
+    """Jira key -> GitLab'deki master ve child issue'lar.
+
+    Senkronizasyonun tek bağı issue'lara eklenen Jira key label'ı olduğu için
+    index tüm projelerin issue listesinden tek geçişte kurulur; issue başına
+    arama yapılmaz. Diske yazılır ve sync tarafından (taze ise) arama
+    kaynağı olarak da kullanılır.
+    """
+
+    def __init__(self, master_project_id, entries=None, built_at=None):
+        self.master_project_id = str(master_project_id)
+        self.entries = entries or {}
+        self.built_at = time.time() if built_at is None else built_at
+        self._lock = threading.Lock()
+
+    def add(self, issue):
+        keys = jira_key_labels(issue)
+        if not keys:
+            return
+        record = _compact(issue, self.master_project_id)
+        kind = "masters" if str(record["project_id"]) == self.master_project_id else "children"
+        with self._lock:
+            for key in keys:
+                entry = self.entries.setdefault(key, {"masters": [], "children": []})
+                entry[kind].append(record)
+
+    def masters(self, jira_key):
+        entry = self.entries.get(jira_key)
+        return entry["masters"] if entry else []
+
+    def master(self, jira_key):
+        """Key'in master issue'su (birden fazlaysa önce açık olan)."""
+        masters = sorted(self.masters(jira_key), key=lambda m: (m["state"] != "opened", m["iid"]))
+        return masters[0] if masters else None
+
+    def children(self, jira_key, project_id=None):
+        entry = self.entries.get(jira_key)
+        children = entry["children"] if entry else []
+        if project_id is not None:
+            children = [c for c in children if str(c["project_id"]) == str(project_id)]
+        return children
+
+    def issues(self, jira_key, project_id):
+        """Key'in verilen projedeki issue'ları (master ya da child)."""
+        if str(project_id) == self.master_project_id:
+            return self.masters(jira_key)
+        return self.children(jira_key, project_id)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def is_fresh(self, ttl=GITLAB_INDEX_TTL):
+        """Index arama kaynağı olarak kullanılabilecek kadar yeni mi."""
+        return ttl > 0 and time.time() - self.built_at <= ttl
+
+    def save(self, path=GITLAB_INDEX_FILE):
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"master_project_id": self.master_project_id, "built_at": self.built_at,
+                       "entries": self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, master_project_id, path=GITLAB_INDEX_FILE, ttl=GITLAB_INDEX_TTL):
+        """Diskteki index'i yükle; yoksa, bayatsa ya da başka master projeye aitse None."""
+        if not path or ttl <= 0 or not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            log(f"⚠️ GitLab index'i okunamadı ({path}): {e}")
+            return None
+        if data.get("master_project_id") != str(master_project_id):
+            return None
+        index = cls(master_project_id, data.get("entries"), data.get("built_at", 0))
+        return index if index.is_fresh(ttl) else None
+
+
+def build_index(master_project_id, project_ids, concurrency=8):
+    """Master ve takım projelerini paralel, keyset sayfalamayla listeleyip index'i kur.
+
+    Bir proje eksiksiz listelenemezse GitLabAPIError fırlar; yarım index döndürülmez.
+    """
+    index = GitLabIssueIndex(master_project_id)
+    project_ids = list(dict.fromkeys(str(p) for p in [master_project_id, *project_ids] if p))
+    counts = {}
+
+    def _list(pid):
+        n = 0
+        for issue in iter_issues(pid, state="all"):
+            index.add(issue)
+            n += 1
+        counts[pid] = n
+
+    with phase("index"):
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(project_ids))),
+                                thread_name_prefix="index") as pool:
+            for future in [pool.submit(_list, pid) for pid in project_ids]:
+                future.result()
+    log(f"📇 GitLab index'i: {sum(counts.values())} issue, {len(index)} Jira key "
+        f"({', '.join(f'{pid}={n}' for pid, n in counts.items())})")
+    return index
+
+
+_issue_index = None
+_issue_index_mtime = None
+_issue_index_lock = threading.Lock()
+
+def get_issue_index(master_project_id, path=GITLAB_INDEX_FILE):
+    """Sync için diskteki taze index (yoksa None).
+
+    Daemon gibi uzun süren süreçler için her çağrıda kontrol edilir: dosya
+    yeniden yazıldıysa tekrar okunur, bellekteki kopya TTL'i aştıysa bırakılır.
+    """
+    global _issue_index, _issue_index_mtime
+    try:
+        mtime = os.stat(path).st_mtime_ns if path else None
+    except OSError:
+        mtime = None
+    with _issue_index_lock:
+        if mtime != _issue_index_mtime:
+            _issue_index = GitLabIssueIndex.load(master_project_id, path) if mtime is not None else None
+            _issue_index_mtime = mtime
+            if _issue_index is not None:
+                log(f"📇 GitLab index'i arama kaynağı olarak kullanılıyor ({len(_issue_index)} Jira key).")
+        if _issue_index is not None and not _issue_index.is_fresh():
+            log("⌛ GitLab index'i bayatladı, artık arama kaynağı olarak kullanılmıyor.")
+            _issue_index = None
+        return _issue_index
+
+def invalidate_issue_index(path=GITLAB_INDEX_FILE):
+    """Issue'lar silindiğinde diskteki index'i ve süreçteki kopyasını geçersiz kıl."""
+    global _issue_index, _issue_index_mtime
+    with _issue_index_lock:
+        _issue_index = None
+        _issue_index_mtime = None
+    if path and os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,296 @@
+import os
+import re
+import time
+import random
+import threading
+from collections import defaultdict
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+
+# .env dosyasını yükle
+load_dotenv()
+
+# --- Yeniden deneme ayarları ---
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "5"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))  # saniye
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))  # saniye
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))  # saniye
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))
+
+# --- Hız sınırı (host başına, saniyedeki istek) ---
+# Sunucu RateLimit-* başlıklarıyla kota bildirmediği sürece kullanılan hız
+HTTP_RATE_LIMIT = float(os.getenv("HTTP_RATE_LIMIT", "10"))
+HTTP_RATE_BURST = int(os.getenv("HTTP_RATE_BURST", "10"))
+HTTP_RATE_MIN = 0.5
+# RateLimit-Limit'in geçerli olduğu pencere (saniye; GitLab dakikalık kota bildirir)
+HTTP_RATE_WINDOW = float(os.getenv("HTTP_RATE_WINDOW", "60"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+# ------------------- TOKEN BUCKET -------------------
+class TokenBucket:
+    """Sunucunun RateLimit-* başlıklarına göre hızını ayarlayan token bucket.
+
+    Başlangıç hızı HTTP_RATE_LIMIT'tir; sunucu kotasını bildirdiğinde hız
+    (yukarı ya da aşağı) o kotaya göre belirlenir.
+    """
+
+    def __init__(self, rate=HTTP_RATE_LIMIT, capacity=HTTP_RATE_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Retry-After süresince hiçbir isteğin çıkmamasını sağla."""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+    def adapt(self, headers):
+        """Hızı sunucunun bildirdiği kotaya göre güncelle.
+
+        Üst sınır RateLimit-Limit / HTTP_RATE_WINDOW; kalan kota sıfırlanmaya
+        kalan süreye yetmeyecekse RateLimit-Remaining / kalan süre.
+        """
+        rates = []
+        try:
+            limit = headers.get("RateLimit-Limit")
+            if limit is not None:
+                rates.append(float(limit) / HTTP_RATE_WINDOW)
+            remaining = headers.get("RateLimit-Remaining")
+            reset = headers.get("RateLimit-Reset")
+            if remaining is not None and reset is not None:
+                reset = float(reset)
+                # Reset çoğunlukla epoch zamanı; küçük değerler kalan saniye kabul edilir
+                window = reset - time.time() if reset > 1e9 else reset
+                rates.append(int(remaining) / max(window, 1.0))
+        except ValueError:
+            return
+        if not rates:
+            return
+        with self._lock:
+            self.rate = max(HTTP_RATE_MIN, min(rates))
+
+
+# ------------------- SÜREÇLER ARASI ORTAK BÜTÇE -------------------
+class SharedTokenBucket:
+    """Birden fazla süreç (shard) arasında paylaşılan token bucket.
+
+    Durum multiprocessing.Value'larda tutulur; süreç havuzuna initargs ile
+    verilir ve her süreçte set_shared_buckets() ile kaydedilir.
+    """
+
+    def __init__(self, rate, capacity=None, ctx=None):
+        import multiprocessing
+        ctx = ctx or multiprocessing.get_context()
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self._lock = ctx.Lock()
+        self._tokens = ctx.Value("d", self.capacity, lock=False)
+        self._updated = ctx.Value("d", time.time(), lock=False)
+        self._paused_until = ctx.Value("d", 0.0, lock=False)
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.time()
+                self._tokens.value = min(self.capacity, self._tokens.value + (now - self._updated.value) * self.rate)
+                self._updated.value = now
+                if now < self._paused_until.value:
+                    wait = self._paused_until.value - now
+                elif self._tokens.value >= 1:
+                    self._tokens.value -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens.value) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until.value = max(self._paused_until.value, time.time() + seconds)
+            self._tokens.value = 0
+
+_shared_buckets = {}
+
+def set_shared_buckets(buckets):
+    """Host -> SharedTokenBucket; bu süreçteki tüm istekler ortak bütçeden de düşer."""
+    _shared_buckets.clear()
+    _shared_buckets.update(buckets or {})
+
+
+# ------------------- SAYAÇLAR -------------------
+_stats = defaultdict(lambda: {"requests": 0, "retries": 0, "errors": 0, "seconds": 0.0, "bytes_in": 0, "bytes_out": 0})
+_stats_lock = threading.Lock()
+
+_ID_SEGMENT = re.compile(r"^(\d+|[A-Z][A-Z0-9]+-\d+)$")
+
+def endpoint_of(method, url):
+    """'/api/v4/projects/12/issues/3' -> 'POST /api/v4/projects/:id/issues/:id' (sayaç anahtarı)."""
+    path = urlparse(url).path
+    parts = [":id" if _ID_SEGMENT.match(p) else p for p in path.split("/")]
+    return f"{method} {'/'.join(parts)}"
+
+def _count(endpoint, field, amount=1):
+    with _stats_lock:
+        _stats[endpoint][field] += amount
+
+def _body_size(body):
+    # Akan gövdeler (ör. ek yüklemesi) uzunluklarını __len__ ile bildirir
+    return len(body) if hasattr(body, "__len__") else 0
+
+def _record_transfer(endpoint, response, elapsed, stream):
+    """İstek süresi ve gönderilen/alınan bayt sayısı (akış cevaplarında gövde okunmaz)."""
+    length = response.headers.get("Content-Length")
+    if length and length.isdigit():
+        bytes_in = int(length)
+    else:
+        bytes_in = 0 if stream else len(response.content)
+    with _stats_lock:
+        stats = _stats[endpoint]
+        stats["seconds"] += elapsed
+        stats["bytes_in"] += bytes_in
+        stats["bytes_out"] += _body_size(response.request.body)
+
+def get_stats():
+    """Endpoint bazında istek / yeniden deneme / hata sayıları, süre ve bayt toplamları."""
+    with _stats_lock:
+        return {k: dict(v) for k, v in _stats.items()}
+
+def print_stats():
+    stats = get_stats()
+    if not stats:
+        return
+    print("\n📊 API istek istatistikleri:")
+    for endpoint, s in sorted(stats.items()):
+        avg_ms = s["seconds"] / s["requests"] * 1000 if s["requests"] else 0
+        print(f"  {endpoint}: {s['requests']} istek, {s['retries']} tekrar, {s['errors']} hata, "
+              f"ort. {avg_ms:.0f} ms, {s['bytes_in'] / 1024:.0f} KB")
+
+
+# ------------------- ORTAK OTURUM -------------------
+_session = None
+_buckets = {}
+_init_lock = threading.Lock()
+
+def get_session():
+    """Tüm script'lerin paylaştığı, bağlantı havuzlu requests oturumu."""
+    global _session
+    with _init_lock:
+        if _session is None:
+            # requests ilk istekte yüklenir; import süresine eklenmez
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+def get_bucket(url):
+    host = urlparse(url).netloc
+    with _init_lock:
+        if host not in _buckets:
+            _buckets[host] = TokenBucket()
+        return _buckets[host]
+
+def _backoff(attempt, retry_after=None):
+    if retry_after is not None:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    # Full jitter: [0, min(max, base * 2^attempt)]
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+def request(method, url, retry=None, max_retries=HTTP_MAX_RETRIES, **kwargs):
+    """Throttle + yeniden deneme ile HTTP isteği gönder.
+
+    retry=None iken yalnızca idempotent metodlar tekrar denenir; POST sadece
+    sunucunun isteği işlemediği kesin olan durumlarda (429, bağlantı kurulamadı)
+    tekrar edilir. retry=True/False bu davranışı zorlar.
+    """
+    method = method.upper()
+    retry_any = method in IDEMPOTENT_METHODS if retry is None else retry
+    kwargs.setdefault("timeout", HTTP_TIMEOUT)
+    endpoint = endpoint_of(method, url)
+    bucket = get_bucket(url)
+    shared = _shared_buckets.get(urlparse(url).netloc)
+    session = get_session()
+    import requests
+
+    attempt = 0
+    while True:
+        bucket.acquire()
+        if shared:
+            shared.acquire()
+        _count(endpoint, "requests")
+        started = time.monotonic()
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            # Bağlantı hiç kurulamadıysa POST da güvenle tekrar edilebilir
+            safe = retry_any or isinstance(e, requests.ConnectTimeout)
+            if attempt >= max_retries or not safe:
+                _count(endpoint, "errors")
+                raise
+            attempt += 1
+            _count(endpoint, "retries")
+            time.sleep(_backoff(attempt))
+            continue
+
+        _record_transfer(endpoint, response, time.monotonic() - started, kwargs.get("stream", False))
+        bucket.adapt(response.headers)
+        if response.status_code not in RETRY_STATUSES:
+            if response.status_code >= 400:
+                _count(endpoint, "errors")
+            return response
+
+        retry_after = response.headers.get("Retry-After")
+        if response.status_code == 429:
+            pause = _backoff(attempt + 1, retry_after)
+            bucket.pause(pause)
+            if shared:
+                shared.pause(pause)
+        if attempt >= max_retries or not (retry_any or response.status_code == 429):
+            _count(endpoint, "errors")
+            return response
+        attempt += 1
+        _count(endpoint, "retries")
+        if response.status_code != 429:
+            time.sleep(_backoff(attempt, retry_after))
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+def put(url, **kwargs):
+    return request("PUT", url, **kwargs)
+
+def delete(url, **kwargs):
+    return request("DELETE", url, **kwargs)
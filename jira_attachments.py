@@ -0,0 +1,286 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+import http_client
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from gitlab_api import GITLAB_TOKEN, GITLAB_API_URL
+from gitlab_cache import MetadataCache
+from sync_metrics import log, phase, count
+
+# .env dosyasını yükle
+load_dotenv()
+
+JIRA_API_TOKEN = os.getenv("JIRA_API_TOKEN")
+CSV_FOLDER = os.getenv("CSV_FOLDER", "csv_folder")
+
+JIRA_ATTACHMENTS = os.getenv("JIRA_ATTACHMENTS", "1") == "1"  # 0: ekler GitLab'e taşınmaz
+# İndirilen dosyalar içerik sha256'sına göre saklanır: <dizin>/ab/abcd...
+ATTACHMENT_CACHE_DIR = os.getenv("ATTACHMENT_CACHE_DIR", os.path.join(CSV_FOLDER, "attachments"))
+# Jira ek id -> sha256 ve proje -> sha256 -> GitLab upload adresi
+ATTACHMENT_INDEX_FILE = os.getenv("ATTACHMENT_INDEX_FILE", os.path.join(CSV_FOLDER, "attachment_index.json"))
+ATTACHMENT_CONCURRENCY = int(os.getenv("ATTACHMENT_CONCURRENCY", "4"))  # Aynı anda çalışan transfer sayısı
+# Tüm indirme + yüklemelerin toplam bant genişliği (bayt/sn, 0: sınırsız)
+ATTACHMENT_MAX_BYTES_PER_SEC = float(os.getenv("ATTACHMENT_MAX_BYTES_PER_SEC", "0"))
+ATTACHMENT_MAX_SIZE = int(os.getenv("ATTACHMENT_MAX_SIZE", str(100 * 1024 * 1024)))  # GitLab'in varsayılan sınırı
+ATTACHMENT_CHUNK_SIZE = 64 * 1024
+ATTACHMENT_UPLOAD_ATTEMPTS = 3
+
+JIRA_DOWNLOAD_HEADERS = {"Authorization": f"Bearer {JIRA_API_TOKEN}"}
+
+
+# ------------------- BANT GENİŞLİĞİ SINIRI -------------------
+class BandwidthLimiter:
+    """Bayt bazlı token bucket; tüm transfer thread'leri aynı bütçeden düşer.
+
+    Okunan/gönderilen her parça sonradan düşülür; bütçe eksiye inerse
+    borç kapanana kadar beklenir (en fazla bir saniyelik patlama).
+    """
+
+    def __init__(self, rate=ATTACHMENT_MAX_BYTES_PER_SEC):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount):
+        if self.rate <= 0 or not amount:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+_limiter = BandwidthLimiter()
+
+
+# ------------------- AKAN MULTIPART GÖVDE -------------------
+class MultipartFile:
+    """Tek dosyalık multipart/form-data gövdesi; dosya diskten parça parça okunur.
+
+    requests uzunluğu __len__'den alıp Content-Length gönderir, gövdeyi
+    read() ile okur; dosyanın tamamı hiçbir zaman bellekte olmaz. Gövde tek
+    seferlik olduğu için istek http_client seviyesinde tekrar denenemez.
+    """
+
+    def __init__(self, path, filename, content_type="application/octet-stream", limiter=_limiter):
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        safe_name = filename.replace('"', "%22").replace("\r", " ").replace("\n", " ")
+        head = (f"--{boundary}\r\n"
+                f'Content-Disposition: form-data; name="file"; filename="{safe_name}"\r\n'
+                f"Content-Type: {content_type}\r\n\r\n").encode("utf-8")
+        tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+        self._file = open(path, "rb")
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._parts = [head, self._file, tail]
+        self._part = 0
+        self._offset = 0
+        self._limiter = limiter
+
+    def __len__(self):
+        return len(self._parts[0]) + self._size + len(self._parts[2])
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = len(self)
+        out = bytearray()
+        while len(out) < size and self._part < len(self._parts):
+            part = self._parts[self._part]
+            if part is self._file:
+                chunk = self._file.read(size - len(out))
+            else:
+                chunk = part[self._offset:self._offset + size - len(out)]
+                self._offset += len(chunk)
+            if not chunk:
+                self._part += 1
+                self._offset = 0
+                continue
+            out += chunk
+        self._limiter.consume(len(out))
+        return bytes(out)
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(ATTACHMENT_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self):
+        self._file.close()
+
+
+# ------------------- İÇERİK ADRESLİ CACHE -------------------
+# Süresi dolmayan (GitLab upload'ları silinmez) index; proje başına ayrı namespace
+attachment_index = MetadataCache(cache_file=ATTACHMENT_INDEX_FILE, ttl=10 * 365 * 24 * 3600, max_entries=1000000)
+
+_key_locks = {}
+_key_locks_lock = threading.Lock()
+
+def _key_lock(key):
+    # Aynı ek / aynı (proje, içerik) için aynı anda tek transfer
+    with _key_locks_lock:
+        return _key_locks.setdefault(key, threading.Lock())
+
+def cache_path(digest):
+    return os.path.join(ATTACHMENT_CACHE_DIR, digest[:2], digest)
+
+def parse_attachments(value):
+    """CSV'deki 'Attachments' hücresini (JSON liste) ek sözlüklerine çevir."""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        log(f"⚠️ Ek listesi okunamadı: {value[:80]}")
+        return []
+
+def _download(attachment):
+    """Eki parça parça indir, indirirken sha256'sını hesapla ve cache'e taşı; sha256'yı döndür."""
+    os.makedirs(ATTACHMENT_CACHE_DIR, exist_ok=True)
+    tmp_path = os.path.join(ATTACHMENT_CACHE_DIR, f".{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    try:
+        with phase("attachment_download"):
+            r = http_client.get(attachment["content"], headers=JIRA_DOWNLOAD_HEADERS, stream=True)
+            try:
+                if r.status_code != 200:
+                    log(f"⚠️ Ek indirilemedi ({attachment.get('filename')}): {r.status_code}")
+                    return None
+                with open(tmp_path, "wb") as f:
+                    for chunk in r.iter_content(ATTACHMENT_CHUNK_SIZE):
+                        _limiter.consume(len(chunk))
+                        digest.update(chunk)
+                        f.write(chunk)
+            finally:
+                r.close()
+        path = cache_path(digest.hexdigest())
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        return digest.hexdigest()
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def ensure_local(attachment):
+    """Ekin cache'teki kopyasının sha256'sı; daha önce indirilmişse tekrar indirilmez."""
+    attachment_id = str(attachment["id"])
+    with _key_lock(f"download:{attachment_id}"):
+        digest = attachment_index.get("jira_attachment", attachment_id, None)
+        if digest and os.path.exists(cache_path(digest)):
+            return digest
+        digest = _download(attachment)
+        if digest:
+            attachment_index.set("jira_attachment", attachment_id, digest)
+            count("attachments", result="downloaded")
+        return digest
+
+def _upload(project_id, path, attachment):
+    url = f"{GITLAB_API_URL}/projects/{project_id}/uploads"
+    for attempt in range(ATTACHMENT_UPLOAD_ATTEMPTS):
+        body = MultipartFile(path, attachment.get("filename") or os.path.basename(path),
+                             attachment.get("mimeType") or "application/octet-stream")
+        try:
+            with phase("attachment_upload"):
+                # Gövde bir kez okunabildiği için http_client tekrar denemesin; 429'da gövde baştan açılır
+                r = http_client.post(url, headers={"PRIVATE-TOKEN": GITLAB_TOKEN, "Content-Type": body.content_type},
+                                     data=body, retry=False, max_retries=0)
+        finally:
+            body.close()
+        if r.status_code != 429:
+            break
+    if r.status_code != 201:
+        log(f"⚠️ Ek yüklenemedi (project {project_id}, {attachment.get('filename')}): {r.status_code} {r.text[:200]}")
+        return None
+    return r.json()["url"]
+
+def attachment_markdown(attachment, url):
+    # Aynı içerik başka adla yüklenmiş olabilir; bağlantı metni bu ekin adıyla yazılır
+    name = (attachment.get("filename") or "ek").replace("[", "(").replace("]", ")")
+    prefix = "!" if (attachment.get("mimeType") or "").startswith("image/") else ""
+    return f"{prefix}[{name}]({url})"
+
+def mirror_attachment(attachment, project_id, upload=True):
+    """Eki projeye yükle ve markdown bağlantısını döndür; aynı içerik o projeye daha önce yüklendiyse yeniden kullanılır.
+
+    upload=False iken yalnızca index'e bakılır (ağ isteği yapılmaz).
+    """
+    namespace = f"project_upload:{project_id}"
+    digest = attachment_index.get("jira_attachment", str(attachment["id"]), None)
+    if digest:
+        url = attachment_index.get(namespace, digest, None)
+        if url and upload:
+            count("attachments", result="reused")
+        if url or not upload:
+            return attachment_markdown(attachment, url) if url else None
+    if not upload:
+        return None
+    if int(attachment.get("size") or 0) > ATTACHMENT_MAX_SIZE:
+        log(f"⚠️ Ek çok büyük, atlandı ({attachment.get('filename')}, {attachment.get('size')} bayt)")
+        return None
+
+    digest = ensure_local(attachment)
+    if not digest:
+        return None
+    with _key_lock(f"upload:{project_id}:{digest}"):
+        url = attachment_index.get(namespace, digest, None)
+        if url:
+            count("attachments", result="reused")
+        else:
+            url = _upload(project_id, cache_path(digest), attachment)
+            if not url:
+                count("attachments", result="failed")
+                return None
+            attachment_index.set(namespace, digest, url)
+            count("attachments", result="uploaded")
+        return attachment_markdown(attachment, url)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, ATTACHMENT_CONCURRENCY), thread_name_prefix="attachment")
+        return _pool
+
+def _result(future):
+    # Tek bir ekin hatası issue aktarımını durdurmasın; ek bağlantısız kalır
+    try:
+        return future.result()
+    except Exception as e:
+        count("attachments", result="error")
+        log(f"⚠️ Ek aktarılamadı: {e}")
+        return None
+
+def mirror_attachments(attachments, project_ids, upload=True):
+    """Tüm ekleri tüm projelere paralel taşı; {str(project_id): [markdown, ...]} döndür (ek sırası korunur)."""
+    if not JIRA_ATTACHMENTS or not attachments or not project_ids:
+        return {}
+    project_ids = list(dict.fromkeys(str(p) for p in project_ids if p))
+    if not upload:
+        return {p: [md for md in (mirror_attachment(a, p, upload=False) for a in attachments) if md]
+                for p in project_ids}
+    # Ek transferleri kendi havuzunda: issue/child worker'ları yalnızca sonucu bekler
+    pool = _get_pool()
+    futures = {p: [pool.submit(mirror_attachment, a, p) for a in attachments] for p in project_ids}
+    links = {p: [md for md in (_result(f) for f in fs) if md] for p, fs in futures.items()}
+    attachment_index.save()
+    return links
+
+def attachment_section(markdowns):
+    """Açıklamanın sonuna eklenecek 'Ekler' bölümü."""
+    if not markdowns:
+        return ""
+    return "\n\n**Ekler**\n" + "\n".join(f"- {md}" for md in markdowns)
@@ -1,98 +1,342 @@
 import os
-import requests
-import pandas as pd
+import csv
+import json
+import threading
+import http_client
+from sync_metrics import log
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 load_dotenv()
 
 JIRA_URL = os.getenv("JIRA_URL")
 JIRA_API_TOKEN = os.getenv("JIRA_API_TOKEN")
-CSV_FOLDER = "csv_folder"
+CSV_FOLDER = os.getenv("CSV_FOLDER", "csv_folder")
 LATEST_FILE = os.path.join(CSV_FOLDER, "jira_latest.csv")
+WATERMARK_FILE = os.path.join(CSV_FOLDER, "jira_watermark.json")
 
-def fetch_jira_csv():
-    start_at = 0
-    max_results = 100
-    all_issues = []
-
-    JQL = 'project = GYT AND created >=-7d'  # son 7 gün
-    #JQL = 'project = GYT AND issuekey = GYT-126'
-    
-    
-    headers = {
-        "Authorization": f"Bearer {JIRA_API_TOKEN}",
-        "Accept": "application/json"
+JIRA_PROJECT = os.getenv("JIRA_PROJECT", "GYT")
+JQL = os.getenv("JIRA_JQL", f'project = {JIRA_PROJECT} AND created >=-7d')  # son 7 gün
+#JQL = 'project = GYT AND issuekey = GYT-126'
+# Artımlı mod: son başarılı çalışmadan beri güncellenen issue'lar (7 günden eski olsalar da)
+INCREMENTAL_JQL = os.getenv("JIRA_INCREMENTAL_JQL",
+                            f'project = {JIRA_PROJECT} AND updated >= "{{since}}" ORDER BY updated ASC')
+JIRA_INCREMENTAL = os.getenv("JIRA_INCREMENTAL", "0") == "1"
+# Jira JQL tarihleri dakika hassasiyetinde; sınırdaki güncellemeler kaçmasın diye geriye pay bırakılır
+WATERMARK_OVERLAP_MINUTES = int(os.getenv("JIRA_WATERMARK_OVERLAP_MINUTES", "5"))
+# Aynı anda çekilecek en fazla sayfa sayısı
+JIRA_FETCH_CONCURRENCY = int(os.getenv("JIRA_FETCH_CONCURRENCY", "4"))
+JIRA_PAGE_SIZE = 100
+
+JIRA_FIELDS = [
+    "summary",
+    "description",
+    "assignee",
+    "reporter",
+    "priority",
+    "status",
+    "duedate",
+    "issuetype",
+    "project",
+    "labels",
+    "timeoriginalestimate",
+    "timespent",
+    "updated",
+    "attachment",
+    "customfield_10601"
+]
+
+# ------------------- WATERMARK -------------------
+def parse_jira_datetime(value):
+    """Jira'nın '2025-10-01T10:22:33.000+0300' biçimindeki zamanını datetime'a çevir."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f%z")
+    except ValueError:
+        return None
+
+def watermark_key(updated, issue_id):
+    """Watermark karşılaştırması için (updated, issue id) ikilisi; aynı dakikadakiler id ile ayrılır."""
+    return (parse_jira_datetime(updated), int(issue_id or 0))
+
+def load_watermark():
+    if not os.path.exists(WATERMARK_FILE):
+        return None
+    try:
+        with open(WATERMARK_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        log(f"⚠️ Watermark okunamadı, tam çekim yapılacak: {e}")
+        return None
+
+def row_updated(row):
+    """Satırın Jira'daki son güncellenme zamanı (okunamazsa None)."""
+    return parse_jira_datetime(row.get("Updated"))
+
+def save_watermark(watermark):
+    tmp_path = f"{WATERMARK_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(watermark, f)
+    os.replace(tmp_path, WATERMARK_FILE)
+
+def incremental_jql(watermark):
+    since = parse_jira_datetime(watermark["updated"]) - timedelta(minutes=WATERMARK_OVERLAP_MINUTES)
+    return INCREMENTAL_JQL.format(since=since.strftime("%Y/%m/%d %H:%M"))
+
+# ------------------- JIRA -> SATIR -------------------
+CSV_COLUMNS = [
+    "Summary", "Issue key", "Issue id", "Issue Type", "Status", "Project key", "Project name",
+    "Priority", "Assignee", "Reporter", "Description", "Due Date", "Original Estimate",
+    "Time Spent", "Labels", "İlgili Stajyerler", "Updated", "Attachments",
+]
+
+# CSV'de tutulan ek alanları (indirme adresi dahil); dosyaların kendisi jira_attachments ile taşınır
+_ATTACHMENT_KEYS = ("id", "filename", "size", "mimeType", "content")
+
+def attachments_cell(attachments):
+    if not attachments:
+        return ""
+    return json.dumps([{k: a.get(k) for k in _ATTACHMENT_KEYS} for a in attachments], ensure_ascii=False)
+
+def issue_to_row(issue):
+    fields = issue.get("fields", {})
+    return {
+        "Summary": fields.get("summary"),
+        "Issue key": issue.get("key"),
+        "Issue id": issue.get("id"),
+        "Issue Type": fields.get("issuetype", {}).get("name"),
+        "Status": fields.get("status", {}).get("name"),
+        "Project key": fields.get("project", {}).get("key"),
+        "Project name": fields.get("project", {}).get("name"),
+        "Priority": fields.get("priority", {}).get("name") if fields.get("priority") else "",
+        "Assignee": fields.get("assignee", {}).get("name") if fields.get("assignee") else "",
+        "Reporter": fields.get("reporter", {}).get("name") if fields.get("reporter") else "",
+        "Description": fields.get("description") or "",
+        "Due Date": fields.get("duedate") or "",
+        "Original Estimate": fields.get("timeoriginalestimate"),
+        "Time Spent": fields.get("timespent"),
+        "Labels": ",".join(fields.get("labels", [])),
+        "İlgili Stajyerler": ",".join([u.get("name") for u in fields.get("customfield_10601", [])]) if fields.get("customfield_10601") else "",
+        "Updated": fields.get("updated") or "",
+        "Attachments": attachments_cell(fields.get("attachment")),
     }
 
-    while True:
-        url = f"{JIRA_URL}/rest/api/2/search"
-        response = requests.get(
-            url,
-            params={
-                "jql": JQL,
-                "startAt": start_at,
-                "maxResults": max_results,
-                "fields": [
-                    "summary",
-                    "description",
-                    "assignee",
-                    "reporter",
-                    "priority",
-                    "status",
-                    "duedate",
-                    "issuetype",
-                    "project",
-                    "labels",
-                    "timeoriginalestimate",
-                    "timespent",
-                    "customfield_10601"
-                ]
-            },
-            headers=headers
-        )
-
-        if response.status_code != 200:
-            print(f"❌ Jira API Hatası: {response.status_code} {response.text}")
-            return
-
-        data = response.json()
-        issues = data.get("issues", [])
-        if not issues:
-            break
+# ------------------- SAYFA ÇEKME -------------------
+class JiraFetchError(Exception):
+    pass
+
+def is_request_error(exc):
+    import requests
+    return isinstance(exc, requests.RequestException)
+
+JIRA_HEADERS = {
+    "Authorization": f"Bearer {JIRA_API_TOKEN}",
+    "Accept": "application/json"
+}
+
+def fetch_jira_page(jql, start_at, max_results=JIRA_PAGE_SIZE):
+    # Ortak istemci: bağlantı havuzu, hız sınırı ve yeniden deneme
+    response = http_client.get(
+        f"{JIRA_URL}/rest/api/2/search",
+        headers=JIRA_HEADERS,
+        params={
+            "jql": jql,
+            "startAt": start_at,
+            "maxResults": max_results,
+            "fields": JIRA_FIELDS
+        }
+    )
+    if response.status_code != 200:
+        raise JiraFetchError(f"{response.status_code} {response.text}")
+    return response.json()
+
+def fetch_full_page(jql, start_at, expected, max_results=JIRA_PAGE_SIZE):
+    """startAt'ten itibaren `expected` satırı getir; sunucu eksik döndürürse kalanı devamından iste."""
+    issues = []
+    while len(issues) < expected:
+        page = fetch_jira_page(jql, start_at + len(issues), min(max_results, expected - len(issues)))
+        rows = page.get("issues", [])
+        if not rows:
+            raise JiraFetchError(f"startAt={start_at}: {expected} satır beklenirken {len(issues)} satır geldi")
+        issues.extend(rows)
+    return issues
+
+def iter_jira_pages(jql, max_results=JIRA_PAGE_SIZE, concurrency=JIRA_FETCH_CONCURRENCY):
+    """Arama sonuçlarını sayfa sayfa, sırası korunarak üret.
+
+    İlk sayfadan 'total' ve sunucunun uyguladığı sayfa boyutu okunur (Jira
+    maxResults'ı kendi sınırına indirebilir); kalan startAt offset'leri en
+    fazla `concurrency` sayfa aynı anda havada olacak şekilde paralel çekilir.
+    Toplanan satır sayısı 'total'a ulaşmazsa JiraFetchError fırlar.
+    """
+    first = fetch_jira_page(jql, 0, max_results)
+    issues = first.get("issues", [])
+    yield issues
+    total = first.get("total", 0)
+    if not issues or len(issues) >= total:
+        return
+
+    # İstenen değil, sunucunun gerçekten döndürdüğü sayfa boyutuyla ilerle
+    page_size = min(int(first.get("maxResults") or len(issues)), len(issues)) or len(issues)
+    collected = len(issues)
+    offsets = iter(range(len(issues), total, page_size))
+
+    def _submit(pool, offset):
+        return pool.submit(fetch_full_page, jql, offset, min(page_size, total - offset), page_size)
 
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="jira-page") as pool:
+        in_flight = deque()
+        for offset in offsets:
+            in_flight.append(_submit(pool, offset))
+            if len(in_flight) >= concurrency:
+                break
+        while in_flight:
+            page = in_flight.popleft().result()
+            next_offset = next(offsets, None)
+            if next_offset is not None:
+                in_flight.append(_submit(pool, next_offset))
+            collected += len(page)
+            yield page
+    if collected != total:
+        raise JiraFetchError(f"{total} issue beklenirken {collected} issue çekildi")
+
+def _read_latest_rows():
+    if not os.path.exists(LATEST_FILE) or os.path.getsize(LATEST_FILE) == 0:
+        return []
+    with open(LATEST_FILE, encoding="utf-8-sig", newline="") as f:
+        return list(csv.DictReader(f))
+
+def iter_jira_rows(incremental=None, progress=None):
+    """Jira satırlarını sayfalar geldikçe üret (CSV'ye uğramadan).
+
+    incremental=True iken yalnızca watermark'tan sonra güncellenen satırlar
+    üretilir. progress sözlüğüne çekilen issue sayısı ("count") ve en son
+    güncellenen satır ("newest") yazılır; watermark'ı çağıran, işi bitince
+    commit_watermark(progress) ile kaydeder. Hata durumunda JiraFetchError
+    ya da requests.RequestException fırlar (bkz. is_request_error).
+    """
+    if incremental is None:
+        incremental = JIRA_INCREMENTAL
+    progress = {} if progress is None else progress
+    watermark = load_watermark() if incremental else None
+    last_seen = watermark_key(watermark["updated"], watermark["id"]) if watermark else None
+    progress.update(incremental=incremental, last_seen=last_seen, merge=bool(watermark), newest=None, count=0)
+
+    jql = incremental_jql(watermark) if watermark else JQL
+    log(f"🔎 Jira sorgusu: {jql}")
+
+    for issues in iter_jira_pages(jql):
         for issue in issues:
-            fields = issue.get("fields", {})
-            row = {
-                "Summary": fields.get("summary"),
-                "Issue key": issue.get("key"),
-                "Issue id": issue.get("id"),
-                "Issue Type": fields.get("issuetype", {}).get("name"),
-                "Status": fields.get("status", {}).get("name"),
-                "Project key": fields.get("project", {}).get("key"),
-                "Project name": fields.get("project", {}).get("name"),
-                "Priority": fields.get("priority", {}).get("name") if fields.get("priority") else "",
-                "Assignee": fields.get("assignee", {}).get("name") if fields.get("assignee") else "",
-                "Reporter": fields.get("reporter", {}).get("name") if fields.get("reporter") else "",
-                "Description": fields.get("description") or "",
-                "Due Date": fields.get("duedate") or "",
-                "Original Estimate": fields.get("timeoriginalestimate"),
-                "Time Spent": fields.get("timespent"),
-                "Labels": ",".join(fields.get("labels", [])),
-                "İlgili Stajyerler": ",".join([u.get("name") for u in fields.get("customfield_10601", [])]) if fields.get("customfield_10601") else ""
-            }
-            all_issues.append(row)
-
-        start_at += max_results
-        if start_at >= data.get("total", 0):
-            break
-     
-     # Klasör yoksa oluştur
+            row = issue_to_row(issue)
+            progress["count"] += 1
+            updated_key = watermark_key(row["Updated"], row["Issue id"])
+            if updated_key[0] is None:
+                if not watermark:
+                    yield row
+                continue
+            if progress["newest"] is None or updated_key > progress["newest"][0]:
+                progress["newest"] = (updated_key, row)
+            # Watermark'tan önce (ya da tam üstünde) kalan, daha önce görülmüş kayıtları ele
+            if not watermark or updated_key > last_seen:
+                yield row
+
+# LATEST_FILE ve watermark birlikte ilerler (pipeline, daemon ve dosya modu aynı durumu görür)
+_state_lock = threading.Lock()
+
+def _merge_latest(rows):
+    """rows'u ({Issue key: satır}) LATEST_FILE'a yaz; dosyadaki satır daha yeniyse korunur."""
     if not os.path.exists(CSV_FOLDER):
         os.makedirs(CSV_FOLDER)
-        print(f"'{CSV_FOLDER}' klasörü oluşturuldu (boş).")       
-        df = pd.DataFrame(all_issues)
-    
-    df = pd.DataFrame(all_issues)
+    tmp_path = f"{LATEST_FILE}.merge.tmp"
+    with open(tmp_path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS, restval="", extrasaction="ignore")
+        writer.writeheader()
+        for row in _read_latest_rows():
+            key = row.get("Issue key")
+            merged = rows.get(key)
+            if merged is not None:
+                current, incoming = row_updated(row), row_updated(merged)
+                if current is None or incoming is None or incoming >= current:
+                    continue
+                del rows[key]
+            writer.writerow(row)
+        writer.writerows(rows.values())
+    os.replace(tmp_path, LATEST_FILE)
+
+def merge_latest_rows(rows):
+    """CSV'ye uğramadan GitLab'e işlenmiş satırları LATEST_FILE'a Issue key bazında işle.
+
+    Pipeline ve daemon defteri güncellerken LATEST_FILE eski kalırsa sonraki
+    artımlı dosya modu çalışması bayat satırları 'değişmiş' sayardı.
+    """
+    rows = {row["Issue key"]: dict(row) for row in rows if row.get("Issue key")}
+    if rows:
+        with _state_lock:
+            _merge_latest(rows)
+    return len(rows)
+
+def commit_watermark(progress, rows=()):
+    """Başarılı bir çekimden sonra yeni watermark'ı kaydet.
+
+    rows verilirse (pipeline/daemon'un işlediği satırlar) aynı kilit altında
+    önce LATEST_FILE'a işlenir; watermark dosyadaki durumun önüne geçmez.
+    """
+    rows = {row["Issue key"]: dict(row) for row in rows if row.get("Issue key")}
+    newest, last_seen = progress.get("newest"), progress.get("last_seen")
+    with _state_lock:
+        if rows:
+            _merge_latest(rows)
+        if progress.get("incremental") and newest and (last_seen is None or newest[0] > last_seen):
+            row = newest[1]
+            save_watermark({"updated": row["Updated"], "id": row["Issue id"]})
+            log(f"📌 Watermark güncellendi: {row['Updated']} ({row['Issue key']})")
+
+def fetch_jira_csv(incremental=None):
+    """Jira'dan issue'ları çekip LATEST_FILE'a yaz.
+
+    Sayfalar geldikçe (sırasıyla) dosyaya yazılır. incremental=True iken
+    yalnızca son watermark'tan beri güncellenen issue'lar istenir ve mevcut
+    LATEST_FILE ile Issue key bazında birleştirilir.
+    """
+    # Klasör yoksa oluştur
+    if not os.path.exists(CSV_FOLDER):
+        os.makedirs(CSV_FOLDER)
+        log(f"'{CSV_FOLDER}' klasörü oluşturuldu (boş).")
+
+    progress = {}
+    changed = {}
+
+    # Hata olursa eski LATEST_FILE bozulmasın diye önce geçici dosyaya yazılır
+    tmp_path = f"{LATEST_FILE}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS, restval="", extrasaction="ignore")
+            writer.writeheader()
+            for row in iter_jira_rows(incremental, progress):
+                if progress["merge"]:
+                    changed[row["Issue key"]] = row
+                else:
+                    writer.writerow(row)
+
+            if progress["merge"]:
+                # Değişen satırları mevcut durumla Issue key bazında birleştir
+                for row in _read_latest_rows():
+                    if row.get("Issue key") not in changed:
+                        writer.writerow(row)
+                writer.writerows(changed.values())
+                log(f"🔁 Artımlı çekim: {len(changed)} değişen issue birleştirildi.")
+    except Exception as e:
+        if not isinstance(e, JiraFetchError) and not is_request_error(e):
+            raise
+        os.remove(tmp_path)
+        log(f"❌ Jira API Hatası: {e}")
+        return
+
+    os.replace(tmp_path, LATEST_FILE)
+    log(f"✅ Jira CSV başarıyla güncellendi: {LATEST_FILE} ({progress['count']} issue çekildi)")
 
-    df.to_csv(LATEST_FILE, index=False, encoding="utf-8-sig")
-    print(f"✅ Jira CSV başarıyla güncellendi: {LATEST_FILE}")
\ No newline at end of file
+    # Yeni watermark: yalnızca başarılı yazımdan sonra
+    commit_watermark(progress)
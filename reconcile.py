@@ -0,0 +1,243 @@
+import os
+import sys
+import json
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+import http_client
+import sync_to_gitlab as sync
+from compare_issues import iter_csv_rows
+from gitlab_api import GITLAB_API_URL, HEADERS, GitLabAPIError
+from gitlab_index import build_index, GITLAB_INDEX_FILE
+from jira_auto_export import LATEST_FILE
+from sync_ledger import get_ledger
+from sync_metrics import log, phase, write_reports, print_summary
+
+# .env dosyasını yükle
+load_dotenv()
+
+RECONCILE_CONCURRENCY = int(os.getenv("RECONCILE_CONCURRENCY", "8"))  # Aynı anda listelenen proje / onarılan key
+
+# Problem türleri; yalnızca rapor edilenler (silme gerektirenler) otomatik onarılmaz
+REPAIRABLE = {"unrecorded", "master_drift", "child_drift", "missing_master", "missing_child", "unlinked_child"}
+
+
+# ------------------- LİNK DURUMU -------------------
+def check_links(index, concurrency=RECONCILE_CONCURRENCY):
+    """Child'ı olan her master'ın linklerini (master başına bir istek) okuyup child'lara işle."""
+    def _check(jira_key):
+        master = index.master(jira_key)
+        url = f"{GITLAB_API_URL}/projects/{sync.MASTER_PROJECT_ID}/issues/{master['iid']}/links"
+        r = http_client.get(url, headers=HEADERS)
+        if r.status_code != 200:
+            log(f"⚠️ Linkler okunamadı ({jira_key}, IID {master['iid']}): {r.status_code}", jira_key=jira_key)
+            return
+        linked = {(str(i["project_id"]), i["iid"]) for i in r.json()}
+        for child in index.children(jira_key):
+            child["linked"] = (str(child["project_id"]), child["iid"]) in linked
+
+    keys = [key for key in index.entries if index.master(key) and index.children(key)]
+    with phase("links"):
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="links") as pool:
+            list(pool.map(_check, keys))
+    log(f"🔗 {len(keys)} master issue'nun linkleri kontrol edildi.")
+
+
+# ------------------- KARŞILAŞTIRMA -------------------
+def _problem(kind, jira_key, **details):
+    return {"type": kind, "jira_key": jira_key, **details}
+
+def expected_children(row):
+    """Satırdaki stajyerlerin child açılması gereken projeleri: {stajyer: project_id}."""
+    stajyerler = [s.strip() for s in (row.get("İlgili Stajyerler") or "").split(",") if s.strip()]
+    return {s: sync.STAJYER_PROJECT_MAP[s] for s in stajyerler if sync.STAJYER_PROJECT_MAP.get(s)}
+
+def assign_children(index, jira_key, expected, recorded):
+    """Index'teki child'ları stajyerlere eşleştir: önce defterdeki IID, sonra atanan kişi, sonra sıradaki."""
+    claimed = set()
+    assigned = {}
+    for stajyer, project_id in expected.items():
+        candidates = [c for c in index.children(jira_key, project_id) if (c["project_id"], c["iid"]) not in claimed]
+        known = recorded.get(stajyer)
+        assignee_id = sync.resolve_assignee_id(stajyer)
+        child = (next((c for c in candidates if known and c["iid"] == known["iid"]), None)
+                 or next((c for c in candidates if assignee_id and assignee_id in c["assignee_ids"]), None)
+                 or next((c for c in candidates if c["state"] == "opened"), None))
+        if child:
+            claimed.add((child["project_id"], child["iid"]))
+        assigned[stajyer] = child
+    return assigned, claimed
+
+def reconcile_key(index, jira_key, entry, latest_row=None):
+    """Tek Jira key'i için (problemler, onarım planı) üret."""
+    problems = []
+    masters = index.masters(jira_key)
+    master = index.master(jira_key)
+    if len(masters) > 1:
+        problems.append(_problem("duplicate_master", jira_key, iids=sorted(m["iid"] for m in masters)))
+
+    if master is None:
+        for child in index.children(jira_key):
+            problems.append(_problem("orphan_child", jira_key, project_id=child["project_id"], iid=child["iid"]))
+        if entry and entry["master_iid"]:
+            problems.append(_problem("missing_master", jira_key, ledger_iid=entry["master_iid"]))
+            return problems, {"forget": True}
+        return problems, None
+
+    row = entry["row"] if entry else latest_row
+    if entry is None:
+        problems.append(_problem("unrecorded", jira_key, master_iid=master["iid"]))
+    elif entry["master_iid"] != master["iid"]:
+        problems.append(_problem("master_drift", jira_key, ledger_iid=entry["master_iid"], gitlab_iid=master["iid"]))
+    if row is None:
+        # Satır yoksa (ne defterde ne son CSV'de) hangi child'ların olması gerektiği bilinemez
+        return problems, None
+
+    recorded = entry["children"] if entry else {}
+    assigned, claimed = assign_children(index, jira_key, expected_children(row), recorded)
+    plan = {"row": row, "master": master, "children": {}, "missing": [], "unlink": [],
+            "record": entry is None or entry["master_iid"] != master["iid"]}
+    for stajyer, child in assigned.items():
+        if child is None:
+            problems.append(_problem("missing_child", jira_key, stajyer=stajyer,
+                                     project_id=sync.STAJYER_PROJECT_MAP[stajyer]))
+            plan["missing"].append(stajyer)
+            continue
+        plan["children"][stajyer] = (child["project_id"], child["iid"])
+        known = recorded.get(stajyer)
+        if not known or (known["project_id"], known["iid"]) != (child["project_id"], child["iid"]):
+            if entry:
+                problems.append(_problem("child_drift", jira_key, stajyer=stajyer, ledger=known,
+                                         gitlab={"project_id": child["project_id"], "iid": child["iid"]}))
+            plan["record"] = True
+        if child["linked"] is False:
+            problems.append(_problem("unlinked_child", jira_key, project_id=child["project_id"], iid=child["iid"]))
+            plan["unlink"].append(child)
+
+    for child in index.children(jira_key):
+        if (child["project_id"], child["iid"]) in claimed or child["state"] != "opened":
+            continue
+        kind = "orphan_child" if child["master_iid"] not in (None, master["iid"]) else "extra_child"
+        problems.append(_problem(kind, jira_key, project_id=child["project_id"], iid=child["iid"]))
+    return problems, plan
+
+def _latest_rows():
+    if not os.path.exists(LATEST_FILE) or os.path.getsize(LATEST_FILE) == 0:
+        return {}
+    return {row["Issue key"]: row for row in iter_csv_rows(LATEST_FILE)}
+
+
+# ------------------- ONARIM -------------------
+def repair_key(jira_key, plan):
+    """Planı uygula: eksik child'ları aç, linkleri kur, defteri GitLab'deki duruma getir.
+
+    Kurulamayan link ya da açılamayan child varsa False döner; linksiz kalan
+    child sonraki --links çalışmasında yine unlinked_child olarak bulunur.
+    """
+    ledger = get_ledger()
+    if plan.get("forget"):
+        # GitLab'de master yok: defterden çıkarılır, sonraki sync issue'yu yeniden açar
+        ledger.forget(jira_key)
+        log(f"🧹 {jira_key}: master GitLab'de yok, defterden çıkarıldı.", jira_key=jira_key)
+        return True
+    ok = True
+    master = plan["master"]
+    children = dict(plan["children"])
+    unlinked = [(child["project_id"], child["iid"]) for child in plan["unlink"]]
+    if plan["missing"]:
+        fields = sync.prepare_attachments(sync.build_issue_fields(plan["row"]))
+        milestone = sync.find_or_create_group_milestone(fields["title"])
+        for stajyer in plan["missing"]:
+            created = sync.create_child_issue(fields, stajyer, milestone, master, link=False)
+            if created:
+                children[stajyer] = created
+                unlinked.append(created)
+                plan["record"] = True
+            else:
+                ok = False
+    for project_id, iid in unlinked:
+        if sync.link_issues(int(sync.MASTER_PROJECT_ID), master["iid"], project_id, iid):
+            log(f"🔗 {jira_key}: child (project {project_id}, IID {iid}) linklendi.", jira_key=jira_key)
+        else:
+            ok = False
+            log(f"⚠️ {jira_key}: child (project {project_id}, IID {iid}) linklenemedi.", jira_key=jira_key)
+    if plan["record"]:
+        ledger.record(plan["row"], master["iid"], children, master_url=master["web_url"])
+        log(f"📒 {jira_key}: defter GitLab'deki duruma göre güncellendi.", jira_key=jira_key)
+    return ok
+
+def reconcile(repair=False, links=False, concurrency=RECONCILE_CONCURRENCY, save=True, report_path=None):
+    """GitLab index'ini kur, defter ve son Jira CSV'si ile karşılaştır; istenirse onar.
+
+    Listeleme yarıda kalırsa (GitLabAPIError) index kaydedilmez ve hiçbir şey
+    onarılmaz: eksik index'te görünmeyen master "yok" sayılıp defterden silinirdi.
+    """
+    project_ids = list(sync.TEAM_PROJECT_MAP.values()) + list(sync.STAJYER_PROJECT_MAP.values())
+    index = build_index(sync.MASTER_PROJECT_ID, project_ids, concurrency)
+    if links:
+        check_links(index, concurrency)
+    if save:
+        index.save(GITLAB_INDEX_FILE)
+        log(f"💾 Index kaydedildi: {GITLAB_INDEX_FILE}")
+
+    ledger = get_ledger()
+    latest = _latest_rows()
+    problems, plans = [], {}
+    with phase("reconcile"):
+        for jira_key in sorted(ledger.synced_keys() | set(index.entries)):
+            key_problems, plan = reconcile_key(index, jira_key, ledger.get(jira_key), latest.get(jira_key))
+            problems.extend(key_problems)
+            if plan and any(p["type"] in REPAIRABLE for p in key_problems):
+                plans[jira_key] = plan
+
+    for p in problems:
+        details = ", ".join(f"{k}={v}" for k, v in p.items() if k not in ("type", "jira_key"))
+        log(f"⚠️ {p['type']}: {p['jira_key']} {details}", jira_key=p["jira_key"], problem=p["type"])
+    counts = Counter(p["type"] for p in problems)
+    log(f"\n📋 Uzlaştırma: {len(index)} Jira key, {len(problems)} problem "
+        f"({', '.join(f'{k}={v}' for k, v in sorted(counts.items())) or 'yok'})")
+
+    if repair and plans:
+        with phase("repair"):
+            with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="repair") as pool:
+                futures = {pool.submit(repair_key, key, plan): key for key, plan in plans.items()}
+                incomplete = []
+                for future, key in futures.items():
+                    try:
+                        if not future.result():
+                            incomplete.append(key)
+                    except Exception as e:
+                        incomplete.append(key)
+                        log(f"❌ {key} onarılamadı: {e}", jira_key=key)
+        sync.metadata_cache.save()
+        log(f"🛠️ {len(plans) - len(incomplete)}/{len(plans)} Jira key onarıldı; "
+            f"silme gerektirenler (duplicate/orphan/extra) yalnızca raporlandı.")
+        if incomplete:
+            log(f"⚠️ Onarımı tamamlanamayanlar (tekrar çalıştırın): {', '.join(incomplete)}")
+
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump({"counts": counts, "problems": problems}, f, ensure_ascii=False, indent=2)
+    return problems
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="GitLab issue'larını Jira key label'ına göre indeksle; defter ve CSV ile uzlaştır.")
+    arg_parser.add_argument("--repair", action="store_true",
+                            help="Eksik child'ları aç, linkleri kur ve defteri GitLab'e göre düzelt")
+    arg_parser.add_argument("--links", action="store_true",
+                            help="Master-child linklerini de kontrol et (master başına bir istek)")
+    arg_parser.add_argument("--concurrency", type=int, default=RECONCILE_CONCURRENCY)
+    arg_parser.add_argument("--no-save", action="store_true", help="Index'i GITLAB_INDEX_FILE'a yazma")
+    arg_parser.add_argument("--report", help="Problemleri JSON olarak bu dosyaya yaz")
+    args = arg_parser.parse_args()
+
+    try:
+        found = reconcile(args.repair, args.links, args.concurrency, not args.no_save, args.report)
+    except GitLabAPIError as e:
+        log(f"❌ GitLab issue'ları eksiksiz listelenemedi; index kaydedilmedi, onarım yapılmadı: {e}")
+        sys.exit(2)
+    finally:
+        print_summary(write_reports())
+    sys.exit(1 if found and not args.repair else 0)
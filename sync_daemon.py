@@ -0,0 +1,263 @@
+import os
+import json
+import time
+import queue
+import signal
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+import http_client
+import sync_to_gitlab
+import back_sync
+from sync_ledger import get_ledger
+from compare_issues import classify_row
+from gitlab_cache import metadata_cache
+from sync_metrics import log, write_reports, LOG_FORMAT
+from jira_auto_export import issue_to_row, iter_jira_rows, commit_watermark, merge_latest_rows, JIRA_PROJECT
+
+# .env dosyasını yükle
+load_dotenv()
+
+DAEMON_HOST = os.getenv("DAEMON_HOST", "127.0.0.1")
+DAEMON_PORT = int(os.getenv("DAEMON_PORT", "8088"))
+DAEMON_POLL_INTERVAL = int(os.getenv("DAEMON_POLL_INTERVAL", "900"))  # saniye; 0 ise polling kapalı
+# 1 ise her polling turunda GitLab'deki child değişiklikleri de Jira'ya geri yazılır
+DAEMON_BACK_SYNC = os.getenv("DAEMON_BACK_SYNC", "0") == "1"
+# Jira webhook URL'sine ?secret=... olarak eklenir; boşsa kontrol edilmez
+JIRA_WEBHOOK_SECRET = os.getenv("JIRA_WEBHOOK_SECRET")
+
+WEBHOOK_EVENTS = {"jira:issue_created", "jira:issue_updated"}
+
+
+# ------------------- İŞ KUYRUĞU -------------------
+class SyncQueue:
+    """Issue key bazında tekilleştiren iş kuyruğu.
+
+    Aynı issue işlenmeyi beklerken tekrar gelirse kuyruğa yeniden girmez,
+    yalnızca bekleyen satır en yenisiyle değiştirilir.
+    """
+
+    def __init__(self):
+        self._keys = queue.Queue()
+        self._rows = {}
+        self._lock = threading.Lock()
+
+    def put(self, row):
+        key = row["Issue key"]
+        with self._lock:
+            fresh = key not in self._rows
+            self._rows[key] = row
+        if fresh:
+            self._keys.put(key)
+
+    def get(self, timeout=None):
+        key = self._keys.get(timeout=timeout)
+        with self._lock:
+            return self._rows.pop(key)
+
+    def task_done(self):
+        self._keys.task_done()
+
+    def join(self):
+        self._keys.join()
+
+    def qsize(self):
+        return self._keys.qsize()
+
+
+class SyncDaemon:
+    """Webhook ve polling'den gelen issue'ları sıcak cache'lerle sürekli işleyen servis."""
+
+    def __init__(self, concurrency=sync_to_gitlab.SYNC_CONCURRENCY, poll_interval=DAEMON_POLL_INTERVAL,
+                 create_worker=None, back_sync=DAEMON_BACK_SYNC):
+        self.concurrency = max(1, int(concurrency))
+        self.poll_interval = poll_interval
+        self.back_sync = back_sync
+        self.create_worker = create_worker or sync_to_gitlab.sync_issue
+        self.queue = SyncQueue()
+        self.stop_event = threading.Event()
+        self.counts = {"received": 0, "new": 0, "changed": 0, "unchanged": 0, "stale": 0, "failed": 0}
+        self._counts_lock = threading.Lock()
+        # GitLab'e işlenen satırlar; polling turunda LATEST_FILE'a yazılır
+        self._applied = {}
+        # Aynı issue'yu iki worker aynı anda işlemesin (key hash'ine göre sabit sayıda kilit)
+        self._key_locks = [threading.Lock() for _ in range(64)]
+        self.child_pool = ThreadPoolExecutor(max_workers=self.concurrency * 2, thread_name_prefix="child")
+
+    def _count(self, name):
+        with self._counts_lock:
+            self.counts[name] += 1
+
+    def _key_lock(self, key):
+        return self._key_locks[hash(key) % len(self._key_locks)]
+
+    def _take_applied(self):
+        with self._counts_lock:
+            rows, self._applied = list(self._applied.values()), {}
+        return rows
+
+    def submit(self, row):
+        if not row.get("Issue key"):
+            return
+        self._count("received")
+        self.queue.put(row)
+
+    def process(self, row):
+        """Tek satırı deftere göre sınıflandırıp ilgili sync fonksiyonuna ver."""
+        key = row["Issue key"]
+        with self._key_lock(key):
+            status = classify_row(row, get_ledger())
+            if status in ("unchanged", "stale"):
+                self._count(status)
+                return True
+            worker = self.create_worker if status == "new" else sync_to_gitlab.update_issue
+            self._count("new" if status == "new" else "changed")
+            result = worker(row, self.child_pool)
+            if result and result != sync_to_gitlab.SKIPPED:
+                with self._counts_lock:
+                    self._applied[key] = row
+            return result
+
+    def _worker_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                row = self.queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                if not self.process(row):
+                    self._count("failed")
+            except Exception as e:
+                self._count("failed")
+                log(f"❌ {row.get('Issue key')} işlenirken hata: {e}")
+            finally:
+                self.queue.task_done()
+
+    # ------------------- POLLING YEDEĞİ -------------------
+    def poll_once(self):
+        """Kaçırılmış webhook'lar için artımlı Jira çekimi; watermark yalnızca hatasız turda ilerler."""
+        progress = {}
+        failed_before = self.counts["failed"]
+        try:
+            for row in iter_jira_rows(incremental=True, progress=progress):
+                self.submit(row)
+        except Exception as e:
+            log(f"⚠️ Jira polling başarısız: {e}")
+            return
+        self.queue.join()
+        # Webhook'tan ve bu turdan işlenen satırlar watermark ile aynı anda LATEST_FILE'a yazılır
+        if self.counts["failed"] == failed_before:
+            commit_watermark(progress, self._take_applied())
+        else:
+            merge_latest_rows(self._take_applied())
+        if self.back_sync:
+            try:
+                back_sync.back_sync(self.concurrency)
+            except Exception as e:
+                log(f"⚠️ GitLab -> Jira geri aktarımı başarısız: {e}")
+        metadata_cache.save()
+        write_reports()
+
+    def _poll_loop(self):
+        while not self.stop_event.is_set():
+            self.poll_once()
+            self.stop_event.wait(self.poll_interval)
+
+    # ------------------- ÇALIŞTIRMA -------------------
+    def start(self):
+        for i in range(self.concurrency):
+            threading.Thread(target=self._worker_loop, name=f"issue-{i}", daemon=True).start()
+        if self.poll_interval > 0:
+            threading.Thread(target=self._poll_loop, name="poll", daemon=True).start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.child_pool.shutdown(wait=True)
+        merge_latest_rows(self._take_applied())
+        metadata_cache.save()
+
+
+# ------------------- WEBHOOK ALICI -------------------
+def make_handler(daemon):
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def _reply(self, code, body=None):
+            data = json.dumps(body or {}, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path != "/health":
+                return self._reply(404)
+            self._reply(200, {"queued": daemon.queue.qsize(), "counts": daemon.counts,
+                              "requests": http_client.get_stats()})
+
+        def do_POST(self):
+            path, _, query = self.path.partition("?")
+            if path != "/jira-webhook":
+                return self._reply(404)
+            if JIRA_WEBHOOK_SECRET and f"secret={JIRA_WEBHOOK_SECRET}" not in query.split("&"):
+                return self._reply(403)
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                event = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self._reply(400, {"error": "geçersiz JSON"})
+
+            if event.get("webhookEvent") not in WEBHOOK_EVENTS or not event.get("issue"):
+                return self._reply(202, {"ignored": event.get("webhookEvent")})
+            row = issue_to_row(event["issue"])
+            # Başka projelerin olayları (ortak webhook) atlanır
+            if row.get("Project key") and row["Project key"] != JIRA_PROJECT:
+                return self._reply(202, {"ignored": row["Project key"]})
+            daemon.submit(row)
+            self._reply(202, {"queued": row["Issue key"]})
+
+    return WebhookHandler
+
+def serve(host=DAEMON_HOST, port=DAEMON_PORT, **kwargs):
+    daemon = SyncDaemon(**kwargs)
+    daemon.start()
+    server = ThreadingHTTPServer((host, port), make_handler(daemon))
+
+    def _shutdown(signum, frame):
+        log("🛑 Durduruluyor...")
+        threading.Thread(target=server.shutdown, daemon=True).start()
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _shutdown)
+        signal.signal(signal.SIGINT, _shutdown)
+
+    log(f"👂 Jira webhook'ları dinleniyor: http://{host}:{port}/jira-webhook "
+          f"(polling: {daemon.poll_interval or 'kapalı'} sn)")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        daemon.stop()
+        write_reports()
+        if LOG_FORMAT != "json":
+            http_client.print_stats()
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Jira webhook'larını dinleyip GitLab'e sürekli aktaran servis.")
+    arg_parser.add_argument("--host", default=DAEMON_HOST)
+    arg_parser.add_argument("--port", type=int, default=DAEMON_PORT)
+    arg_parser.add_argument("--concurrency", type=int, default=sync_to_gitlab.SYNC_CONCURRENCY,
+                            help="Aynı anda işlenecek Jira issue sayısı")
+    arg_parser.add_argument("--poll-interval", type=int, default=DAEMON_POLL_INTERVAL,
+                            help="Kaçırılan olaylar için Jira'yı yoklama aralığı (sn, 0: kapalı)")
+    arg_parser.add_argument("--backend", choices=["rest", "graphql"], default=sync_to_gitlab.GITLAB_BACKEND)
+    arg_parser.add_argument("--back-sync", action="store_true", default=DAEMON_BACK_SYNC,
+                            help="Her polling turunda GitLab child değişikliklerini Jira'ya geri yaz")
+    args = arg_parser.parse_args()
+
+    serve(args.host, args.port, concurrency=args.concurrency, poll_interval=args.poll_interval,
+          back_sync=args.back_sync,
+          create_worker=sync_to_gitlab.sync_issue_graphql if args.backend == "graphql" else None)
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import threading
+
+# Dosya isimleri
+CSV_FOLDER = os.getenv("CSV_FOLDER", "csv_folder")
+JOURNAL_FILE = os.path.join(CSV_FOLDER, "sync_journal.jsonl")
+# Her kayıttan sonra diske zorla yazılsın mı (kapatılırsa çökmede son adımlar kaybolabilir)
+JOURNAL_FSYNC = os.getenv("SYNC_JOURNAL_FSYNC", "1") == "1"
+
+# Adımlar (bir Jira key'i için sırasıyla):
+#   start        -> Jira satırı (resume'da yeniden çekmeye gerek kalmasın)
+#   milestone    -> çözülen grup milestone'u
+#   master_intent / master        -> master POST'u öncesi / sonrası (iid, id, web_url)
+#   child_intent / child          -> stajyer başına child POST'u öncesi / sonrası
+#   link         -> stajyerin child'ı master ile linklendi
+#   committed    -> deftere yazıldı; key journal'dan düşer
+
+def _new_state(row):
+    return {
+        "row": row,
+        "milestone": None,
+        "master": None,
+        "master_pending": False,
+        "children": {},
+        "child_pending": set(),
+        "links": set(),
+    }
+
+def _apply(states, rec):
+    key, step = rec["key"], rec["step"]
+    if step == "start":
+        states.setdefault(key, _new_state(rec["row"]))
+        return
+    state = states.get(key)
+    if state is None:
+        return
+    if step == "milestone":
+        state["milestone"] = rec["milestone"]
+    elif step == "master_intent":
+        state["master_pending"] = True
+    elif step == "master":
+        state["master"] = rec["master"]
+        state["master_pending"] = False
+    elif step == "child_intent":
+        state["child_pending"].add(rec["stajyer"])
+    elif step == "child":
+        state["children"][rec["stajyer"]] = (rec["project_id"], rec["iid"])
+        state["child_pending"].discard(rec["stajyer"])
+    elif step == "link":
+        state["links"].add(rec["stajyer"])
+    elif step == "committed":
+        del states[key]
+
+class SyncJournal:
+    """Issue oluşturma adımlarının append-only (JSON lines) write-ahead kaydı.
+
+    Her GitLab yazımından önce niyet, sonra sonuç yazılır ve fsync edilir.
+    Çalışma yarıda kalırsa bir sonraki çalışma aynı key için yalnızca eksik
+    adımları çalıştırır; tamamlanan (deftere yazılan) key'ler açılışta atılır.
+    """
+
+    def __init__(self, path=JOURNAL_FILE):
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        self.path = path
+        self._lock = threading.Lock()
+        self._states = self._load()
+        self._compact()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _load(self):
+        states = {}
+        if not os.path.exists(self.path):
+            return states
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    # Çökme anında yarım kalmış son satır
+                    continue
+                _apply(states, rec)
+        return states
+
+    def _records(self, key, state):
+        yield {"key": key, "step": "start", "row": state["row"]}
+        if state["milestone"]:
+            yield {"key": key, "step": "milestone", "milestone": state["milestone"]}
+        if state["master_pending"]:
+            yield {"key": key, "step": "master_intent"}
+        if state["master"]:
+            yield {"key": key, "step": "master", "master": state["master"]}
+        for stajyer in state["child_pending"]:
+            yield {"key": key, "step": "child_intent", "stajyer": stajyer}
+        for stajyer, (project_id, iid) in state["children"].items():
+            yield {"key": key, "step": "child", "stajyer": stajyer, "project_id": project_id, "iid": iid}
+        for stajyer in state["links"]:
+            yield {"key": key, "step": "link", "stajyer": stajyer}
+
+    def _compact(self):
+        """Dosyayı yalnızca tamamlanmamış key'lerin adımlarıyla yeniden yaz."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for key, state in self._states.items():
+                for rec in self._records(key, state):
+                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _append(self, key, step, **data):
+        rec = {"key": key, "step": step, "ts": time.time(), **data}
+        with self._lock:
+            self._file.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            self._file.flush()
+            if JOURNAL_FSYNC:
+                os.fsync(self._file.fileno())
+            _apply(self._states, rec)
+
+    # ------------------- SORGULAR -------------------
+    def state(self, issue_key):
+        """Key'in tamamlanmamış adım durumunun kopyası (journal'da yoksa None).
+
+        Aynı key'in child'ları paralel yazdığı için canlı sözlük dışarı verilmez.
+        """
+        with self._lock:
+            state = self._states.get(issue_key)
+            if state is None:
+                return None
+            return dict(state, children=dict(state["children"]), child_pending=set(state["child_pending"]),
+                        links=set(state["links"]))
+
+    def pending_rows(self):
+        """Yarım kalmış key'lerin Jira satırları (resume için)."""
+        with self._lock:
+            return [state["row"] for state in self._states.values()]
+
+    # ------------------- ADIMLAR -------------------
+    def begin(self, row):
+        """Key için journal kaydını başlat; yarım kalmış kayıt varsa onu döndür."""
+        key = row["Issue key"]
+        state = self.state(key)
+        if state is None:
+            self._append(key, "start", row=dict(row))
+            state = self.state(key)
+        return state
+
+    def milestone(self, key, milestone):
+        self._append(key, "milestone", milestone=milestone)
+
+    def master_intent(self, key):
+        self._append(key, "master_intent")
+
+    def master(self, key, master_issue):
+        self._append(key, "master", master={
+            "id": master_issue.get("id"), "iid": master_issue["iid"], "web_url": master_issue.get("web_url", ""),
+        })
+
+    def child_intent(self, key, stajyer):
+        self._append(key, "child_intent", stajyer=stajyer)
+
+    def child(self, key, stajyer, project_id, iid):
+        self._append(key, "child", stajyer=stajyer, project_id=project_id, iid=iid)
+
+    def link(self, key, stajyer):
+        self._append(key, "link", stajyer=stajyer)
+
+    def commit(self, key):
+        self._append(key, "committed")
+
+_journal = None
+_journal_lock = threading.Lock()
+
+def get_journal(path=JOURNAL_FILE):
+    """Süreç genelinde tek bir journal örneği döndür."""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = SyncJournal(path)
+        return _journal
@@ -0,0 +1,368 @@
+import os
+import csv
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+import uuid
+from sync_metrics import log
+
+# Dosya isimleri
+CSV_FOLDER = os.getenv("CSV_FOLDER", "csv_folder")
+LEDGER_FILE = os.path.join(CSV_FOLDER, "sync_ledger.db")
+UPLOADED_FILE = os.path.join(CSV_FOLDER, "jira_uploaded.csv")
+
+# GitLab'e taşınan Jira alanları; bunlardan biri değişirse issue "değişmiş" sayılır
+SYNCED_FIELDS = [
+    "Summary", "Description", "Due Date", "Assignee", "Priority", "Labels",
+    "Original Estimate", "Time Spent", "İlgili Stajyerler",
+]
+
+def _normalize_field(name, value):
+    value = "" if value is None else str(value).strip()
+    if name in ("Original Estimate", "Time Spent") and value:
+        # pandas'ın yazdığı '3600.0' ile Jira'dan gelen '3600' aynı sayılsın
+        try:
+            value = str(int(float(value)))
+        except ValueError:
+            pass
+    if name == "İlgili Stajyerler":
+        value = ",".join(sorted(s.strip() for s in value.split(",") if s.strip()))
+    return value
+
+def _attachment_ids(value):
+    """Ek listesini sıralı id'lere indir (indirme adresi vb. değişse de aynı ekler aynı sayılır)."""
+    if not value:
+        return ""
+    try:
+        attachments = json.loads(value) if isinstance(value, str) else value
+    except ValueError:
+        return ""
+    return ",".join(sorted(str(a.get("id")) for a in attachments))
+
+def content_hash(row):
+    """Senkronize edilen alanların içerik özeti."""
+    payload = [_normalize_field(name, row.get(name)) for name in SYNCED_FIELDS]
+    attachment_ids = _attachment_ids(row.get("Attachments"))
+    if attachment_ids:
+        # Eksiz satırların özeti değişmesin diye ekler yalnızca varsa özete katılır
+        payload.append(attachment_ids)
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS synced_issues (
+    issue_key    TEXT PRIMARY KEY,
+    master_iid   INTEGER,
+    row_json     TEXT NOT NULL,
+    synced_at    REAL NOT NULL,
+    content_hash TEXT,
+    master_url   TEXT
+);
+CREATE TABLE IF NOT EXISTS synced_children (
+    issue_key   TEXT NOT NULL,
+    stajyer     TEXT NOT NULL,
+    project_id  INTEGER NOT NULL,
+    child_iid   INTEGER NOT NULL,
+    PRIMARY KEY (issue_key, stajyer)
+);
+CREATE TABLE IF NOT EXISTS backsync_cursors (
+    project_id    TEXT PRIMARY KEY,
+    updated_after TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS backsync_issues (
+    project_id        INTEGER NOT NULL,
+    iid               INTEGER NOT NULL,
+    issue_key         TEXT NOT NULL,
+    state             TEXT,
+    time_spent        INTEGER NOT NULL DEFAULT 0,
+    pushed_time_spent INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (project_id, iid)
+);
+CREATE INDEX IF NOT EXISTS backsync_issues_key ON backsync_issues (issue_key);
+CREATE TABLE IF NOT EXISTS backsync_keys (
+    issue_key       TEXT PRIMARY KEY,
+    pushed_state    TEXT,
+    dirty           INTEGER NOT NULL DEFAULT 0,
+    pending_worklog TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+class SyncLedger:
+    """GitLab'e aktarılmış Jira issue'larının SQLite kaydı.
+
+    Issue key üzerinde birincil anahtar olduğu için "aktarıldı mı?" kontrolü
+    ve tek satır ekleme dosya boyutundan bağımsızdır. Her kayıt kendi
+    transaction'ında yazılır; yarıda kalan yazma defteri bozmaz.
+    """
+
+    def __init__(self, path=LEDGER_FILE):
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Eski şemayla açılmış defterlere yeni kolonları ekle."""
+        added = {"synced_issues": ("content_hash", "master_url"), "backsync_keys": ("pending_worklog",)}
+        with self._conn:
+            for table, names in added.items():
+                columns = {r[1] for r in self._conn.execute(f"PRAGMA table_info({table})")}
+                for name in names:
+                    if name not in columns:
+                        self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} TEXT")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ------------------- SORGULAR -------------------
+    def is_synced(self, issue_key):
+        with self._lock:
+            cur = self._conn.execute("SELECT 1 FROM synced_issues WHERE issue_key = ?", (issue_key,))
+            return cur.fetchone() is not None
+
+    def synced_keys(self):
+        with self._lock:
+            return {k for (k,) in self._conn.execute("SELECT issue_key FROM synced_issues")}
+
+    def get(self, issue_key):
+        """Kayıtlı issue'yu master IID, Jira satırı ve child'larıyla döndür (yoksa None)."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT master_iid, row_json, synced_at, content_hash, master_url "
+                "FROM synced_issues WHERE issue_key = ?", (issue_key,))
+            found = cur.fetchone()
+            if found is None:
+                return None
+            children = {
+                stajyer: {"project_id": pid, "iid": iid}
+                for stajyer, pid, iid in self._conn.execute(
+                    "SELECT stajyer, project_id, child_iid FROM synced_children WHERE issue_key = ?", (issue_key,))
+            }
+        master_iid, row_json, synced_at, row_hash, master_url = found
+        row = json.loads(row_json)
+        return {
+            "issue_key": issue_key,
+            "master_iid": master_iid,
+            "master_url": master_url,
+            "row": row,
+            "children": children,
+            "synced_at": synced_at,
+            "content_hash": row_hash or content_hash(row),
+        }
+
+    def get_hash(self, issue_key):
+        """Kayıtlı içerik özeti (issue defterde yoksa None)."""
+        with self._lock:
+            found = self._conn.execute(
+                "SELECT content_hash, row_json FROM synced_issues WHERE issue_key = ?", (issue_key,)).fetchone()
+        if found is None:
+            return None
+        return found[0] or content_hash(json.loads(found[1]))
+
+    def get_hashes(self, issue_keys):
+        """Verilen key'lerin kayıtlı içerik özetleri (tek sorguda); defterde olmayanlar dönmez."""
+        issue_keys = list(issue_keys)
+        if not issue_keys:
+            return {}
+        placeholders = ",".join("?" * len(issue_keys))
+        with self._lock:
+            found = self._conn.execute(
+                f"SELECT issue_key, content_hash, row_json FROM synced_issues WHERE issue_key IN ({placeholders})",
+                issue_keys).fetchall()
+        # Eski kayıtlarda özet yoksa (nadir) satırdan hesaplanır
+        return {key: row_hash or content_hash(json.loads(row_json)) for key, row_hash, row_json in found}
+
+    # ------------------- YAZMA -------------------
+    def record(self, row, master_iid=None, children=None, master_url=None):
+        """Issue'yu (ve child IID'lerini) tek transaction'da kaydet.
+
+        children: {stajyer: (project_id, child_iid)}; verilirse issue'nun
+        önceki child kayıtlarının yerine geçer.
+        """
+        issue_key = row["Issue key"]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO synced_issues "
+                "(issue_key, master_iid, row_json, synced_at, content_hash, master_url) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (issue_key, master_iid, json.dumps(dict(row), ensure_ascii=False), time.time(),
+                 content_hash(row), master_url),
+            )
+            if children is not None:
+                self._conn.execute("DELETE FROM synced_children WHERE issue_key = ?", (issue_key,))
+            for stajyer, (project_id, child_iid) in (children or {}).items():
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO synced_children (issue_key, stajyer, project_id, child_iid) "
+                    "VALUES (?, ?, ?, ?)",
+                    (issue_key, stajyer, project_id, child_iid),
+                )
+
+    def forget(self, issue_key):
+        """Kaydı (ve child'larını) sil; issue sonraki çalışmada yeni sayılır."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM synced_children WHERE issue_key = ?", (issue_key,))
+            self._conn.execute("DELETE FROM synced_issues WHERE issue_key = ?", (issue_key,))
+
+    # ------------------- GITLAB -> JIRA GERİ AKTARIM -------------------
+    def get_cursor(self, project_id):
+        with self._lock:
+            found = self._conn.execute(
+                "SELECT updated_after FROM backsync_cursors WHERE project_id = ?", (str(project_id),)).fetchone()
+        return found[0] if found else None
+
+    def set_cursor(self, project_id, updated_after):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO backsync_cursors (project_id, updated_after) VALUES (?, ?)",
+                               (str(project_id), updated_after))
+
+    def child_keys(self, project_id):
+        """Projede defterin açtığı child'lar: {child IID: Jira key}."""
+        with self._lock:
+            return {iid: key for iid, key in self._conn.execute(
+                "SELECT child_iid, issue_key FROM synced_children WHERE project_id = ?", (int(project_id),))}
+
+    def seed_child(self, project_id, iid, issue_key, time_spent):
+        """Sync'in yeni açtığı child'ın açılıştaki GitLab süresini başlangıç olarak kaydet.
+
+        Açılış ile ilk geri aktarım turu arasında kaydedilen süre de böylece Jira'ya gider.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO backsync_issues (project_id, iid, issue_key, state, time_spent, pushed_time_spent) "
+                "VALUES (?, ?, ?, 'opened', ?, ?)", (int(project_id), iid, issue_key, time_spent, time_spent))
+
+    def observe_children(self, records):
+        """GitLab'de değişen child'ları (project_id, iid, issue_key, state, time_spent) kaydet.
+
+        Başlangıç süresi child açılırken seed_child ile yazılır; başlangıcı olmayan
+        (bu özellikten önce ya da sync dışında açılmış) child'ın ilk görülen süresi
+        başlangıç kabul edilir (Jira'ya gönderilmez).
+        Durumu ya da süresi değişen child'ların Jira key'leri 'dirty' işaretlenir.
+        """
+        dirty = set()
+        with self._lock, self._conn:
+            for project_id, iid, issue_key, state, time_spent in records:
+                old = self._conn.execute(
+                    "SELECT state, time_spent FROM backsync_issues WHERE project_id = ? AND iid = ?",
+                    (project_id, iid)).fetchone()
+                if old == (state, time_spent):
+                    continue
+                if old is None:
+                    self._conn.execute(
+                        "INSERT INTO backsync_issues (project_id, iid, issue_key, state, time_spent, pushed_time_spent) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", (project_id, iid, issue_key, state, time_spent, time_spent))
+                else:
+                    self._conn.execute(
+                        "UPDATE backsync_issues SET issue_key = ?, state = ?, time_spent = ? "
+                        "WHERE project_id = ? AND iid = ?", (issue_key, state, time_spent, project_id, iid))
+                dirty.add(issue_key)
+            for issue_key in dirty:
+                self._conn.execute(
+                    "INSERT INTO backsync_keys (issue_key, dirty) VALUES (?, 1) "
+                    "ON CONFLICT(issue_key) DO UPDATE SET dirty = 1", (issue_key,))
+        return dirty
+
+    def dirty_keys(self):
+        """Jira'ya gönderilecek değişikliği olan key'ler (yalnızca bu defterin aktardıkları)."""
+        with self._lock:
+            return [k for (k,) in self._conn.execute(
+                "SELECT k.issue_key FROM backsync_keys k JOIN synced_issues s ON s.issue_key = k.issue_key "
+                "WHERE k.dirty = 1")]
+
+    def backsync_summary(self, issue_key):
+        """Key'in child'larının toplu durumu ve Jira'ya en son gönderilen durum."""
+        with self._lock:
+            children, closed = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(state = 'closed'), 0) FROM backsync_issues WHERE issue_key = ?",
+                (issue_key,)).fetchone()
+            found = self._conn.execute(
+                "SELECT pushed_state FROM backsync_keys WHERE issue_key = ?", (issue_key,)).fetchone()
+        return {"children": children, "closed": closed, "pushed_state": found[0] if found else None}
+
+    def claim_worklog(self, issue_key, min_seconds):
+        """Jira'ya gönderilecek worklog'u (token, saniye, yeni mi) döndür; yoksa None.
+
+        Süre worklog POST'undan önce, aynı transaction'da 'gönderildi' sayılır ve
+        token'lı bekleyen worklog olarak saklanır. POST'un sonucu bilinmiyorsa
+        sonraki tur aynı token'ı Jira'da arar; aynı süre iki kez yazılmaz.
+        """
+        with self._lock, self._conn:
+            found = self._conn.execute(
+                "SELECT pending_worklog FROM backsync_keys WHERE issue_key = ?", (issue_key,)).fetchone()
+            if found and found[0]:
+                pending = json.loads(found[0])
+                return pending["token"], pending["seconds"], False
+            (seconds,) = self._conn.execute(
+                "SELECT COALESCE(SUM(time_spent - pushed_time_spent), 0) FROM backsync_issues WHERE issue_key = ?",
+                (issue_key,)).fetchone()
+            if 0 <= seconds < min_seconds:
+                return None
+            self._conn.execute("UPDATE backsync_issues SET pushed_time_spent = time_spent WHERE issue_key = ?",
+                               (issue_key,))
+            if seconds < 0:
+                # GitLab'de süre silinmiş: Jira'dan düşülmez, yalnızca başlangıç güncellenir
+                return None
+            token = uuid.uuid4().hex[:12]
+            self._conn.execute("UPDATE backsync_keys SET pending_worklog = ? WHERE issue_key = ?",
+                               (json.dumps({"token": token, "seconds": seconds}), issue_key))
+            return token, seconds, True
+
+    def finish_worklog(self, issue_key):
+        """Bekleyen worklog Jira'ya yazıldı."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE backsync_keys SET pending_worklog = NULL WHERE issue_key = ?", (issue_key,))
+
+    def mark_backsynced(self, issue_key, state=None):
+        """Gönderilen durumu işaretle; key artık 'dirty' değil."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE backsync_keys SET dirty = 0, pushed_state = COALESCE(?, pushed_state) WHERE issue_key = ?",
+                (state, issue_key))
+
+    # ------------------- CSV'DEN TEK SEFERLİK AKTARIM -------------------
+    def import_csv(self, csv_path=UPLOADED_FILE):
+        """Eski jira_uploaded.csv kayıtlarını deftere bir kez aktar."""
+        with self._lock:
+            done = self._conn.execute("SELECT value FROM meta WHERE name = 'csv_imported'").fetchone()
+        if done or not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
+            return 0
+
+        count = 0
+        with open(csv_path, encoding="utf-8-sig", newline="") as f, self._lock, self._conn:
+            # Satır satır aktarılır; CSV'nin tamamı belleğe alınmaz
+            for r in csv.DictReader(f):
+                if not r.get("Issue key"):
+                    continue
+                # CSV'de GitLab IID'leri yok; master_iid boş kalır
+                cur = self._conn.execute(
+                    "INSERT OR IGNORE INTO synced_issues (issue_key, master_iid, row_json, synced_at, content_hash) "
+                    "VALUES (?, NULL, ?, ?, ?)",
+                    (r["Issue key"], json.dumps(r, ensure_ascii=False), time.time(), content_hash(r)),
+                )
+                count += cur.rowcount
+            self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('csv_imported', ?)", (csv_path,))
+        log(f"📥 '{csv_path}' dosyasından {count} kayıt deftere aktarıldı.")
+        return count
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+def get_ledger(path=LEDGER_FILE):
+    """Süreç genelinde tek bir defter örneği döndür (ilk açılışta CSV'yi içe aktarır)."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = SyncLedger(path)
+            _ledger.import_csv()
+        return _ledger
@@ -0,0 +1,179 @@
+import os
+import sys
+import json
+import time
+import threading
+import contextlib
+from datetime import datetime, timezone
+import http_client
+
+# "text": mevcut emoji'li satırlar, "json": satır başına bir JSON kaydı
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+METRIC_PREFIX = "jira_gitlab_sync"
+
+# Rapor yolları yazım anında okunur: shard süreçleri bu modülü CSV_FOLDER'ı ayarlamadan önce import eder.
+# METRICS_JSON_FILE / METRICS_PROM_FILE (örn. node_exporter textfile dizini) verilmezse CSV_FOLDER altına yazılır.
+def metrics_json_file():
+    return os.getenv("METRICS_JSON_FILE", os.path.join(os.getenv("CSV_FOLDER", "csv_folder"), "sync_metrics.json"))
+
+def metrics_prom_file():
+    return os.getenv("METRICS_PROM_FILE", os.path.join(os.getenv("CSV_FOLDER", "csv_folder"), "sync_metrics.prom"))
+
+
+# ------------------- YAPILANDIRILMIŞ LOG -------------------
+_LEVEL_PREFIXES = (("❌", "error"), ("⚠️", "warning"))
+_print_lock = threading.Lock()
+
+def log(message, level=None, **fields):
+    """print yerine: metin modunda mesajı aynen yazar, json modunda alanlarıyla tek satır JSON yazar.
+
+    level verilmezse mesajın başındaki emoji'den çıkarılır (❌ error, ⚠️ warning).
+    """
+    if LOG_FORMAT != "json":
+        print(message)
+        return
+    text = message.strip()
+    if level is None:
+        level = next((lvl for prefix, lvl in _LEVEL_PREFIXES if text.startswith(prefix)), "info")
+    record = {"ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"), "level": level,
+              "msg": text, "thread": threading.current_thread().name, **fields}
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _print_lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+
+# ------------------- AŞAMA SÜRELERİ VE SAYAÇLAR -------------------
+class Metrics:
+    """Aşama (fetch, compare, milestone, master, child, link, ...) süreleri ve sayaçlar.
+
+    Aşamalar thread'ler arasında paralel çalışabildiği için toplam süre
+    duvar saatinden uzun olabilir; 'ne kadar zaman nereye gitti' sorusunu yanıtlar.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.phases = {}
+        self.counters = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                p = self.phases.setdefault(name, {"count": 0, "seconds": 0.0, "max_seconds": 0.0})
+                p["count"] += 1
+                p["seconds"] += elapsed
+                p["max_seconds"] = max(p["max_seconds"], elapsed)
+
+    def count(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def summary(self):
+        with self._lock:
+            phases = {k: dict(v, seconds=round(v["seconds"], 4), max_seconds=round(v["max_seconds"], 4))
+                      for k, v in self.phases.items()}
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self.counters.items())]
+        endpoints = http_client.get_stats()
+        totals = {field: sum(s[field] for s in endpoints.values())
+                  for field in ("requests", "retries", "errors", "bytes_in", "bytes_out")}
+        return {
+            "started_at": datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec="seconds"),
+            "duration_seconds": round(time.time() - self.started, 3),
+            "phases": phases,
+            "counters": counters,
+            "http": {"totals": totals, "endpoints": endpoints},
+        }
+
+metrics = Metrics()
+phase = metrics.phase
+count = metrics.count
+
+
+# ------------------- ÇIKTILAR -------------------
+def _atomic_write(path, text):
+    folder = os.path.dirname(path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    # Aynı dosyaya yazan süreçler birbirinin geçici dosyasını ezmesin
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_label_value(v)}"' for k, v in labels.items()) + "}"
+
+def to_prometheus(summary):
+    """Özeti Prometheus text exposition biçimine çevir (textfile collector için)."""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{METRIC_PREFIX}_{name}{_labels(labels)} {value}")
+
+    metric("run_duration_seconds", "gauge", "Son çalışmanın süresi.", [({}, summary["duration_seconds"])])
+    metric("last_run_timestamp_seconds", "gauge", "Son çalışmanın bitiş zamanı.", [({}, round(time.time(), 3))])
+    phases = summary["phases"]
+    metric("phase_seconds_total", "counter", "Aşamada geçen toplam süre.",
+           [({"phase": k}, v["seconds"]) for k, v in sorted(phases.items())])
+    metric("phase_runs_total", "counter", "Aşamanın çalışma sayısı.",
+           [({"phase": k}, v["count"]) for k, v in sorted(phases.items())])
+    metric("phase_max_seconds", "gauge", "Aşamanın en uzun tek çalışması.",
+           [({"phase": k}, v["max_seconds"]) for k, v in sorted(phases.items())])
+
+    by_name = {}
+    for c in summary["counters"]:
+        by_name.setdefault(c["name"], []).append((c["labels"], c["value"]))
+    for name, samples in sorted(by_name.items()):
+        metric(f"{name}_total", "counter", f"{name} sayacı.", samples)
+
+    endpoints = sorted(summary["http"]["endpoints"].items())
+    for field, help_text in (("requests", "Gönderilen HTTP istekleri."), ("retries", "Yeniden denemeler."),
+                             ("errors", "Hata ile sonuçlanan istekler."), ("seconds", "İsteklerde geçen süre."),
+                             ("bytes_in", "Alınan cevap baytları."), ("bytes_out", "Gönderilen gövde baytları.")):
+        metric(f"http_{field}_total", "counter", help_text,
+               [({"endpoint": e}, round(s[field], 4)) for e, s in endpoints])
+    return "\n".join(lines) + "\n"
+
+def write_reports(json_path=None, prom_path=None):
+    """Çalışma özetini JSON ve Prometheus textfile olarak yaz; özeti döndür.
+
+    Yol verilmezse metrics_json_file() / metrics_prom_file() çağrı anında kullanılır.
+    """
+    json_path = metrics_json_file() if json_path is None else json_path
+    prom_path = metrics_prom_file() if prom_path is None else prom_path
+    summary = metrics.summary()
+    if json_path:
+        _atomic_write(json_path, json.dumps(summary, ensure_ascii=False, indent=2))
+    if prom_path:
+        _atomic_write(prom_path, to_prometheus(summary))
+    return summary
+
+def print_summary(summary=None):
+    summary = summary or metrics.summary()
+    totals = summary["http"]["totals"]
+    log(f"\n⏱️ Çalışma özeti: {summary['duration_seconds']:.1f} sn, {totals['requests']} istek, "
+        f"{totals['retries']} tekrar, {totals['errors']} hata, {totals['bytes_in'] / 1024:.0f} KB alındı",
+        event="summary", duration_seconds=summary["duration_seconds"], **totals)
+    for name, p in sorted(summary["phases"].items(), key=lambda kv: -kv[1]["seconds"]):
+        log(f"  {name}: {p['seconds']:.2f} sn / {p['count']} kez (en uzun {p['max_seconds']:.2f} sn)",
+            event="phase", phase=name, **p)
+    if LOG_FORMAT == "json":
+        # Metin modunda aynı bilgiyi http_client.print_stats() yazar
+        for endpoint, s in sorted(summary["http"]["endpoints"].items()):
+            log(f"{endpoint}: {s['requests']} istek", event="endpoint", endpoint=endpoint, **s)
@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from urllib.parse import urlparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dotenv import load_dotenv
+import http_client
+from sync_metrics import log
+
+# .env dosyasını yükle
+load_dotenv()
+
+SHARD_CONFIG = os.getenv("SHARD_CONFIG", "shards.json")
+SHARD_PROCESSES = int(os.getenv("SHARD_PROCESSES", "4"))  # Aynı anda çalışacak shard sayısı
+
+# Örnek shards.json:
+# {
+#   "rate_limits": {"gitlab.com": 10, "jira.example.com": 20},
+#   "shards": [
+#     {"name": "GYT", "jql": "project = GYT AND created >= -7d",
+#      "master_project_id": 123, "group_id": 45,
+#      "team_project_map": {"GYT Simülasyon": 678},
+#      "stajyer_project_map": {"burak.kiraz": "GYT Simülasyon"},
+#      "state_dir": "csv_folder/GYT"}
+#   ]
+# }
+
+# Shard alanı -> sync_to_gitlab'in okuduğu ortam değişkeni
+_SHARD_ENV = {
+    "jira_project": "JIRA_PROJECT",
+    "jql": "JIRA_JQL",
+    "incremental_jql": "JIRA_INCREMENTAL_JQL",
+    "master_project_id": "MASTER_PROJECT_ID",
+    "group_id": "GROUP_ID",
+    "team_project_map": "TEAM_PROJECT_MAP",
+    "stajyer_project_map": "STAJYER_PROJECT_MAP",
+    "assignee_map": "ASSIGNEE_MAP",
+    "state_dir": "CSV_FOLDER",
+}
+
+def load_config(path=SHARD_CONFIG):
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    for shard in config.get("shards", []):
+        if not shard.get("name") or not shard.get("master_project_id"):
+            raise ValueError(f"Shard tanımında 'name' ve 'master_project_id' zorunlu: {shard}")
+        shard.setdefault("jira_project", shard["name"])
+        shard.setdefault("state_dir", os.path.join("csv_folder", shard["name"]))
+    return config
+
+def shard_env(shard):
+    """Shard ayarlarını ortam değişkenlerine çevir (dict/list'ler JSON olarak)."""
+    env = {}
+    for field, name in _SHARD_ENV.items():
+        value = shard.get(field)
+        if value is None:
+            continue
+        env[name] = json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else str(value)
+    env.update({k: str(v) for k, v in shard.get("env", {}).items()})
+    return env
+
+# ------------------- SHARD SÜRECİ -------------------
+def _init_shard_process(shared_buckets):
+    # Tüm shard'lar aynı host bütçesinden düşer
+    http_client.set_shared_buckets(shared_buckets)
+
+def run_shard(shard, options):
+    """Tek shard'ı kendi sürecinde ve kendi durum klasöründe çalıştır.
+
+    Modüller ayarlarını import anında ortamdan okuduğu için sync_to_gitlab
+    ortam değişkenleri ayarlandıktan sonra import edilir (her shard yeni süreç).
+    """
+    os.environ.update(shard_env(shard))
+    state_dir = os.environ["CSV_FOLDER"]
+    os.makedirs(state_dir, exist_ok=True)
+
+    started = time.monotonic()
+    log_path = os.path.join(state_dir, "sync.log")
+    # Shard'ların çıktıları birbirine karışmasın diye her shard kendi log dosyasına yazar
+    with open(log_path, "a", encoding="utf-8") as log_file:
+        sys.stdout = sys.stderr = log_file
+        try:
+            import sync_to_gitlab
+            counts = sync_to_gitlab.sync(**options)
+        finally:
+            sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+    return {
+        "counts": counts,
+        "seconds": round(time.monotonic() - started, 1),
+        "requests": sum(s["requests"] for s in http_client.get_stats().values()),
+        "log": log_path,
+    }
+
+# ------------------- ANA SÜREÇ -------------------
+def build_shared_buckets(config, ctx):
+    """Config'teki host -> saniyedeki istek bütçelerini süreçler arası bucket'lara çevir."""
+    limits = dict(config.get("rate_limits") or {})
+    if not limits:
+        # Varsayılan: GitLab için tek süreçteki hız sınırı, tüm shard'lara bölünür
+        limits = {urlparse(os.getenv("GITLAB_API_URL") or "https://gitlab.com").netloc: http_client.HTTP_RATE_LIMIT}
+        jira_host = urlparse(os.getenv("JIRA_URL") or "").netloc
+        if jira_host:
+            limits[jira_host] = http_client.HTTP_RATE_LIMIT
+    return {host: http_client.SharedTokenBucket(rate, ctx=ctx) for host, rate in limits.items()}
+
+def run_shards(config, options, processes=SHARD_PROCESSES, only=None):
+    shards = [s for s in config.get("shards", []) if not only or s["name"] in only]
+    if not shards:
+        log("⚠️ Çalıştırılacak shard yok.")
+        return {}
+    # spawn: her shard ayarlarını temiz bir yorumlayıcıda, import'tan önce alır
+    ctx = multiprocessing.get_context("spawn")
+    shared_buckets = build_shared_buckets(config, ctx)
+    log(f"🧩 {len(shards)} shard, {min(processes, len(shards))} süreç; ortak bütçe: "
+        f"{', '.join(f'{h}={b.rate}/sn' for h, b in shared_buckets.items())}")
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=max(1, min(processes, len(shards))), mp_context=ctx,
+                             initializer=_init_shard_process, initargs=(shared_buckets,),
+                             max_tasks_per_child=1) as pool:
+        futures = {pool.submit(run_shard, shard, options): shard["name"] for shard in shards}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+                r = results[name]
+                log(f"✅ {name}: {r['counts']} ({r['seconds']} sn, {r['requests']} istek) -> {r['log']}", shard=name)
+            except Exception as e:
+                results[name] = {"error": str(e)}
+                log(f"❌ {name} shard'ı başarısız: {e}", shard=name)
+    return results
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Birden fazla Jira projesini shard'lar halinde GitLab'e aktar.")
+    arg_parser.add_argument("--config", default=SHARD_CONFIG, help="Shard tanımları (varsayılan: SHARD_CONFIG)")
+    arg_parser.add_argument("--processes", type=int, default=SHARD_PROCESSES,
+                            help="Aynı anda çalışacak shard sayısı (varsayılan: SHARD_PROCESSES)")
+    arg_parser.add_argument("--only", nargs="+", help="Yalnızca bu isimdeki shard'ları çalıştır")
+    arg_parser.add_argument("--concurrency", type=int, default=int(os.getenv("SYNC_CONCURRENCY", "4")),
+                            help="Shard başına aynı anda işlenecek issue sayısı")
+    arg_parser.add_argument("--backend", choices=["rest", "graphql"], default=os.getenv("GITLAB_BACKEND", "rest"))
+    arg_parser.add_argument("--incremental", action="store_true", default=None)
+    arg_parser.add_argument("--pipeline", action="store_true")
+    arg_parser.add_argument("--resume", action="store_true")
+    arg_parser.add_argument("--back-sync", action="store_true")
+    args = arg_parser.parse_args()
+
+    options = {
+        "concurrency": args.concurrency,
+        "backend": args.backend,
+        "incremental": args.incremental,
+        "pipeline": args.pipeline,
+        "resume": args.resume,
+        "back_sync": args.back_sync,
+    }
+    results = run_shards(load_config(args.config), options, args.processes, args.only)
+    sys.exit(1 if any("error" in r for r in results.values()) else 0)
@@ -1,21 +1,28 @@
 import csv
-import requests
-import pandas as pd
+import http_client
 import os
-from dateutil import parser
 from dotenv import load_dotenv
-from jira_auto_export import fetch_jira_csv
-from compare_issues import compare_issues
+from jira_auto_export import fetch_jira_csv, iter_jira_rows, commit_watermark, merge_latest_rows, CSV_COLUMNS, JIRA_PAGE_SIZE
+from sync_ledger import get_ledger
+from sync_journal import get_journal
+from gitlab_cache import MilestoneIndex, metadata_cache, get_project_name, get_project_path, get_gitlab_user_id
+from gitlab_api import GITLAB_API_URL, HEADERS
+from gitlab_index import get_issue_index
+import gitlab_graphql
+from jira_attachments import parse_attachments, mirror_attachments, attachment_section
+from compare_issues import compare_issues, classify_rows, iter_csv_rows, TO_UPDATE_FILE
+from sync_metrics import log, phase, count, write_reports, print_summary, LOG_FORMAT
 import sys
 import json
-from urllib.parse import quote
-from requests.auth import HTTPBasicAuth
+import argparse
+from datetime import date
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # .env dosyasını yükle
 load_dotenv()
 
 # --- .ENV DEĞİŞKENLERİ ---
-GITLAB_TOKEN = os.getenv("GITLAB_TOKEN")
 MASTER_PROJECT_ID = os.getenv("MASTER_PROJECT_ID")
 TEAM_PROJECT_MAP = json.loads(os.getenv("TEAM_PROJECT_MAP", "{}"))
 GROUP_ID = os.getenv("GROUP_ID")  # Yeni: milestone'lar burada açılacak
@@ -24,61 +31,52 @@ JIRA_EMAIL = os.getenv("JIRA_EMAIL")  # Jira kullanıcı adı
 JIRA_API_TOKEN = os.getenv("JIRA_API_TOKEN")  # Şifre veya API token
 JQL = "project = GYT AND created >= -2d"
 CSV_FILE = "jira_export_all.csv"
+SYNC_CONCURRENCY = int(os.getenv("SYNC_CONCURRENCY", "4"))  # Aynı anda işlenecek issue sayısı
+GITLAB_BACKEND = os.getenv("GITLAB_BACKEND", "rest")  # "rest" ya da "graphql"
 
 
-HEADERS = {
-    "PRIVATE-TOKEN": GITLAB_TOKEN,
-    "Content-Type": "application/json"
-}
-
-# --- Jira'da Assignee yapılan birini Gitlab'de de atamak için
+# --- Jira'da Assignee yapılan birini Gitlab'de de atamak için.
+# Buradaki (ve .env'deki ASSIGNEE_MAP) eşleşmeler önceliklidir; olmayanlar GitLab'de kullanıcı adıyla aranır.
 ASSIGNEE_MAP = {
     "merve.yucetas": 31250282,
     "affan.bugra.ozaytas": 31073378,
     "burak.kiraz": 31073379,
 }
+ASSIGNEE_MAP.update(json.loads(os.getenv("ASSIGNEE_MAP", "{}")))
 
 # --- İlgili takımları projeler ile eşleştirmek için. Şimdilik ilgili stajyereler paremetresi kullanılıyor.
+# .env'de STAJYER_PROJECT_MAP ile genişletilebilir: {"kullanici.adi": "Takım adı" veya proje ID}
 STAJYER_PROJECT_MAP = {
     "affan.bugra.ozaytas": TEAM_PROJECT_MAP.get("GYT Test ve Otomasyon"),
     "merve.yucetas": TEAM_PROJECT_MAP.get("GYT Proje Yönetimi"),
     "burak.kiraz": TEAM_PROJECT_MAP.get("GYT Simülasyon")
 }
+for _stajyer, _team in json.loads(os.getenv("STAJYER_PROJECT_MAP", "{}")).items():
+    STAJYER_PROJECT_MAP[_stajyer] = TEAM_PROJECT_MAP.get(_team, _team)
 
 # ------------------- CSV DOSYA İSİMLERİ -------------------
 
-CSV_FOLDER = "csv_folder"
+CSV_FOLDER = os.getenv("CSV_FOLDER", "csv_folder")  # Shard başına ayrı durum klasörü
 TO_ADD_FILE = os.path.join(CSV_FOLDER, "jira_to_add.csv")
-UPLOADED_FILE = os.path.join(CSV_FOLDER, "jira_uploaded.csv")
 LATEST_FILE = os.path.join(CSV_FOLDER, "jira_latest.csv")
+SNAPSHOT_FILE = os.path.join(CSV_FOLDER, "jira_pipeline_snapshot.csv")
+
+# Paralel çalışmada paylaşılan kaynaklar için kilitler
+_milestone_lock = threading.Lock()
+_milestone_index = None
 
 
   
 # ------------------- ROBUST CSV OKUYUCU -------------------
 def read_jira_csv_robustly(filename):
-    issues = []
+    # Satırlar dict yerine kompakt JiraRow (__slots__) olarak tutulur
     try:
-        with open(filename, encoding="utf-8-sig") as f:
-            reader = csv.reader(f)
-            header = [h.strip() for h in next(reader)]
-            stajyer_indices = [i for i, col_name in enumerate(header) if "İlgili Stajyerler" in col_name]
-
-            for row_data in reader:
-                issue = {}
-                stajyer_list_raw = []
-                for idx in stajyer_indices:
-                    if idx < len(row_data):
-                        val = row_data[idx].strip()
-                        if val:
-                            stajyer_list_raw.extend([s.strip() for s in val.split(",") if s.strip()])
-                for h, v in zip(header, row_data):
-                    issue[h.strip()] = v.strip()
-                issues.append(issue)
+        issues = list(iter_csv_rows(filename))
     except FileNotFoundError:
-        print(f"❌ Hata: '{filename}' dosyası bulunamadı.")
+        log(f"❌ Hata: '{filename}' dosyası bulunamadı.")
         sys.exit(1)
     except Exception as e:
-        print(f"❌ Hata: CSV okunamadı. Hata: {e}")
+        log(f"❌ Hata: CSV okunamadı. Hata: {e}")
         sys.exit(1)
     return issues
 
@@ -86,7 +84,13 @@ def read_jira_csv_robustly(filename):
 def parse_date(date_str):
     if not date_str:
         return None
+    # Jira tarihleri çoğunlukla ISO (YYYY-MM-DD); dateutil yalnızca gerekirse yüklenir
+    try:
+        return date.fromisoformat(date_str[:10]).strftime("%Y-%m-%d")
+    except ValueError:
+        pass
     try:
+        from dateutil import parser
         return parser.parse(date_str).strftime("%Y-%m-%d")
     except Exception:
         return None
@@ -109,190 +113,766 @@ def seconds_to_gitlab_duration(seconds):
         parts.append(f"{minutes}m")
     return " ".join(parts) if parts else "0m"
 
+def resolve_assignee_id(username):
+    if not username:
+        return None
+    if username in ASSIGNEE_MAP:
+        return ASSIGNEE_MAP[username]
+    return get_gitlab_user_id(username)
+
 def link_issues(parent_project_id, parent_iid, target_project_id, target_iid):
-    url = f"https://gitlab.com/api/v4/projects/{parent_project_id}/issues/{parent_iid}/links"
+    url = f"{GITLAB_API_URL}/projects/{parent_project_id}/issues/{parent_iid}/links"
     data = {
         "target_project_id": target_project_id,
         "target_issue_iid": target_iid,
         "link_type": "relates_to"
     }
-    r = requests.post(url, headers=HEADERS, json=data)
+    with phase("link"):
+        r = http_client.post(url, headers=HEADERS, json=data)
     if r.status_code not in (200, 201, 409):
-        print(f"⚠️ Link hatası ({r.status_code}): {r.text}")
+        log(f"⚠️ Link hatası ({r.status_code}): {r.text}")
+        return False
+    return True
 
-def find_or_create_group_milestone(title):
-    url = f"https://gitlab.com/api/v4/groups/{GROUP_ID}/milestones"
-    
-    # Var mı kontrol et
-    r = requests.get(url, headers=HEADERS)
-    if r.status_code == 200:
-        for m in r.json():
-            if m["title"].strip().lower() == title.strip().lower():
-                return m
-
-    # Yoksa oluştur
-    payload = {"title": title}
-    r = requests.post(url, headers=HEADERS, json=payload)
-    if r.status_code == 201:
-        print(f"✨ Issue Milestone'u oluşturuldu: {row.get('Summary')}")
-        return r.json()
-    else:
-        print(f"⚠️ Group Milestone oluşturulamadı: {r.status_code} {r.text}")
+def _match_issue(issues, title, assignee_id, exclude_iids):
+    for issue in issues:
+        if issue["title"] != title or issue["iid"] in exclude_iids:
+            continue
+        assignee_ids = issue.get("assignee_ids") or [a["id"] for a in issue.get("assignees", [])]
+        if assignee_id and assignee_id not in assignee_ids:
+            continue
+        return issue
+    return None
+
+def find_existing_issue(project_id, jira_key, title, assignee_id=None, exclude_iids=(), use_api=True):
+    """Journal'da niyeti olup sonucu yazılamamış issue'yu bul (Jira key label'ı + başlık).
+
+    Önce reconcile'ın kurduğu GitLab index'ine bakılır; orada yoksa ve use_api
+    ise GitLab'de label ile aranır.
+    """
+    index = get_issue_index(MASTER_PROJECT_ID)
+    if index is not None:
+        found = _match_issue(index.issues(jira_key, project_id), title, assignee_id, exclude_iids)
+        if found:
+            return found
+    if not use_api:
+        return None
+    url = f"{GITLAB_API_URL}/projects/{project_id}/issues"
+    r = http_client.get(url, headers=HEADERS, params={"labels": jira_key, "state": "all", "per_page": 100})
+    if r.status_code != 200:
+        log(f"⚠️ Yarım kalan issue aranamadı (project {project_id}, {jira_key}): {r.status_code}", jira_key=jira_key)
         return None
-# ------------------- Stajyer alanlarını test etmek için -------------------
-# --- JIRA TEST REQUEST (hata yutmalı) ---
-try:
-    test_url = f"{JIRA_URL}/rest/api/2/issue/GYT-126"
-    test_response = requests.get(
-        test_url,
-        headers={"Authorization": f"Bearer {JIRA_API_TOKEN}"}
+    return _match_issue(r.json(), title, assignee_id, exclude_iids)
+
+def find_or_create_group_milestone(title):
+    # Grup milestone'ları çalışma başına bir kez (tüm sayfalar) okunur, sonra index'ten bakılır
+    global _milestone_index
+    with _milestone_lock:
+        if _milestone_index is None:
+            _milestone_index = MilestoneIndex(GROUP_ID)
+    with phase("milestone"):
+        return _milestone_index.find_or_create(title)
+# ------------------- BAĞLANTI KONTROLÜ (--check) -------------------
+JIRA_CHECK_ISSUE = os.getenv("JIRA_CHECK_ISSUE", "GYT-126")
+
+def check_connectivity():
+    """Jira ve GitLab'e erişimi dene; import sırasında değil, yalnızca --check ile çalışır."""
+    ok = True
+    try:
+        test_response = http_client.get(
+            f"{JIRA_URL}/rest/api/2/issue/{JIRA_CHECK_ISSUE}",
+            headers={"Authorization": f"Bearer {JIRA_API_TOKEN}"},
+            max_retries=0,
+        )
+        if test_response.status_code == 200:
+            log("[JIRA TEST REQUEST] Başarılı ✅")
+        else:
+            ok = False
+            log(f"[JIRA TEST REQUEST] Uyarı: {test_response.status_code}")
+    except Exception as e:
+        ok = False
+        log(f"[JIRA TEST REQUEST] Hata: {e}")
+
+    try:
+        r = http_client.get(f"{GITLAB_API_URL}/user", headers=HEADERS, max_retries=0)
+        if r.status_code == 200:
+            log(f"[GITLAB TEST REQUEST] Başarılı ✅ ({r.json().get('username')})")
+        else:
+            ok = False
+            log(f"[GITLAB TEST REQUEST] Uyarı: {r.status_code}")
+    except Exception as e:
+        ok = False
+        log(f"[GITLAB TEST REQUEST] Hata: {e}")
+    return ok
+
+
+# ------------------- ISSUE SENKRONİZASYONU -------------------
+def build_issue_fields(row):
+    """Jira satırından master/child issue'larda ortak kullanılan alanları üret."""
+    title = (row.get("Summary") or "Untitled").strip()
+    jira_key = row.get("Issue key") or ""
+    orig_description = (row.get("Description") or "").strip()
+    labels = [lbl for lbl in [jira_key, row.get("Priority")] if lbl]
+    due_date = parse_date(row.get("Due Date"))
+    original_estimate = seconds_to_gitlab_duration(row.get("Original Estimate"))
+    time_spent = seconds_to_gitlab_duration(row.get("Time Spent"))
+
+    time_summary = (
+        f"**Jira Bilgileri**\n"
+        f"- Orijinal Jira Key: {jira_key}\n\n"
+        f"**Zaman Takibi**\n"
+        f"- Orijinal Tahmin: {original_estimate or 'N/A'}\n"
+        f"- Harcanan Zaman: {time_spent or 'N/A'}\n\n"
+        f"**Tarihler:**\n"
+        f"- Bitiş Tarihi: {due_date or 'N/A'}\n\n"
     )
-    if test_response.status_code == 200:
-        print("[JIRA TEST REQUEST] Başarılı ✅")
-    else:
-        print(f"[JIRA TEST REQUEST] Uyarı: {test_response.status_code}")
-except Exception as e:
-    print(f"[JIRA TEST REQUEST] Hata yutuldu: {e}")
+    description = time_summary + "--- Orijinal Açıklama ---\n\n" + orig_description
+
+    if row.get("Labels"):
+        labels += [x.strip() for x in row["Labels"].split(",") if x.strip()]
+
+    ilgili_stajyerler = (row.get("İlgili Stajyerler") or "").split(",")
+    ilgili_stajyerler = [s.strip() for s in ilgili_stajyerler if s.strip()]
+
+    return {
+        "title": title,
+        "jira_key": jira_key,
+        "orig_description": orig_description,
+        "description": description,
+        "labels_str": ",".join(labels),
+        "due_date": due_date,
+        "original_estimate": original_estimate,
+        "time_spent": time_spent,
+        "stajyerler": ilgili_stajyerler,
+        "attachments": parse_attachments(row.get("Attachments")),
+        "attachment_links": {},
+    }
 
+def prepare_attachments(fields, upload=True):
+    """Jira eklerini master ve tüm child projelerine (paralel) taşı; linkleri fields'a koy.
+
+    upload=False iken yalnızca daha önce yüklenmiş ekler kullanılır (güncellemede eski
+    payload'u yeniden üretmek için).
+    """
+    if not fields["attachments"]:
+        return fields
+    project_ids = [MASTER_PROJECT_ID] + [STAJYER_PROJECT_MAP.get(s) for s in fields["stajyerler"]]
+    fields["attachment_links"] = mirror_attachments(fields["attachments"], project_ids, upload=upload)
+    return fields
+
+def attachments_block(fields, project_id):
+    return attachment_section(fields["attachment_links"].get(str(project_id)))
+
+def build_master_payload(fields, row, milestone):
+    master_assignee_id = resolve_assignee_id(row.get("Assignee"))
+
+    master_data = {
+        "title": fields["title"],
+        "description": fields["description"] + attachments_block(fields, MASTER_PROJECT_ID),
+        "labels": fields["labels_str"],
+        "time_estimate": fields["original_estimate"],
+        "spent_time": fields["time_spent"],
+    }
+    if fields["due_date"]:
+        master_data["due_date"] = fields["due_date"]
+    if master_assignee_id:
+        master_data["assignee_ids"] = [master_assignee_id]
+    if milestone:
+        master_data["milestone_id"] = milestone["id"]
+    return master_data
+
+def build_child_payload(fields, stajyer, milestone, master_issue, proj_id):
+    child_assignee_id = resolve_assignee_id(stajyer)
+    child_description = (
+        f"**Ana Issue:** Project {MASTER_PROJECT_ID}, IID {master_issue['iid']} ({master_issue['web_url']})\n\n"
+        f"--- Orijinal Açıklama ---\n\n{fields['orig_description']}"
+        f"{attachments_block(fields, proj_id)}"
+    )
 
+    # Child issue başlığı için proje adı (cache'ten, yoksa API'den)
+    proj_name = get_project_name(proj_id)
 
-# ------------------- ANA İŞLEMLER -------------------
-if __name__ == "__main__":
-    fetch_jira_csv()
-    compare_issues()
-    rows = read_jira_csv_robustly(TO_ADD_FILE)  
-    print(f"\nToplam {len(rows)} Jira kaydı okundu.")
-
-    for i, row in enumerate(rows, start=1):
-        title = (row.get("Summary") or "Untitled").strip()
-        jira_key = row.get("Issue key") or ""
-        print(f"\n--- {i}/{len(rows)}: İşleniyor {jira_key} - {title} --- \n")
-
-        ilgili_stajyerler = row.get("İlgili Stajyerler", "").split(",")
-        ilgili_stajyerler = [s.strip() for s in ilgili_stajyerler if s.strip()]
-        print(f"➡️ Tespit Edilen Takımlar: {', '.join(ilgili_stajyerler) or 'Yok'}")
-
-        orig_description = (row.get("Description") or "").strip()
-        labels = [lbl for lbl in [jira_key, row.get("Priority")] if lbl]
-        due_date = parse_date(row.get("Due Date"))
-        original_estimate = seconds_to_gitlab_duration(row.get("Original Estimate"))
-        time_spent = seconds_to_gitlab_duration(row.get("Time Spent"))
-
-        time_summary = (
-            f"**Jira Bilgileri**\n"
-            f"- Orijinal Jira Key: {jira_key}\n\n"
-            f"**Zaman Takibi**\n"
-            f"- Orijinal Tahmin: {original_estimate or 'N/A'}\n"
-            f"- Harcanan Zaman: {time_spent or 'N/A'}\n\n"
-            f"**Tarihler:**\n"
-            f"- Bitiş Tarihi: {due_date or 'N/A'}\n\n"
-        )
-        description = time_summary + "--- Orijinal Açıklama ---\n\n" + orig_description
+    child_data = {
+        "title": f"{fields['title']} ({proj_name})",
+        "description": child_description,
+        "labels": fields["labels_str"],
+        "time_estimate": fields["original_estimate"],
+        "spent_time": fields["time_spent"]
+    }
+    if fields["due_date"]:
+        child_data["due_date"] = fields["due_date"]
+    if child_assignee_id:
+        child_data["assignee_ids"] = [child_assignee_id]
+    if milestone:
+        child_data["milestone_id"] = milestone["id"]
+    return child_data
+
+def create_child_issue(fields, stajyer, milestone, master_issue, journal=None, link=True):
+    """Stajyerin projesinde child issue aç ve master issue ile linkle.
+
+    journal verilirse adımlar kaydedilir ve daha önce tamamlananlar atlanır;
+    kurulamayan link journal'da eksik kalır. Journal'sız çağıranlar link=False
+    verip linki kendisi kurar, böylece başarısız link tekrar denenebilir.
+    """
+    proj_id = STAJYER_PROJECT_MAP.get(stajyer)
+    if not proj_id:
+        log(f"⚠️ Stajyer '{stajyer}' için proje ID'si bulunamadı. Atlanyor.")
+        return None
 
-        if row.get("Labels"):
-            labels += [x.strip() for x in row["Labels"].split(",") if x.strip()]
-        labels_str = ",".join(labels)
+    jira_key = fields["jira_key"]
+    state = journal.state(jira_key) if journal else None
+    child_data = build_child_payload(fields, stajyer, milestone, master_issue, proj_id)
+
+    child = state["children"].get(stajyer) if state else None
+    if child is None and state:
+        # Önceki çalışma POST'u göndermiş ama sonucu yazamadan durmuş olabilir;
+        # niyet yoksa yalnızca GitLab index'ine bakılır (istek atılmaz)
+        claimed = {iid for s, (pid, iid) in state["children"].items() if pid == proj_id}
+        existing = find_existing_issue(proj_id, jira_key, child_data["title"],
+                                       child_data.get("assignee_ids", [None])[0], claimed,
+                                       use_api=stajyer in state["child_pending"])
+        if existing:
+            child = (proj_id, existing["iid"])
+            journal.child(jira_key, stajyer, proj_id, existing["iid"])
+
+    if child is None:
+        if journal:
+            journal.child_intent(jira_key, stajyer)
+        child_url = f"{GITLAB_API_URL}/projects/{proj_id}/issues"
+        with phase("child"):
+            child_resp = http_client.post(child_url, headers=HEADERS, json=child_data)
+
+        if child_resp.status_code != 201:
+            log(f"⚠️ Child issue oluşturulamadı (stajyer {stajyer}): {child_resp.status_code} {child_resp.text}")
+            return None
+        created = child_resp.json()
+        child = (proj_id, created["iid"])
+        if journal:
+            journal.child(jira_key, stajyer, *child)
+        # Geri aktarım süre başlangıcı: ilk listelemedeki değil, açılıştaki süre
+        get_ledger().seed_child(proj_id, created["iid"], jira_key,
+                                int((created.get("time_stats") or {}).get("total_time_spent") or 0))
+
+    if not link:
+        log(f"  -> Child Issue Oluşturuldu: {child_data['title']}")
+    elif state is None or stajyer not in state["links"]:
+        if link_issues(int(MASTER_PROJECT_ID), master_issue["iid"], *child):
+            if journal:
+                journal.link(jira_key, stajyer)
+            log(f"  -> Child Issue Oluşturuldu: {child_data['title']} ve Ana Issue ile linklendi.")
+        else:
+            log(f"⚠️ Child issue açıldı ama Ana Issue ile linklenemedi: {child_data['title']}", jira_key=jira_key)
+    return child
+
+def resolve_master_issue(fields, master_data, journal, state):
+    """Master issue'yu journal'dan, yarım kalmışsa GitLab'den ya da yeni POST ile getir."""
+    jira_key = fields["jira_key"]
+    if state["master"]:
+        return state["master"]
+    # Defter kaybolmuş olsa da GitLab'de zaten olan master index'ten bulunur, ikinci kez açılmaz
+    existing = find_existing_issue(MASTER_PROJECT_ID, jira_key, fields["title"], use_api=state["master_pending"])
+    if existing:
+        journal.master(jira_key, existing)
+        log(f"↩️ Ana Issue zaten açılmış, yeniden açılmadı ({jira_key}, IID {existing['iid']})", jira_key=jira_key)
+        return existing
+
+    journal.master_intent(jira_key)
+    master_url = f"{GITLAB_API_URL}/projects/{MASTER_PROJECT_ID}/issues"
+    with phase("master"):
+        master_resp = http_client.post(master_url, headers=HEADERS, json=master_data)
+
+    if master_resp.status_code != 201:
+        log(f"⚠️ Master issue oluşturulamadı ({jira_key}): {master_resp.status_code} {master_resp.text}", jira_key=jira_key)
+        return None
 
-        # 🏷️ Group Milestone (Summary bazlı, tüm projelerde ortak)
+    master_issue = master_resp.json()
+    journal.master(jira_key, master_issue)
+    log(f"✅ Ana Issue Oluşturuldu: {fields['title']}")
+    return master_issue
+
+def incomplete_children(journal, jira_key, stajyerler):
+    """Journal'a göre child'ı açılmamış ya da master ile linklenmemiş stajyerler."""
+    state = journal.state(jira_key)
+    return [s for s in stajyerler
+            if STAJYER_PROJECT_MAP.get(s) and (s not in state["children"] or s not in state["links"])]
+
+def commit_issue(journal, fields, row, master_issue, children):
+    """Tüm child ve linkler tamamsa defteri yaz ve journal kaydını kapat.
+
+    Eksik adım varsa kayıt journal'da açık kalır; sonraki çalışma (ya da
+    --resume) yalnızca eksik adımları tekrarlar.
+    """
+    jira_key = fields["jira_key"]
+    missing = incomplete_children(journal, jira_key, fields["stajyerler"])
+    if missing:
+        log(f"⚠️ {jira_key}: child/link tamamlanamadı ({', '.join(missing)}); kayıt tekrar denenmek üzere açık bırakıldı.",
+            jira_key=jira_key)
+        return False
+    get_ledger().record(row, master_issue["iid"], children, master_url=master_issue["web_url"])
+    journal.commit(jira_key)
+    log(f"'{jira_key}' senkronizasyon defterine eklendi.", jira_key=jira_key)
+    return True
+
+def sync_issue(row, child_pool):
+    """Tek bir Jira kaydı için milestone -> master -> child + link adımlarını sırayla çalıştır."""
+    fields = build_issue_fields(row)
+    title = fields["title"]
+    jira_key = fields["jira_key"]
+    log(f"\n--- İşleniyor {jira_key} - {title} --- \n", jira_key=jira_key)
+    log(f"➡️ Tespit Edilen Takımlar ({jira_key}): {', '.join(fields['stajyerler']) or 'Yok'}", jira_key=jira_key)
+
+    # Journal: yarım kalmış bir kayıt varsa yalnızca eksik adımlar çalışır
+    journal = get_journal()
+    state = journal.begin(row)
+    if state["master"] or state["master_pending"]:
+        log(f"↩️ {jira_key} için yarım kalan aktarıma devam ediliyor.", jira_key=jira_key)
+
+    # 📎 Ekler: master ve child açıklamalarındaki linkler için önce yüklenir
+    prepare_attachments(fields)
+
+    # 🏷️ Group Milestone (Summary bazlı, tüm projelerde ortak)
+    milestone = state["milestone"]
+    if milestone is None:
         milestone = find_or_create_group_milestone(title)
-
-        # --- Master Issue Oluşturma ---
-        assignee_jira = row.get("Assignee")
-        master_assignee_id = ASSIGNEE_MAP.get(assignee_jira)
-
-        master_data = {
-            "title": title,
-            "description": description,
-            "labels": labels_str,
-            "time_estimate": original_estimate,
-            "spent_time": time_spent,
-        }
-        if due_date:
-            master_data["due_date"] = due_date
-        if master_assignee_id:
-            master_data["assignee_ids"] = [master_assignee_id]
         if milestone:
-            master_data["milestone_id"] = milestone["id"]
+            journal.milestone(jira_key, milestone)
 
-        master_url = f"https://gitlab.com/api/v4/projects/{MASTER_PROJECT_ID}/issues"
-        master_resp = requests.post(master_url, headers=HEADERS, json=master_data)
+    # --- Master Issue Oluşturma ---
+    master_issue = resolve_master_issue(fields, build_master_payload(fields, row, milestone), journal, state)
+    if master_issue is None:
+        return False
 
-        if master_resp.status_code == 201:
-            master_issue = master_resp.json()
-            master_iid = master_issue["iid"]
-            print(f"✅ Ana Issue Oluşturuldu: {row.get('Summary')}")
-        else:
-            print(f"⚠️ Master issue oluşturulamadı ({jira_key}): {master_resp.status_code} {master_resp.text}")
+    # --- Child Issue'ları Oluşturma ve Linkleme (master IID hazır, paralel) ---
+    futures = {
+        stajyer: child_pool.submit(create_child_issue, fields, stajyer, milestone, master_issue, journal)
+        for stajyer in fields["stajyerler"]
+    }
+    children = {stajyer: f.result() for stajyer, f in futures.items()}
+
+    # --- Defteri güncelle (master ve child IID'leriyle) ---
+    return commit_issue(journal, fields, row, master_issue, {s: c for s, c in children.items() if c})
+
+def sync_issue_graphql(row, child_pool):
+    """sync_issue'nun GraphQL karşılığı: master, tüm child'lar ve tüm linkler birer istekte.
+
+    GraphQL isteği başarısız olursa ilgili adım REST ile tekrarlanır.
+    """
+    fields = build_issue_fields(row)
+    title = fields["title"]
+    jira_key = fields["jira_key"]
+    log(f"\n--- İşleniyor (GraphQL) {jira_key} - {title} --- \n", jira_key=jira_key)
+    log(f"➡️ Tespit Edilen Takımlar ({jira_key}): {', '.join(fields['stajyerler']) or 'Yok'}", jira_key=jira_key)
+
+    master_path = get_project_path(MASTER_PROJECT_ID)
+    journal = get_journal()
+    index = get_issue_index(MASTER_PROJECT_ID)
+    if not master_path or journal.state(jira_key) or (index is not None and index.masters(jira_key)):
+        # Yarım kalmış ya da GitLab'de zaten bulunan kayıtlar adım adım (REST) tamamlanır
+        if not master_path:
+            log(f"⚠️ Master proje yolu alınamadı, REST ile devam ediliyor ({jira_key}).", jira_key=jira_key)
+        return sync_issue(row, child_pool)
+    journal.begin(row)
+    prepare_attachments(fields)
+
+    # 🏷️ Group Milestone (Summary bazlı, tüm projelerde ortak)
+    milestone = find_or_create_group_milestone(title)
+    if milestone:
+        journal.milestone(jira_key, milestone)
+
+    # --- Master Issue Oluşturma ---
+    journal.master_intent(jira_key)
+    try:
+        with phase("master"):
+            [master_issue] = gitlab_graphql.create_issues([(master_path, build_master_payload(fields, row, milestone))])
+    except gitlab_graphql.GraphQLError as e:
+        log(f"⚠️ GraphQL master hatası, REST ile devam ediliyor ({jira_key}): {e}", jira_key=jira_key)
+        return sync_issue(row, child_pool)
+    if isinstance(master_issue, str):
+        log(f"⚠️ Master issue oluşturulamadı ({jira_key}): {master_issue}", jira_key=jira_key)
+        return False
+    journal.master(jira_key, master_issue)
+    log(f"✅ Ana Issue Oluşturuldu: {title}")
+
+    # --- Child Issue'lar: tek istekte ---
+    targets = []
+    for stajyer in fields["stajyerler"]:
+        proj_id = STAJYER_PROJECT_MAP.get(stajyer)
+        proj_path = get_project_path(proj_id) if proj_id else None
+        if not proj_path:
+            log(f"⚠️ Stajyer '{stajyer}' için proje bulunamadı. Atlanyor.")
             continue
+        targets.append((stajyer, proj_id, proj_path))
 
-        # --- Child Issue'ları Oluşturma ve Linkleme ---
-        for stajyer in ilgili_stajyerler:
-            proj_id = STAJYER_PROJECT_MAP.get(stajyer)
-            if not proj_id:
-                print(f"⚠️ Stajyer '{stajyer}' için proje ID'si bulunamadı. Atlanyor.")
-                continue
-
-            child_assignee_id = ASSIGNEE_MAP.get(stajyer)
-            child_description = (
-                f"**Ana Issue:** Project {MASTER_PROJECT_ID}, IID {master_iid} ({master_issue['web_url']})\n\n"
-                f"--- Orijinal Açıklama ---\n\n{orig_description}"
-            )
-
+    items = [(path, build_child_payload(fields, stajyer, milestone, master_issue, proj_id))
+             for stajyer, proj_id, path in targets]
+    for stajyer, _, _ in targets:
+        journal.child_intent(jira_key, stajyer)
+    try:
+        with phase("child"):
+            results = gitlab_graphql.create_issues(items)
+    except gitlab_graphql.GraphQLError as e:
+        log(f"⚠️ GraphQL child hatası, REST ile devam ediliyor ({jira_key}): {e}", jira_key=jira_key)
+        results = [str(e)] * len(items)
+
+    children = {}
+    relate = []
+    for (stajyer, proj_id, path), result in zip(targets, results):
+        if isinstance(result, dict):
+            children[stajyer] = (proj_id, result["iid"])
+            relate.append((stajyer, proj_id, path, result["iid"]))
+            journal.child(jira_key, stajyer, proj_id, result["iid"])
+            get_ledger().seed_child(proj_id, result["iid"], jira_key, result["time_spent"])
+            log(f"  -> Child Issue Oluşturuldu: {title} ({get_project_name(proj_id)})")
+        else:
+            # Açılamayan child REST ile açılır (REST yolu linki de kurar)
+            created = create_child_issue(fields, stajyer, milestone, master_issue, journal)
+            if created:
+                children[stajyer] = created
 
-            # Child issue başlığı için proje adını API'den al
-            proj_info_url = f"https://gitlab.com/api/v4/projects/{proj_id}"
-            proj_info_resp = requests.get(proj_info_url, headers=HEADERS)
-            if proj_info_resp.status_code == 200:
-                proj_name = proj_info_resp.json().get("name", "Unknown Project")
-            else:
-                proj_name = "Unknown Project"
-
-
-            child_data = {
-                "title": f"{title} ({proj_name})",
-                "description": child_description,
-                "labels": labels_str,
-                "time_estimate": original_estimate,
-                "spent_time": time_spent
-            }
-            if due_date:
-                child_data["due_date"] = due_date
-            if child_assignee_id:
-                child_data["assignee_ids"] = [child_assignee_id]
-            if milestone:
-                child_data["milestone_id"] = milestone["id"]
-
-            child_url = f"https://gitlab.com/api/v4/projects/{proj_id}/issues"
-            child_resp = requests.post(child_url, headers=HEADERS, json=child_data)
-
-            if child_resp.status_code == 201:
-                child_issue = child_resp.json()
-                child_iid = child_issue["iid"]
-                link_issues(int(MASTER_PROJECT_ID), master_iid, proj_id, child_iid)
-                print(f"  -> Child Issue Oluşturuldu: {child_data['title']} ve Ana Issue ile linklendi.")
-            else:
-                print(f"⚠️ Child issue oluşturulamadı (stajyer {stajyer}): {child_resp.status_code} {child_resp.text}")
-            
-            if master_resp.status_code == 201:
-                master_issue = master_resp.json()
-                master_iid = master_issue["iid"]
-                print(f"✅ Ana Issue Oluşturuldu: {row.get('Summary')}")
-
-                    # --- uploaded CSV'yi güncelle ---
-                if os.path.exists(UPLOADED_FILE) and os.path.getsize(UPLOADED_FILE) > 0:
-                    uploaded_df = pd.read_csv(UPLOADED_FILE, encoding="utf-8-sig")
+    # --- Linkler: tek istekte ---
+    try:
+        with phase("link"):
+            results = gitlab_graphql.relate_issues([(master_issue["id"], path, iid) for _, _, path, iid in relate])
+    except gitlab_graphql.GraphQLError as e:
+        log(f"⚠️ GraphQL link hatası, REST ile devam ediliyor ({jira_key}): {e}", jira_key=jira_key)
+        results = [str(e)] * len(relate)
+    linked = 0
+    for (stajyer, proj_id, _, child_iid), result in zip(relate, results):
+        if result is True:
+            journal.link(jira_key, stajyer)
+            linked += 1
+            continue
+        # Reddedilen link REST ile tekrar denenir; o da olmazsa journal'da eksik kalır
+        log(f"⚠️ Link kurulamadı ({jira_key}, {stajyer}): {result}", jira_key=jira_key)
+        if link_issues(int(MASTER_PROJECT_ID), master_issue["iid"], proj_id, child_iid):
+            journal.link(jira_key, stajyer)
+            linked += 1
+    if linked:
+        log(f"  -> {linked} child Ana Issue ile linklendi.")
+
+    # --- Defteri güncelle (master ve child IID'leriyle) ---
+    return commit_issue(journal, fields, row, master_issue, children)
+
+# ------------------- DEĞİŞEN ISSUE'LARI GÜNCELLEME -------------------
+# Worker'ın işlemediği ama hata da saymadığı kayıtlar için dönüş değeri (truthy: watermark'ı durdurmaz)
+SKIPPED = "skipped"
+# PUT /issues ile güncellenemeyen (yalnızca oluştururken gönderilen) alanlar. Tahmin ve milestone
+# ayrıca güncellenir; harcanan süre bilerek güncellenmez: child'lardaki süre stajyerlerin kendi
+# kaydıdır ve back_sync ile Jira'ya aktarılır, Jira toplamını geri yazmak onu ezer ya da ikiler
+_CREATE_ONLY_KEYS = ("time_estimate", "spent_time", "milestone_id")
+# Yeni payload'da artık olmayan alanlar GitLab'de bu değerlerle temizlenir
+_CLEAR_VALUES = {"due_date": "", "assignee_ids": []}
+
+def payload_diff(old_payload, new_payload):
+    """İki issue payload'u arasındaki alan bazlı farkı (PUT gövdesi) döndür."""
+    diff = {}
+    for key in set(old_payload) | set(new_payload):
+        if key in _CREATE_ONLY_KEYS:
+            continue
+        if key not in new_payload:
+            if key in _CLEAR_VALUES:
+                diff[key] = _CLEAR_VALUES[key]
+        elif old_payload.get(key) != new_payload[key]:
+            diff[key] = new_payload[key]
+    return diff
+
+def update_gitlab_issue(project_id, iid, changes, milestone=None, estimate_changed=False, estimate=None):
+    """Issue'ya yalnızca değişen alanları gönder."""
+    if milestone:
+        changes = dict(changes, milestone_id=milestone["id"])
+    if changes:
+        url = f"{GITLAB_API_URL}/projects/{project_id}/issues/{iid}"
+        with phase("issue_update"):
+            r = http_client.put(url, headers=HEADERS, json=changes)
+        if r.status_code != 200:
+            log(f"⚠️ Issue güncellenemedi (project={project_id} IID={iid}): {r.status_code} {r.text}")
+            return False
+    if estimate_changed:
+        # Tahmini süre PUT ile değil, ayrı time tracking endpoint'leriyle değişir
+        base = f"{GITLAB_API_URL}/projects/{project_id}/issues/{iid}"
+        if estimate:
+            r = http_client.post(f"{base}/time_estimate", headers=HEADERS, params={"duration": estimate}, retry=True)
+        else:
+            r = http_client.post(f"{base}/reset_time_estimate", headers=HEADERS, retry=True)
+        if r.status_code != 200:
+            log(f"⚠️ Tahmini süre güncellenemedi (project={project_id} IID={iid}): {r.status_code}")
+            return False
+    return True
+
+def close_child_issue(project_id, iid):
+    url = f"{GITLAB_API_URL}/projects/{project_id}/issues/{iid}"
+    r = http_client.put(url, headers=HEADERS, json={"state_event": "close"})
+    if r.status_code != 200:
+        log(f"⚠️ Child issue kapatılamadı (project={project_id} IID={iid}): {r.status_code} {r.text}")
+        return False
+    return True
+
+def update_issue(row, child_pool):
+    """Defterdeki haline göre değişmiş bir Jira kaydının yalnızca farklarını GitLab'e uygula.
+
+    Bir adım başarısız olursa defterde eski satır (ve eski içerik özeti) kalır;
+    issue sonraki çalışmada yine "değişmiş" sayılır ve farklar tekrar uygulanır.
+    Master IID'si olmayan eski CSV kayıtları için SKIPPED döner.
+    """
+    jira_key = row["Issue key"]
+    ledger = get_ledger()
+    entry = ledger.get(jira_key)
+    if not entry or not entry["master_iid"]:
+        log(f"⚠️ {jira_key} için master IID defterde yok (eski CSV kaydı); güncelleme atlandı.", jira_key=jira_key)
+        return SKIPPED
+
+    old_row = entry["row"]
+    old_fields = prepare_attachments(build_issue_fields(old_row), upload=False)
+    new_fields = prepare_attachments(build_issue_fields(row))
+    log(f"\n--- Güncelleniyor {jira_key} - {new_fields['title']} --- \n", jira_key=jira_key)
+
+    # Başlık değiştiyse milestone da yeni başlığa taşınır
+    milestone = None
+    if old_fields["title"] != new_fields["title"]:
+        milestone = find_or_create_group_milestone(new_fields["title"])
+    estimate_changed = old_fields["original_estimate"] != new_fields["original_estimate"]
+
+    master_issue = {"iid": entry["master_iid"], "web_url": entry["master_url"] or ""}
+    master_changes = payload_diff(build_master_payload(old_fields, old_row, None),
+                                  build_master_payload(new_fields, row, None))
+    ok = True
+    if master_changes or milestone or estimate_changed:
+        ok = update_gitlab_issue(MASTER_PROJECT_ID, master_issue["iid"], master_changes, milestone,
+                                 estimate_changed, new_fields["original_estimate"])
+        if ok:
+            log(f"✏️ Ana Issue güncellendi ({jira_key}): {', '.join(sorted(master_changes)) or 'milestone/tahmin'}", jira_key=jira_key)
+
+    old_children = {s: (c["project_id"], c["iid"]) for s, c in entry["children"].items()}
+    # Önceki denemede açılıp linklenemeyen child'lar: defterde var ama eski satırın stajyerlerinde yok
+    to_link = [s for s in new_fields["stajyerler"] if s in old_children and s not in old_fields["stajyerler"]]
+    children = {}
+    futures = []  # (işlem, stajyer, future)
+    for stajyer in new_fields["stajyerler"]:
+        if stajyer in old_children:
+            proj_id, child_iid = old_children[stajyer]
+            children[stajyer] = (proj_id, child_iid)
+            changes = payload_diff(
+                build_child_payload(old_fields, stajyer, None, master_issue, proj_id),
+                build_child_payload(new_fields, stajyer, None, master_issue, proj_id),
+            )
+            if changes or milestone or estimate_changed:
+                futures.append(("update", stajyer, child_pool.submit(
+                    update_gitlab_issue, proj_id, child_iid, changes, milestone,
+                    estimate_changed, new_fields["original_estimate"])))
+        else:
+            # Yeni eklenen stajyer: child aç (link aşağıda; kurulamazsa güncelleme tekrar denenir)
+            futures.append(("create", stajyer, child_pool.submit(
+                create_child_issue, new_fields, stajyer,
+                milestone or find_or_create_group_milestone(new_fields["title"]), master_issue, link=False)))
+
+    # Çıkarılan stajyerlerin child issue'ları kapatılır
+    for stajyer, (proj_id, child_iid) in old_children.items():
+        if stajyer not in children:
+            futures.append(("close", stajyer, child_pool.submit(close_child_issue, proj_id, child_iid)))
+            log(f"  -> Stajyer çıkarıldı, child issue kapatılıyor: {stajyer}")
+
+    for action, stajyer, future in futures:
+        result = future.result()
+        if action == "create" and result:
+            children[stajyer] = result
+            to_link.append(stajyer)
+        elif not result:
+            ok = False
+            if action == "close":
+                # Kapatılamayan child defterde kalır; sonraki çalışmada tekrar kapatılır
+                children[stajyer] = old_children[stajyer]
+
+    for stajyer in to_link:
+        if link_issues(int(MASTER_PROJECT_ID), master_issue["iid"], *children[stajyer]):
+            log(f"  -> Child issue Ana Issue ile linklendi: {stajyer}")
+        else:
+            ok = False
+
+    if not ok:
+        # Açılan child'lar kaydedilir (tekrar açılmasın) ama içerik özeti eski satırda kalır
+        ledger.record(old_row, master_issue["iid"], children, master_url=entry["master_url"])
+        log(f"⚠️ {jira_key} güncellemesi tamamlanamadı; sonraki çalışmada tekrar denenecek.", jira_key=jira_key)
+        return False
+    ledger.record(row, master_issue["iid"], children, master_url=entry["master_url"])
+    log(f"'{jira_key}' defterde güncellendi.", jira_key=jira_key)
+    return True
+
+def run_sync(rows, concurrency=SYNC_CONCURRENCY, worker=None):
+    """Birbirinden bağımsız Jira kayıtlarını sınırlı sayıda worker ile paralel işle."""
+    worker = worker or sync_issue
+    concurrency = max(1, int(concurrency))
+    # Child'lar ayrı havuzda: issue worker'ları child future'larını beklerken kilitlenmesin.
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="issue") as issue_pool, \
+         ThreadPoolExecutor(max_workers=concurrency * 2, thread_name_prefix="child") as child_pool:
+        futures = {issue_pool.submit(worker, row, child_pool): row for row in rows}
+        ok = 0
+        for i, future in enumerate(as_completed(futures), start=1):
+            row = futures[future]
+            try:
+                result = future.result()
+                if result == SKIPPED:
+                    count("issues", worker=worker.__name__, result="skipped")
+                elif result:
+                    ok += 1
+                    count("issues", worker=worker.__name__, result="ok")
                 else:
-                    uploaded_df = pd.DataFrame(columns=row.keys())
+                    count("issues", worker=worker.__name__, result="failed")
+            except Exception as e:
+                count("issues", worker=worker.__name__, result="error")
+                log(f"❌ {row.get('Issue key')} işlenirken hata: {e}", jira_key=row.get("Issue key"))
+            log(f"--- {i}/{len(rows)} tamamlandı ({row.get('Issue key')}) ---")
+    metadata_cache.save()
+    return ok
+
+# ------------------- AKIŞ (PIPELINE) MODU -------------------
+def run_pipeline(concurrency=SYNC_CONCURRENCY, create_worker=None, incremental=None, snapshot=False):
+    """Jira sayfaları -> karşılaştırma -> GitLab worker'ları, arada CSV olmadan.
+
+    Satırlar Jira'dan geldikçe sınıflandırılır ve hemen worker havuzuna verilir;
+    ilk issue GitLab'e açılırken sonraki sayfalar hâlâ inebilir. snapshot=True
+    iken akıştaki satırlar sınıflarıyla birlikte SNAPSHOT_FILE'a da yazılır.
+    """
+    create_worker = create_worker or sync_issue
+    concurrency = max(1, int(concurrency))
+    # Jira çekimi worker'lardan çok öndeyse bellekte sınırsız satır birikmesin
+    backlog = threading.BoundedSemaphore(concurrency * 4)
+    progress = {}
+    counts = {}
+    failed = []
+    applied = []  # GitLab'e işlenen satırlar; LATEST_FILE'a yazılır
+
+    def _run(worker, row, child_pool):
+        try:
+            result = worker(row, child_pool)
+            if result == SKIPPED:
+                count("issues", worker=worker.__name__, result="skipped")
+            elif result:
+                applied.append(row)
+                count("issues", worker=worker.__name__, result="ok")
+            else:
+                count("issues", worker=worker.__name__, result="failed")
+                failed.append(row.get("Issue key"))
+        except Exception as e:
+            count("issues", worker=worker.__name__, result="error")
+            failed.append(row.get("Issue key"))
+            log(f"❌ {row.get('Issue key')} işlenirken hata: {e}")
+        finally:
+            backlog.release()
+
+    snapshot_file = open(SNAPSHOT_FILE, "w", encoding="utf-8-sig", newline="") if snapshot else None
+    try:
+        if snapshot_file:
+            writer = csv.DictWriter(snapshot_file, fieldnames=CSV_COLUMNS + ["Sync Durumu"],
+                                    restval="", extrasaction="ignore")
+            writer.writeheader()
+        # issue_pool içte: önce issue'lar (ve onların child işleri) bitsin, sonra child havuzu kapansın
+        with ThreadPoolExecutor(max_workers=concurrency * 2, thread_name_prefix="child") as child_pool, \
+             ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="issue") as issue_pool:
+            # Karşılaştırma Jira sayfası boyutunda parçalarla: bir sayfa gelir gelmez işlenir
+            for status, row in classify_rows(iter_jira_rows(incremental, progress), chunk_size=JIRA_PAGE_SIZE):
+                counts[status] = counts.get(status, 0) + 1
+                if snapshot_file:
+                    writer.writerow(dict(row, **{"Sync Durumu": status}))
+                if status in ("unchanged", "stale"):
+                    continue
+                worker = create_worker if status == "new" else update_issue
+                backlog.acquire()
+                issue_pool.submit(_run, worker, row, child_pool)
+    finally:
+        if snapshot_file:
+            snapshot_file.close()
+        metadata_cache.save()
+
+    log(f"\n🔁 Pipeline: {progress.get('count', 0)} issue çekildi, sınıflar: {counts}")
+    # Watermark yalnızca tüm issue'lar sorunsuz işlendiyse ilerler; aksi halde sonraki çalışma tekrar dener.
+    # İşlenen satırlar her durumda LATEST_FILE'a yazılır: dosya modu defterin gerisinde kalmasın
+    if failed:
+        log(f"⚠️ {len(failed)} issue işlenemedi, watermark güncellenmedi: {', '.join(failed)}")
+        merge_latest_rows(applied)
+    else:
+        commit_watermark(progress, applied)
+    return counts
 
-                # Eğer aynı Issue key zaten varsa tekrar ekleme
-                if not ((uploaded_df['Issue key'] == row['Issue key']).any()):
-                    uploaded_df = pd.concat([uploaded_df, pd.DataFrame([row])], ignore_index=True)
-                    uploaded_df.to_csv(UPLOADED_FILE, index=False, encoding="utf-8-sig")
-                    print(f"'{row['Issue key']}' uploaded CSV'ye eklendi.")
-                else:
-                    print(f"'{row['Issue key']}' zaten uploaded CSV'de mevcut, tekrar eklenmedi.")
 
+# ------------------- ANA İŞLEMLER -------------------
+def sync(concurrency=SYNC_CONCURRENCY, backend=GITLAB_BACKEND, incremental=None, pipeline=False,
+         snapshot=False, resume=False, back_sync=False):
+    """Tek bir Jira projesi (shard) için tam aktarım; sayaç özetini döndürür.
 
-    print("\n✅ Aktarım tamamlandı. Tüm takımlar için issue'lar oluşturuldu ve grup milestone'una eklendi.\n")
+    Bitişte aşama süreleri ve istek metrikleri shard klasöründeki (ya da METRICS_JSON_FILE /
+    METRICS_PROM_FILE) rapor dosyalarına yazılır.
+    """
+    try:
+        counts = _sync(concurrency, backend, incremental, pipeline, snapshot, resume)
+        if back_sync:
+            # GitLab'de kapanan child'lar ve kaydedilen süreler Jira'ya geri yazılır
+            from back_sync import back_sync as run_back_sync
+            counts["back_sync"] = run_back_sync(concurrency)
+        return counts
+    finally:
+        summary = write_reports()
+        if LOG_FORMAT != "json":
+            http_client.print_stats()
+        print_summary(summary)
+
+def _sync(concurrency, backend, incremental, pipeline, snapshot, resume):
+    create_worker = sync_issue_graphql if backend == "graphql" else sync_issue
+
+    if resume:
+        pending = get_journal().pending_rows()
+        log(f"\n↩️ Journal'da yarım kalan {len(pending)} aktarım tamamlanacak.")
+        # Yarım kalan kayıtlar her zaman adım adım (REST) tamamlanır
+        with phase("resume"):
+            ok = run_sync(pending, concurrency, worker=sync_issue)
+        return {"resumed": ok}
+
+    if pipeline:
+        with phase("pipeline"):
+            counts = run_pipeline(concurrency, create_worker, incremental, snapshot)
+        log("\n✅ Aktarım tamamlandı.\n")
+        return counts
+
+    with phase("fetch"):
+        fetch_jira_csv(incremental=incremental)
+    with phase("compare"):
+        counts = compare_issues()
+    rows = read_jira_csv_robustly(TO_ADD_FILE)
+    log(f"\nToplam {len(rows)} Jira kaydı okundu.")
+
+    with phase("sync"):
+        counts["created"] = run_sync(rows, concurrency, worker=create_worker)
+
+    # Jira'da değişmiş issue'lar: yalnızca farklar GitLab'e gönderilir
+    update_rows = read_jira_csv_robustly(TO_UPDATE_FILE)
+    if update_rows:
+        log(f"\nToplam {len(update_rows)} değişen Jira kaydı güncellenecek.")
+        with phase("update"):
+            counts["updated"] = run_sync(update_rows, concurrency, worker=update_issue)
+
+    log("\n✅ Aktarım tamamlandı. Tüm takımlar için issue'lar oluşturuldu ve grup milestone'una eklendi.\n")
+    return counts
 
-    
\ No newline at end of file
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Jira issue'larını GitLab'e aktar.")
+    arg_parser.add_argument("--concurrency", type=int, default=SYNC_CONCURRENCY,
+                            help="Aynı anda işlenecek Jira issue sayısı (varsayılan: SYNC_CONCURRENCY)")
+    arg_parser.add_argument("--backend", choices=["rest", "graphql"], default=GITLAB_BACKEND,
+                            help="Issue/link oluşturma yolu (varsayılan: GITLAB_BACKEND ya da rest)")
+    arg_parser.add_argument("--incremental", action="store_true", default=None,
+                            help="Jira'dan yalnızca son watermark'tan beri güncellenen issue'ları çek")
+    arg_parser.add_argument("--pipeline", action="store_true",
+                            help="Jira'dan gelen issue'ları CSV'ye yazmadan doğrudan GitLab'e aktar")
+    arg_parser.add_argument("--snapshot", action="store_true",
+                            help="Pipeline modunda akıştaki satırları SNAPSHOT_FILE'a da yaz")
+    arg_parser.add_argument("--resume", action="store_true",
+                            help="Jira'dan çekmeden yalnızca journal'da yarım kalan aktarımları tamamla")
+    arg_parser.add_argument("--back-sync", action="store_true",
+                            help="Aktarımdan sonra GitLab'deki child durumlarını ve süreleri Jira'ya geri yaz")
+    arg_parser.add_argument("--check", action="store_true",
+                            help="Yalnızca Jira/GitLab bağlantısını test et ve çık")
+    args = arg_parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if check_connectivity() else 1)
+
+    sync(args.concurrency, args.backend, args.incremental, args.pipeline, args.snapshot, args.resume, args.back_sync)
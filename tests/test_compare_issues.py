@@ -0,0 +1,46 @@
+import csv
+import jira_auto_export
+from compare_issues import classify_row
+from jira_auto_export import merge_latest_rows, commit_watermark
+from sync_ledger import SyncLedger
+
+
+def jira_row(key, summary, updated, issue_id="1"):
+    return {"Issue key": key, "Issue id": issue_id, "Summary": summary, "Updated": updated,
+            "İlgili Stajyerler": "burak.kiraz"}
+
+def read_latest(path):
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return {r["Issue key"]: r for r in csv.DictReader(f)}
+
+
+def test_row_older_than_ledger_is_stale(tmp_path):
+    ledger = SyncLedger(str(tmp_path / "ledger.db"))
+    ledger.record(jira_row("GYT-1", "yeni", "2025-10-02T10:00:00.000+0300"), master_iid=5)
+    assert classify_row(jira_row("GYT-1", "eski", "2025-10-01T10:00:00.000+0300"), ledger) == "stale"
+    assert classify_row(jira_row("GYT-1", "daha yeni", "2025-10-03T10:00:00.000+0300"), ledger) == "changed"
+    assert classify_row(jira_row("GYT-1", "yeni", "2025-10-01T10:00:00.000+0300"), ledger) == "unchanged"
+    assert classify_row(jira_row("GYT-2", "yeni", "2025-10-01T10:00:00.000+0300"), ledger) == "new"
+    ledger.close()
+
+def test_merge_latest_keeps_newer_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(jira_auto_export, "CSV_FOLDER", str(tmp_path))
+    monkeypatch.setattr(jira_auto_export, "LATEST_FILE", str(tmp_path / "jira_latest.csv"))
+    merge_latest_rows([jira_row("GYT-1", "v1", "2025-10-01T10:00:00.000+0300"),
+                       jira_row("GYT-2", "v3", "2025-10-03T10:00:00.000+0300")])
+    merge_latest_rows([jira_row("GYT-1", "v2", "2025-10-02T10:00:00.000+0300"),
+                       jira_row("GYT-2", "v2", "2025-10-02T10:00:00.000+0300"),
+                       jira_row("GYT-3", "v1", "2025-10-01T10:00:00.000+0300")])
+    latest = read_latest(tmp_path / "jira_latest.csv")
+    assert {k: r["Summary"] for k, r in latest.items()} == {"GYT-1": "v2", "GYT-2": "v3", "GYT-3": "v1"}
+
+def test_commit_watermark_merges_rows_with_watermark(tmp_path, monkeypatch):
+    monkeypatch.setattr(jira_auto_export, "CSV_FOLDER", str(tmp_path))
+    monkeypatch.setattr(jira_auto_export, "LATEST_FILE", str(tmp_path / "jira_latest.csv"))
+    monkeypatch.setattr(jira_auto_export, "WATERMARK_FILE", str(tmp_path / "jira_watermark.json"))
+    row = jira_row("GYT-1", "v2", "2025-10-02T10:00:00.000+0300", issue_id="7")
+    progress = {"incremental": True, "last_seen": None,
+                "newest": (jira_auto_export.watermark_key(row["Updated"], row["Issue id"]), row)}
+    commit_watermark(progress, [row])
+    assert read_latest(tmp_path / "jira_latest.csv")["GYT-1"]["Summary"] == "v2"
+    assert jira_auto_export.load_watermark() == {"updated": row["Updated"], "id": "7"}
@@ -0,0 +1,79 @@
+import pytest
+import gitlab_api
+from gitlab_api import iter_issues, GitLabAPIError
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None, headers=None):
+        self.status_code = status_code
+        self._data = data
+        self.headers = headers or {}
+
+    def json(self):
+        return self._data
+
+
+def fake_issue_list(issues, fail_on=None):
+    """GitLab'in issue listesi gibi davranan get: order_by + id sıralı, *_after dahil, page/per_page."""
+    calls = []
+
+    def get(url, headers=None, params=None):
+        calls.append(dict(params))
+        if fail_on is not None and len(calls) == fail_on:
+            return FakeResponse(503, {"message": "unavailable"})
+        order_by = params["order_by"]
+        after = params.get("updated_after" if order_by == "updated_at" else "created_after")
+        items = sorted((i for i in issues if after is None or i[order_by] >= after),
+                       key=lambda i: (i[order_by], i["id"]))
+        per_page, page = params["per_page"], params.get("page", 1)
+        return FakeResponse(200, items[(page - 1) * per_page: page * per_page])
+
+    get.calls = calls
+    return get
+
+def make_issues(timestamps):
+    return [{"id": n, "iid": n, "created_at": ts, "updated_at": ts} for n, ts in enumerate(timestamps, start=1)]
+
+
+def test_lists_all_issues_across_pages(monkeypatch):
+    issues = make_issues([f"2025-01-01T00:00:{n:02d}Z" for n in range(25)])
+    monkeypatch.setattr(gitlab_api.http_client, "get", fake_issue_list(issues))
+    assert [i["id"] for i in iter_issues(1, per_page=10)] == [i["id"] for i in issues]
+
+def test_page_sharing_one_timestamp_does_not_end_listing(monkeypatch):
+    # 3 sayfa dolusu issue aynı saniyede açılmış; cursor ilerleyemez ama liste bitmiş sayılmamalı
+    issues = make_issues(["2025-01-01T00:00:00Z"] * 25 + ["2025-01-01T00:00:05Z"] * 3)
+    monkeypatch.setattr(gitlab_api.http_client, "get", fake_issue_list(issues))
+    ids = [i["id"] for i in iter_issues(1, per_page=10)]
+    assert sorted(ids) == [i["id"] for i in issues]
+    assert len(ids) == len(set(ids))
+
+def test_tie_at_page_boundary_is_not_duplicated(monkeypatch):
+    issues = make_issues(["2025-01-01T00:00:01Z"] * 8 + ["2025-01-01T00:00:02Z"] * 4 + ["2025-01-01T00:00:03Z"])
+    monkeypatch.setattr(gitlab_api.http_client, "get", fake_issue_list(issues))
+    ids = [i["id"] for i in iter_issues(1, per_page=10, order_by="updated_at")]
+    assert ids == [i["id"] for i in issues]
+
+def test_error_page_raises_instead_of_ending_quietly(monkeypatch):
+    issues = make_issues([f"2025-01-01T00:00:{n:02d}Z" for n in range(25)])
+    monkeypatch.setattr(gitlab_api.http_client, "get", fake_issue_list(issues, fail_on=2))
+    seen = []
+    with pytest.raises(GitLabAPIError):
+        for issue in iter_issues(1, per_page=10):
+            seen.append(issue["id"])
+    assert len(seen) == 10
+
+def test_group_milestones_follow_next_page_and_raise_on_error(monkeypatch):
+    pages = {1: [{"id": 1, "title": "A"}], 2: [{"id": 2, "title": "B"}]}
+
+    def fake_get(url, headers=None, params=None):
+        page = params["page"]
+        if page == 3:
+            return FakeResponse(500, [])
+        return FakeResponse(200, pages[page], headers={"X-Next-Page": str(page + 1)})
+
+    monkeypatch.setattr(gitlab_api.http_client, "get", fake_get)
+    milestones = gitlab_api.iter_group_milestones(1)
+    assert [m["title"] for m in (next(milestones), next(milestones))] == ["A", "B"]
+    with pytest.raises(GitLabAPIError):
+        next(milestones)
@@ -0,0 +1,74 @@
+import os
+import pytest
+import gitlab_cache
+from gitlab_api import GitLabAPIError
+from gitlab_cache import MilestoneIndex
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None, text="", headers=None):
+        self.status_code = status_code
+        self._data = data
+        self.text = text
+        self.headers = headers or {}
+
+    def json(self):
+        return self._data
+
+
+class FakeGroup:
+    """Grup milestone endpoint'i: listeleme hata verebilir, aynı başlık ikinci kez açılamaz."""
+
+    def __init__(self, milestones=(), list_status=200):
+        self.milestones = [{"id": n, "title": t} for n, t in enumerate(milestones, start=1)]
+        self.list_status = list_status
+        self.gets = 0
+        self.posts = 0
+
+    def get(self, url, headers=None, params=None):
+        self.gets += 1
+        if self.list_status != 200:
+            return FakeResponse(self.list_status, text="unavailable")
+        page = params.get("page", 1)
+        return FakeResponse(200, self.milestones if page == 1 else [], headers={"X-Next-Page": ""})
+
+    def post(self, url, headers=None, json=None):
+        self.posts += 1
+        if any(m["title"] == json["title"] for m in self.milestones):
+            return FakeResponse(400, text='{"message":"Title has already been taken"}')
+        milestone = {"id": len(self.milestones) + 1, "title": json["title"]}
+        self.milestones.append(milestone)
+        return FakeResponse(201, milestone)
+
+@pytest.fixture
+def group(monkeypatch):
+    fake = FakeGroup(["Sprint 1"])
+    monkeypatch.setattr(gitlab_cache.http_client, "get", fake.get)
+    monkeypatch.setattr(gitlab_cache.http_client, "post", fake.post)
+    return fake
+
+
+def test_failed_listing_is_neither_used_nor_persisted(group, tmp_path):
+    cache_file = str(tmp_path / "milestones.json")
+    group.list_status = 503
+    index = MilestoneIndex(1, cache_file=cache_file)
+    with pytest.raises(GitLabAPIError):
+        index.find_or_create("Sprint 1")
+    assert index.milestones is None
+    assert not os.path.exists(cache_file)
+    assert group.posts == 0
+
+    group.list_status = 200
+    assert index.find_or_create("Sprint 1")["id"] == 1
+    assert group.posts == 0
+
+def test_taken_title_refetches_instead_of_returning_none(group, tmp_path):
+    cache_file = str(tmp_path / "milestones.json")
+    MilestoneIndex(1, cache_file=cache_file).load()
+    # Cache yazıldıktan sonra başka bir süreç yeni milestone açar
+    group.milestones.append({"id": 2, "title": "Sprint 2"})
+    index = MilestoneIndex(1, cache_file=cache_file)
+    assert index.find_or_create("Sprint 2") == {"id": 2, "title": "Sprint 2"}
+    # Yenilenen index diske de yazıldı; sonraki süreç aynı başlığı yeniden açmaya çalışmaz
+    assert MilestoneIndex(1, cache_file=cache_file).find_or_create("Sprint 2")["id"] == 2
+    assert group.posts == 1
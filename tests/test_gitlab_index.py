@@ -0,0 +1,37 @@
+import os
+import time
+import pytest
+import gitlab_index
+from gitlab_index import GitLabIssueIndex, get_issue_index, invalidate_issue_index
+
+STALE = gitlab_index.GITLAB_INDEX_TTL + 60
+
+
+@pytest.fixture
+def path(tmp_path):
+    invalidate_issue_index(None)
+    yield str(tmp_path / "gitlab_index.json")
+    invalidate_issue_index(None)
+
+def write_index(path, built_at, key="GYT-1"):
+    GitLabIssueIndex(100, {key: {"masters": [], "children": []}}, built_at).save(path)
+    # Aynı anda yeniden yazılan dosyaların da değişmiş görünmesi için mtime'ı yapı zamanına çek
+    os.utime(path, (built_at, built_at))
+
+
+def test_index_is_dropped_once_it_goes_stale(path, monkeypatch):
+    now = time.time()
+    write_index(path, now)
+    assert len(get_issue_index(100, path)) == 1
+    monkeypatch.setattr(gitlab_index.time, "time", lambda: now + STALE)
+    assert get_issue_index(100, path) is None
+
+def test_rewritten_index_is_reloaded(path):
+    write_index(path, time.time() - STALE)
+    assert get_issue_index(100, path) is None
+    write_index(path, time.time(), key="GYT-2")
+    assert "GYT-2" in get_issue_index(100, path).entries
+
+def test_index_without_build_time_is_stale(path):
+    write_index(path, 0)
+    assert GitLabIssueIndex.load(100, path) is None
@@ -0,0 +1,44 @@
+import os
+import re
+import sys
+import json
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# `import sync_to_gitlab` için izin verilen en uzun süre (ms, en iyi ölçüm)
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "300"))
+IMPORT_TIME_RUNS = 3
+
+
+def _run(code, env=None):
+    return subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO_DIR,
+                          env={**os.environ, **(env or {})}, capture_output=True, text=True, check=True)
+
+def _cumulative_ms(stderr, module):
+    """-X importtime çıktısından modülün kümülatif import süresi (ms)."""
+    for line in stderr.splitlines():
+        m = re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)$", line)
+        if m and m.group(2) == module:
+            return int(m.group(1)) / 1000
+    raise AssertionError(f"{module} importtime çıktısında yok")
+
+def test_import_time_within_budget():
+    best = min(_cumulative_ms(_run("import sync_to_gitlab").stderr, "sync_to_gitlab")
+               for _ in range(IMPORT_TIME_RUNS))
+    assert best <= IMPORT_TIME_BUDGET_MS, \
+        f"import sync_to_gitlab {best:.1f} ms sürdü (bütçe {IMPORT_TIME_BUDGET_MS:.0f} ms)"
+
+def test_import_does_not_read_caches(tmp_path):
+    # Cache dosyaları varken bile import anında okunmamalı; ilk erişimde okunur
+    for name in ("gitlab_metadata.json", "attachment_index.json"):
+        (tmp_path / name).write_text(json.dumps({"project_name": {}}), encoding="utf-8")
+    code = (
+        "import sys, json\n"
+        "opened = []\n"
+        "sys.addaudithook(lambda ev, args: ev == 'open' and opened.append(str(args[0])))\n"
+        "import sync_to_gitlab, jira_attachments\n"
+        "print(json.dumps(opened))\n"
+    )
+    out = _run(code, env={"CSV_FOLDER": str(tmp_path)}).stdout
+    opened = json.loads(out.strip().splitlines()[-1])
+    assert not [path for path in opened if path.startswith(str(tmp_path))], opened
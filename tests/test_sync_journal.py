@@ -0,0 +1,70 @@
+import json
+import pytest
+from sync_journal import SyncJournal
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "sync_journal.jsonl")
+
+def reopen(journal):
+    """Süreç çökmüş gibi dosyayı bırak ve journal'ı baştan yükle."""
+    journal._file.close()
+    return SyncJournal(journal.path)
+
+def crash_midway(path):
+    journal = SyncJournal(path)
+    journal.begin({"Issue key": "GYT-1", "Summary": "x"})
+    journal.milestone("GYT-1", {"id": 5, "title": "Sprint 1"})
+    journal.master_intent("GYT-1")
+    journal.master("GYT-1", {"id": 11, "iid": 1, "web_url": "http://gitlab/1"})
+    journal.child_intent("GYT-1", "a")
+    journal.child("GYT-1", "a", 101, 7)
+    journal.link("GYT-1", "a")
+    journal.child_intent("GYT-1", "b")
+    return journal
+
+
+def test_replay_restores_unfinished_steps(path):
+    state = reopen(crash_midway(path)).state("GYT-1")
+    assert state["row"]["Summary"] == "x"
+    assert state["master"]["iid"] == 1 and not state["master_pending"]
+    assert state["children"] == {"a": (101, 7)}
+    assert state["child_pending"] == {"b"}
+    assert state["links"] == {"a"}
+
+def test_truncated_last_line_is_ignored(path):
+    journal = crash_midway(path)
+    journal._file.write('{"key": "GYT-1", "step": "child", "stajyer": "b", "proj')
+    journal._file.flush()
+    state = reopen(journal).state("GYT-1")
+    assert state["child_pending"] == {"b"} and "b" not in state["children"]
+
+def test_begin_returns_existing_state(path):
+    journal = reopen(crash_midway(path))
+    assert journal.begin({"Issue key": "GYT-1", "Summary": "new"})["row"]["Summary"] == "x"
+    assert [row["Issue key"] for row in journal.pending_rows()] == ["GYT-1"]
+
+def test_compaction_drops_committed_keys(path):
+    journal = crash_midway(path)
+    journal.begin({"Issue key": "GYT-2", "Summary": "y"})
+    journal.commit("GYT-1")
+    journal = reopen(journal)
+    assert journal.state("GYT-1") is None
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert {rec["key"] for rec in records} == {"GYT-2"}
+    # Sıkıştırılmış dosya da aynı durumu üretmeli
+    assert reopen(journal).state("GYT-2")["row"]["Summary"] == "y"
+
+def test_compaction_preserves_state(path):
+    before = reopen(crash_midway(path))
+    assert reopen(before).state("GYT-1") == before.state("GYT-1")
+
+def test_state_is_a_copy(path):
+    journal = crash_midway(path)
+    state = journal.state("GYT-1")
+    state["children"]["b"] = (102, 8)
+    state["links"].add("b")
+    assert journal.state("GYT-1")["children"] == {"a": (101, 7)}
+    assert journal.state("GYT-1")["links"] == {"a"}
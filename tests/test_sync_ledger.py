@@ -0,0 +1,66 @@
+import pytest
+from sync_ledger import SyncLedger, content_hash
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = SyncLedger(str(tmp_path / "ledger.db"))
+    ledger.record({"Issue key": "GYT-1", "Summary": "x"}, master_iid=1, children={"a": (101, 7), "b": (102, 8)})
+    yield ledger
+    ledger.close()
+
+def observe(ledger, *children):
+    """children: (project_id, iid, state, time_spent)"""
+    return ledger.observe_children([(pid, iid, "GYT-1", state, spent) for pid, iid, state, spent in children])
+
+
+def test_content_hash_ignores_formatting_only_differences():
+    row = {"Summary": "x", "Time Spent": "3600", "İlgili Stajyerler": "b, a", "Updated": "1"}
+    assert content_hash(row) == content_hash(dict(row, **{"Time Spent": "3600.0", "İlgili Stajyerler": "a,b",
+                                                          "Updated": "2"}))
+    assert content_hash(row) != content_hash(dict(row, Summary="y"))
+
+def test_worklog_is_claimed_once_and_finished(ledger):
+    observe(ledger, (101, 7, "opened", 0), (102, 8, "opened", 0))
+    observe(ledger, (101, 7, "opened", 1800), (102, 8, "opened", 1200))
+    token, seconds, fresh = ledger.claim_worklog("GYT-1", 60)
+    assert (seconds, fresh) == (3000, True)
+    # POST'un sonucu bilinmiyorsa aynı token ve süre tekrar döner; yeni süre eklenmez
+    observe(ledger, (101, 7, "opened", 2400))
+    assert ledger.claim_worklog("GYT-1", 60) == (token, 3000, False)
+    ledger.finish_worklog("GYT-1")
+    retry = ledger.claim_worklog("GYT-1", 60)
+    assert retry[1:] == (600, True) and retry[0] != token
+    ledger.finish_worklog("GYT-1")
+    assert ledger.claim_worklog("GYT-1", 60) is None
+
+def test_short_worklogs_accumulate(ledger):
+    observe(ledger, (101, 7, "opened", 0))
+    observe(ledger, (101, 7, "opened", 30))
+    assert ledger.claim_worklog("GYT-1", 60) is None
+    observe(ledger, (101, 7, "opened", 90))
+    assert ledger.claim_worklog("GYT-1", 60)[1] == 90
+
+def test_removed_time_is_not_pushed(ledger):
+    observe(ledger, (101, 7, "opened", 3600))
+    observe(ledger, (101, 7, "opened", 0))
+    assert ledger.claim_worklog("GYT-1", 60) is None
+    observe(ledger, (101, 7, "opened", 600))
+    assert ledger.claim_worklog("GYT-1", 60)[1] == 600
+
+def test_time_logged_before_first_observation_is_pushed(ledger):
+    ledger.seed_child(101, 7, "GYT-1", 0)
+    # Stajyer ilk geri aktarım turundan önce süre kaydetmiş
+    assert observe(ledger, (101, 7, "opened", 2700)) == {"GYT-1"}
+    assert ledger.claim_worklog("GYT-1", 60)[1] == 2700
+
+def test_unseeded_child_starts_from_first_observation(ledger):
+    assert observe(ledger, (101, 7, "opened", 2700)) == {"GYT-1"}
+    assert ledger.claim_worklog("GYT-1", 60) is None
+
+def test_dirty_keys_only_cover_synced_issues(ledger):
+    ledger.observe_children([(101, 9, "GYT-99", "closed", 0)])
+    observe(ledger, (101, 7, "closed", 0))
+    assert ledger.dirty_keys() == ["GYT-1"]
+    ledger.mark_backsynced("GYT-1", "open")
+    assert ledger.dirty_keys() == []
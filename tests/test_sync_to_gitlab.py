@@ -0,0 +1,20 @@
+from sync_to_gitlab import payload_diff
+
+
+def test_only_changed_fields_are_sent():
+    old = {"title": "A", "description": "d", "labels": "GYT-1,High"}
+    new = {"title": "B", "description": "d", "labels": "GYT-1,High"}
+    assert payload_diff(old, new) == {"title": "B"}
+
+def test_create_only_fields_are_not_sent():
+    old = {"title": "A", "time_estimate": "1h", "spent_time": "1h", "milestone_id": 1}
+    new = {"title": "A", "time_estimate": "2h", "spent_time": "3h", "milestone_id": 2}
+    assert payload_diff(old, new) == {}
+
+def test_removed_fields_are_cleared():
+    old = {"title": "A", "due_date": "2025-10-01", "assignee_ids": [5], "labels": "GYT-1"}
+    new = {"title": "A"}
+    assert payload_diff(old, new) == {"due_date": "", "assignee_ids": []}
+
+def test_added_fields_are_sent():
+    assert payload_diff({"title": "A"}, {"title": "A", "due_date": "2025-10-01"}) == {"due_date": "2025-10-01"}